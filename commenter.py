@@ -5,24 +5,29 @@ import math
 import os
 import random
 import time
+from contextlib import nullcontext
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from typing import List
 
 from ai_client import AIClient, GenConfig
 from nodeseek_client import NodeSeekClient
+from run_trace import trace
 
 
 # ---------------- 通知模块（可选） ----------------
 hadsend = False
 try:
-    from notify import send
+    from notify import digest, send
 
     hadsend = True
 except Exception:
     def send(*args, **kwargs):
         pass
 
+    def digest(title):
+        return nullcontext()
+
 
 GMT8 = timezone(timedelta(hours=8))
 HISTORY_FILE = "./cookie/comment_history.json"
@@ -191,7 +196,7 @@ def run_comment_for_account(ns_cookie: str, account_label: str, dry_run: bool =
             print("------------------------------------")
             if hadsend:
                 try:
-                    send("NodeSeek 评论干跑", f"{account_label} 在 {title} 的草稿评论:\n{comment}")
+                    send("NodeSeek 评论干跑", f"{account_label} 在 {title} 的草稿评论:\n{comment}", severity="info")
                 except Exception:
                     pass
         else:
@@ -206,13 +211,13 @@ def run_comment_for_account(ns_cookie: str, account_label: str, dry_run: bool =
                 _save_history(history)
                 if hadsend:
                     try:
-                        send("NodeSeek 评论成功", f"{account_label} 在 {title} 评论成功:\n{comment}")
+                        send("NodeSeek 评论成功", f"{account_label} 在 {title} 评论成功:\n{comment}", severity="success")
                     except Exception:
                         pass
             else:
                 if hadsend:
                     try:
-                        send("NodeSeek 评论失败", f"{account_label} 在 {title} 评论失败: {msg}")
+                        send("NodeSeek 评论失败", f"{account_label} 在 {title} 评论失败: {msg}", severity="failure")
                     except Exception:
                         pass
                 if isinstance(msg, str) and any(code in msg for code in ("403", "429")):
@@ -247,6 +252,9 @@ def main():
             except Exception:
                 pass
 
+    # 每次运行使用新的运行 ID：发件箱按运行去重，进程内重复执行时相同内容的通知仍会推送
+    trace.begin_run("comment")
+
     # 是否启用干跑
     dry_run = os.getenv("NS_COMMENT_DRY_RUN", "true").lower() == "true"
 
@@ -284,10 +292,11 @@ def main():
         print("未检测到 NS_COOKIE，无法进行评论")
         return
 
-    # 每个 cookie 作为一个账号处理
-    for idx, ck in enumerate(cookie_list, 1):
-        label = f"账号{idx}"
-        run_comment_for_account(ck, label, dry_run=dry_run)
+    # 每个 cookie 作为一个账号处理；本次运行的评论通知合并为一条推送
+    with digest("NodeSeek 评论"):
+        for idx, ck in enumerate(cookie_list, 1):
+            label = f"账号{idx}"
+            run_comment_for_account(ck, label, dry_run=dry_run)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+import threading
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+from credit_stats import CreditRow, parse_epoch
+
+LEDGER_DB_PATH = os.environ.get("NS_CREDIT_LEDGER_PATH", "./cookie/credit_ledger.db")
+
+
+def record_key(record: Sequence) -> Tuple:
+    amount, balance, description, timestamp = record[:4]
+    return (timestamp, amount, balance, description)
+
+
+class CreditLedger:
+    """
+    鸡腿收支明细本地账本（SQLite）
+
+    说明：
+    - 按账号保存已抓取过的 /api/account/credit/page-N 记录，后续运行只需抓取到已存最新记录为止。
+    - covered_since 记录本地数据连续覆盖的最早时间（epoch 秒），早于该时间的查询需要重新回溯抓取。
+    """
+
+    def __init__(self, path: str = LEDGER_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS credit_records (
+                account TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                epoch INTEGER NOT NULL,
+                amount NUMERIC NOT NULL,
+                balance NUMERIC NOT NULL,
+                description TEXT NOT NULL,
+                PRIMARY KEY (account, ts, amount, balance, description)
+            );
+            CREATE INDEX IF NOT EXISTS idx_credit_account_epoch
+                ON credit_records (account, epoch);
+            CREATE TABLE IF NOT EXISTS credit_meta (
+                account TEXT PRIMARY KEY,
+                covered_since INTEGER
+            );
+            """
+        )
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def covered_since(self, account: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT covered_since FROM credit_meta WHERE account = ?", (account,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_covered_since(self, account: str, epoch: int):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO credit_meta (account, covered_since) VALUES (?, ?) "
+                "ON CONFLICT(account) DO UPDATE SET covered_since = excluded.covered_since",
+                (account, int(epoch)),
+            )
+            self._conn.commit()
+
+    def latest_epoch(self, account: str) -> Optional[int]:
+        """账本中该账号最新一条记录的时间，无记录时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(epoch) FROM credit_records WHERE account = ?", (account,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def keys_since(self, account: str, since_epoch: int) -> Set[Tuple]:
+        """since_epoch 及之后已入库记录的键集合（见 record_key），供同步时一次性载入后逐条比对"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, amount, balance, description FROM credit_records "
+                "WHERE account = ? AND epoch >= ?",
+                (account, int(since_epoch)),
+            ).fetchall()
+        return {tuple(row) for row in rows}
+
+    def add_records(self, account: str, records: Iterable[Sequence]) -> int:
+        rows = []
+        for record in records:
+            amount, balance, description, timestamp = record[:4]
+            rows.append((account, timestamp, parse_epoch(timestamp), amount, balance, description))
+        if not rows:
+            return 0
+        with self._lock:
+            cur = self._conn.executemany(
+                "INSERT OR IGNORE INTO credit_records "
+                "(account, ts, epoch, amount, balance, description) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def rows_since(self, account: str, since_epoch: int) -> List[CreditRow]:
+        """按时间倒序返回 (epoch, amount, balance, description)，直接使用入库时解析好的 epoch"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT epoch, amount, balance, description FROM credit_records "
+                "WHERE account = ? AND epoch >= ? ORDER BY epoch DESC, rowid ASC",
+                (account, int(since_epoch)),
+            ).fetchall()
+        return rows
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import time
+from datetime import date, datetime, timezone, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+GMT8_OFFSET = 8 * 3600
+DAY_SECONDS = 86400
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_SECOND = timedelta(seconds=1)
+_EPOCH_ORDINAL = _EPOCH.date().toordinal()
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_fromisoformat = datetime.fromisoformat
+
+# 收支类别编码：按顺序匹配描述中的全部关键字，未命中归为“其他”
+CATEGORY_OTHER = 0
+CATEGORY_SIGNIN = 1
+CATEGORY_RULES = (
+    (CATEGORY_SIGNIN, "签到收益", ("签到收益", "鸡腿")),
+)
+CATEGORY_NAMES = {CATEGORY_OTHER: "其他"}
+CATEGORY_NAMES.update({code: name for code, name, _ in CATEGORY_RULES})
+
+# 已解析的收支记录行：(epoch 秒, amount, balance, description)，按时间倒序排列
+CreditRow = Tuple[int, float, float, str]
+
+_category_cache: Dict[str, int] = {}
+
+
+def parse_epoch(timestamp: str) -> int:
+    # 接口时间为 UTC 的 "YYYY-MM-DDTHH:MM:SS.fffZ"：截取到秒按无时区时间相减，省去字符串替换与时区换算
+    if timestamp[-1:] == 'Z':
+        return (_fromisoformat(timestamp[:19]) - _NAIVE_EPOCH) // _SECOND
+    return (_fromisoformat(timestamp) - _EPOCH) // _SECOND
+
+
+def parse_epochs(timestamps: Iterable[str]) -> List[int]:
+    """批量解析，逻辑同 parse_epoch，省去逐条函数调用"""
+    fromisoformat, naive_epoch, second = _fromisoformat, _NAIVE_EPOCH, _SECOND
+    return [
+        (fromisoformat(t[:19]) - naive_epoch) // second if t[-1:] == 'Z' else parse_epoch(t)
+        for t in timestamps
+    ]
+
+
+def _normalize(num: float):
+    return int(num) if float(num).is_integer() else num
+
+
+def classify(description: str) -> int:
+    """描述 -> 类别编码，同一描述只匹配一次关键字"""
+    code = _category_cache.get(description)
+    if code is None:
+        code = CATEGORY_OTHER
+        for rule_code, _, keywords in CATEGORY_RULES:
+            if all(k in description for k in keywords):
+                code = rule_code
+                break
+        _category_cache[description] = code
+    return code
+
+
+def aggregate(rows: Iterable[Sequence], since_epoch: Optional[int] = None,
+              category: int = CATEGORY_SIGNIN, tz_offset: int = GMT8_OFFSET) -> Dict:
+    """
+    单次遍历统计按时间倒序排列的 CreditRow，遇到早于 since_epoch 的记录即停止
+    返回: {total_amount, average, days_count, records, daily, by_category, current_streak, longest_streak}
+    """
+    cache = _category_cache
+    counts: Dict[int, int] = {}
+    sums: Dict[int, float] = {}
+    daily: Dict[int, float] = {}
+    matched: List[tuple] = []
+    matched_append = matched.append
+    for epoch, amount, _, description in rows:
+        if since_epoch is not None and epoch < since_epoch:
+            break
+        code = cache.get(description)
+        if code is None:
+            code = classify(description)
+        counts[code] = counts.get(code, 0) + 1
+        sums[code] = sums.get(code, 0.0) + amount
+        if code != category:
+            continue
+        day = (epoch + tz_offset) // DAY_SECONDS
+        daily[day] = daily.get(day, 0.0) + amount
+        matched_append((day, amount, description))
+
+    total = sums.get(category, 0.0)
+    count = counts.get(category, 0)
+    fromordinal = date.fromordinal
+    day_labels = {day: fromordinal(_EPOCH_ORDINAL + day).isoformat() for day in daily}
+
+    # 连续签到：longest 为窗口内最长连续天数，current 为截至今天（或昨天，尚未签到时）的连续天数
+    longest = run = 0
+    previous = None
+    for day in sorted(daily):
+        run = run + 1 if previous is not None and day == previous + 1 else 1
+        longest = max(longest, run)
+        previous = day
+    today = (int(time.time()) + tz_offset) // DAY_SECONDS
+    current = 0
+    cursor = today if today in daily else today - 1
+    while cursor in daily:
+        current += 1
+        cursor -= 1
+
+    return {
+        'total_amount': _normalize(total),
+        'average': round(total / count, 2) if count else 0,
+        'days_count': count,
+        'records': [
+            {'amount': _normalize(amount), 'date': day_labels[day], 'description': description}
+            for day, amount, description in matched
+        ],
+        'daily': {day_labels[day]: _normalize(amount) for day, amount in sorted(daily.items())},
+        'by_category': {
+            CATEGORY_NAMES[code]: {'count': counts[code], 'amount': _normalize(sums[code])}
+            for code in sorted(counts)
+        },
+        'current_streak': current,
+        'longest_streak': longest,
+    }
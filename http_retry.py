@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP 超时/重试/退避的公共实现
+
+NodeSeekClient（评论）与 NodeSeekTransport（签到）共用：
+- parse_int / parse_float：带默认值与下限的环境变量解析
+- RetryPolicy：读取 NS_HTTP_TIMEOUT、NS_HTTP_RETRY、NS_HTTP_BACKOFF_BASE、NS_HTTP_MAX_BACKOFF，
+  对 5xx 与网络异常按指数退避重试
+
+非幂等请求（POST 等）默认不重试：签到、登录、发表评论重试可能重复提交，
+确需重试时由调用方显式传 retry=True。
+"""
+
+import os
+import random
+import time
+from typing import Callable, Optional
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def parse_int(value: Optional[str], default: int, minimum: int = 0) -> int:
+    try:
+        num = int(value) if value is not None else default
+    except Exception:
+        return default
+    return max(minimum, num)
+
+
+def parse_float(value: Optional[str], default: float, minimum: float = 0.0) -> float:
+    try:
+        num = float(value) if value is not None else default
+    except Exception:
+        return default
+    return max(minimum, num)
+
+
+class RetryPolicy:
+    """按 NS_HTTP_* 环境变量构造的超时与重试策略"""
+
+    def __init__(self):
+        self.timeout = parse_float(os.getenv("NS_HTTP_TIMEOUT"), default=30.0, minimum=5.0)
+        self.max_retries = parse_int(os.getenv("NS_HTTP_RETRY"), default=2, minimum=0)
+        self.backoff_base = parse_float(os.getenv("NS_HTTP_BACKOFF_BASE"), default=1.6, minimum=1.1)
+        self.max_backoff = parse_float(os.getenv("NS_HTTP_MAX_BACKOFF"), default=20.0, minimum=1.0)
+
+    def delay(self, attempt: int) -> float:
+        jitter = random.uniform(0.5, 1.5)
+        return min(self.max_backoff, (self.backoff_base ** (attempt + 1)) + jitter)
+
+    def request(
+        self,
+        send: Callable,
+        method: str,
+        url: str,
+        retry: Optional[bool] = None,
+        on_response: Optional[Callable] = None,
+        on_retry: Optional[Callable] = None,
+        **kwargs,
+    ):
+        """
+        通过 send(method=..., url=..., timeout=..., **kwargs) 发送请求，失败时按策略重试
+
+        参数:
+            retry: None 表示仅幂等方法重试；True/False 强制开启/关闭
+            on_response: 每次拿到响应（含将被重试的 5xx）时回调，参数为响应对象
+            on_retry: 每次决定重试前回调
+        """
+        timeout = kwargs.pop("timeout", None) or self.timeout
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        attempts = self.max_retries + 1 if retry else 1
+        for attempt in range(attempts):
+            last = attempt + 1 >= attempts
+            try:
+                resp = send(method=method, url=url, timeout=timeout, **kwargs)
+            except Exception:
+                if last:
+                    raise
+                if on_retry:
+                    on_retry()
+                time.sleep(self.delay(attempt))
+                continue
+            if on_response:
+                on_response(resp)
+            if resp.status_code >= 500 and not last:
+                if kwargs.get("stream"):
+                    resp.close()
+                if on_retry:
+                    on_retry()
+                time.sleep(self.delay(attempt))
+                continue
+            return resp
+        raise RuntimeError("request failed")
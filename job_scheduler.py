@@ -0,0 +1,312 @@
+import os
+import re
+import time
+import heapq
+import random
+import signal
+import datetime
+import itertools
+import threading
+from dataclasses import dataclass
+from datetime import timezone, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from scheduler_state import mark_completed, resume_next_run, save_planned_run
+
+GMT8 = timezone(timedelta(hours=8))
+
+# 单次休眠上限：长时间等待拆成多段，每段醒来后按墙上时间重新计算，
+# 避免主机挂起恢复或 NTP 校时后一次长 sleep 造成的偏差
+MAX_SLEEP_SECONDS = 60.0
+# 单段休眠中墙上时间与单调时钟的差值超过该阈值即视为时间跳变
+CLOCK_JUMP_THRESHOLD = 5.0
+
+_INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),
+)
+
+
+def _now():
+    return datetime.datetime.now(GMT8)
+
+
+def _fmt(dt: datetime.datetime) -> str:
+    return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+# ---------------- 运行时间配置解析 ----------------
+def _parse_cron_field(field: str, low: int, high: int) -> Tuple[int, ...]:
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            step = int(step_str)
+            if step <= 0:
+                raise ValueError("step must be positive")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"{field} 超出范围 {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return tuple(sorted(values))
+
+
+def parse_cron(value: str):
+    """解析 5 段 cron 表达式（分 时 日 月 周，周日为 0 或 7），返回各字段允许值"""
+    parts = value.split()
+    if len(parts) != 5:
+        raise ValueError("cron 表达式需要 5 段")
+    fields = []
+    for text, (name, low, high) in zip(parts, _CRON_FIELDS):
+        values = _parse_cron_field(text, low, high)
+        if name == "weekday":
+            # 先按 0-7 展开范围（如 1-7、5-7），再把 7 归并为周日 0
+            values = tuple(sorted({v % 7 for v in values}))
+        fields.append(values)
+    restricted_day = parts[2] != "*"
+    restricted_weekday = parts[4] != "*"
+    return fields, restricted_day, restricted_weekday
+
+
+def parse_run_spec(value: str) -> Optional[Tuple[str, str]]:
+    """
+    解析运行时间配置，无法识别时返回 None
+    - 'HH:MM': 固定时间
+    - 'HH:MM-HH:MM': 随机时间范围
+    - 'every 30m' / 'every 2h': 固定间隔（单位 s/m/h/d）
+    - 'M H D M W': 5 段 cron 表达式
+    """
+    value = (value or "").strip()
+    if re.fullmatch(r"\d{2}:\d{2}", value):
+        return "fixed", value
+    if re.fullmatch(r"\d{2}:\d{2}-\d{2}:\d{2}", value):
+        return "range", value
+    m = re.fullmatch(r"(?:@?every)\s*(\d+)\s*([smhd])", value, re.I)
+    if m and int(m.group(1)) > 0:
+        return "interval", f"{m.group(1)}{m.group(2).lower()}"
+    try:
+        parse_cron(value)
+    except ValueError:
+        return None
+    return "cron", value
+
+
+def get_run_config(var_name: str, default_spec: str) -> Tuple[str, str]:
+    """从环境变量读取运行时间配置，未设置或格式错误时使用 default_spec"""
+    run_at_env = os.environ.get(var_name, default_spec)
+    parsed = parse_run_spec(run_at_env)
+    if parsed:
+        labels = {"fixed": "固定时间", "range": "随机时间范围", "interval": "固定间隔", "cron": "cron"}
+        print(f"[{var_name}] 检测到{labels[parsed[0]]}模式: {parsed[1]}", flush=True)
+        return parsed
+    if os.environ.get(var_name):
+        print(f"警告: 环境变量 {var_name} 的格式 '{run_at_env}' 无效", flush=True)
+    print(f"[{var_name}] 将使用默认配置 '{default_spec}'", flush=True)
+    return parse_run_spec(default_spec)
+
+
+def _next_cron_time(value: str, now: datetime.datetime) -> datetime.datetime:
+    (minutes, hours, days, months, weekdays), restricted_day, restricted_weekday = parse_cron(value)
+    start = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    day = start.date()
+    for _ in range(366 * 5):
+        if day.month in months:
+            day_ok = day.day in days
+            weekday_ok = (day.isoweekday() % 7) in weekdays
+            # 与标准 cron 一致：日与周同时受限时满足其一即可
+            if restricted_day and restricted_weekday:
+                matched = day_ok or weekday_ok
+            else:
+                matched = day_ok and weekday_ok
+            if matched:
+                for h in hours:
+                    for m in minutes:
+                        candidate = datetime.datetime(day.year, day.month, day.day, h, m, tzinfo=GMT8)
+                        if candidate >= start:
+                            return candidate
+        day += timedelta(days=1)
+    raise ValueError(f"cron 表达式 '{value}' 在五年内没有可运行时间")
+
+
+def calculate_next_run_time(mode: str, value: str, now: Optional[datetime.datetime] = None,
+                            previous: Optional[datetime.datetime] = None) -> datetime.datetime:
+    """
+    根据配置计算下一次运行时间（GMT+8）。
+    previous 为上一次计划时间，interval 模式以它为基准累加以避免漂移。
+    """
+    now = now or _now()
+
+    if mode == "fixed":
+        h, m = map(int, value.split(":"))
+        next_run_attempt = now.replace(hour=h, minute=m, second=0, microsecond=0)
+        if next_run_attempt > now:
+            return next_run_attempt
+        return next_run_attempt + timedelta(days=1)
+
+    if mode == "range":
+        start_str, end_str = value.split("-")
+        start_h, start_m = map(int, start_str.split(":"))
+        end_h, end_m = map(int, end_str.split(":"))
+
+        start_time = datetime.time(start_h, start_m)
+        end_time = datetime.time(end_h, end_m)
+
+        start_today = now.replace(hour=start_h, minute=start_m, second=0, microsecond=0)
+        target_date = now.date() if now < start_today else (now.date() + timedelta(days=1))
+
+        start_target = datetime.datetime.combine(target_date, start_time, tzinfo=GMT8)
+        end_target = datetime.datetime.combine(target_date, end_time, tzinfo=GMT8)
+        if start_target > end_target:
+            end_target += timedelta(days=1)
+
+        random_timestamp = random.randint(int(start_target.timestamp()), int(end_target.timestamp()))
+        return datetime.datetime.fromtimestamp(random_timestamp, tz=GMT8)
+
+    if mode == "interval":
+        seconds = int(value[:-1]) * _INTERVAL_UNITS[value[-1]]
+        next_run = (previous or now) + timedelta(seconds=seconds)
+        if next_run <= now:
+            next_run = now + timedelta(seconds=seconds)
+        return next_run
+
+    if mode == "cron":
+        return _next_cron_time(value, now)
+
+    raise ValueError(f"未知的调度模式: {mode}")
+
+
+# ---------------- 堆调度器 ----------------
+@dataclass
+class Job:
+    """
+    调度任务
+    - action(target_time) 在到点时调用；lead_seconds > 0 时提前唤醒，由 action 自行等待到 target_time。
+      action 抛出异常或返回 False 视为失败，不记录完成时间。
+    - mode 为 None 表示一次性任务（不持久化、不重复）。
+    """
+    name: str
+    action: Callable[[datetime.datetime], object]
+    mode: Optional[str] = None
+    value: str = ""
+    lead_seconds: float = 0.0
+
+    @property
+    def spec(self) -> str:
+        return f"{self.mode}:{self.value}"
+
+    @property
+    def persistent(self) -> bool:
+        return self.mode is not None
+
+
+class JobScheduler:
+    """
+    单进程多任务调度器
+
+    说明：
+    - 所有任务按下一次运行时间放入最小堆，只等待堆顶任务。
+    - 长等待被拆成不超过 MAX_SLEEP_SECONDS 的多段，每段结束后按墙上时间重新判断；
+      同时比较墙上时间与单调时钟的流逝，发现挂起恢复或校时跳变时打印提示。
+    - 计划时间持久化到 scheduler_state，重启后沿用或补跑。
+    - 收到 SIGHUP 时立即唤醒休眠并重新调用 build_jobs 加载配置，无需重启进程。
+    """
+
+    def __init__(self, build_jobs: Callable[[], List[Job]], on_reload: Optional[Callable[[], None]] = None):
+        self.build_jobs = build_jobs
+        self.on_reload = on_reload
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._reload_requested = False
+        self._wake = threading.Event()
+
+    def install_signal_handlers(self):
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._handle_sighup)
+
+    def _handle_sighup(self, signum, frame):
+        self._reload_requested = True
+        self._wake.set()
+
+    def _push(self, job: Job, target: datetime.datetime):
+        if job.persistent:
+            save_planned_run(job.name, job.spec, target)
+        heapq.heappush(self._heap, (target.timestamp() - job.lead_seconds, next(self._seq), job, target))
+        print(f"[{job.name}] 下一次运行计划在: {_fmt(target)}", flush=True)
+
+    def schedule_once(self, name: str, when: datetime.datetime, action: Callable[[datetime.datetime], object]):
+        """加入一次性任务（例如签到后延时执行的评论）"""
+        self._push(Job(name=name, action=action), when)
+
+    def load(self):
+        """(重新)加载任务配置；一次性任务会被保留"""
+        pending_once = [entry for entry in self._heap if not entry[2].persistent]
+        self._heap = pending_once
+        heapq.heapify(self._heap)
+        for job in self.build_jobs():
+            target = resume_next_run(job.name, job.spec) or calculate_next_run_time(job.mode, job.value)
+            self._push(job, target)
+        if not self._heap:
+            print("当前没有启用的调度任务", flush=True)
+
+    def _sleep(self, seconds: float):
+        wall_start = time.time()
+        mono_start = time.monotonic()
+        # 用 Event 代替 time.sleep：SIGHUP 处理函数 set 后立即返回，不必等到本段休眠结束
+        self._wake.wait(seconds)
+        self._wake.clear()
+        drift = (time.time() - wall_start) - (time.monotonic() - mono_start)
+        if abs(drift) > CLOCK_JUMP_THRESHOLD:
+            print(f"检测到系统时间跳变或挂起恢复（偏差 {drift:+.0f} 秒），按当前时间重新计算", flush=True)
+
+    def _run_job(self, job: Job, target: datetime.datetime):
+        ok = False
+        try:
+            ok = job.action(target) is not False
+        except Exception as e:
+            print(f"[{job.name}] 任务执行异常: {e}", flush=True)
+        if job.persistent:
+            if ok:
+                mark_completed(job.name)
+            self._push(job, calculate_next_run_time(job.mode, job.value, previous=target))
+
+    def run_forever(self):
+        self.install_signal_handlers()
+        self.load()
+        announced = None
+        while True:
+            if self._reload_requested:
+                self._reload_requested = False
+                print("收到 SIGHUP，重新加载调度配置...", flush=True)
+                if self.on_reload:
+                    self.on_reload()
+                self.load()
+                announced = None
+
+            if not self._heap:
+                self._sleep(MAX_SLEEP_SECONDS)
+                continue
+
+            wake_ts, _, job, target = self._heap[0]
+            remaining = wake_ts - time.time()
+            if remaining > 0:
+                if announced is not job:
+                    hours, rest = divmod(remaining, 3600)
+                    print(f"下一个任务 [{job.name}] 将在 {int(hours)} 小时 {int(rest // 60)} 分钟后唤醒", flush=True)
+                    announced = job
+                self._sleep(min(remaining, MAX_SLEEP_SECONDS))
+                continue
+
+            heapq.heappop(self._heap)
+            announced = None
+            self._run_job(job, target)
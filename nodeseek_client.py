@@ -3,42 +3,156 @@
 import re
 import os
 import base64
+import hashlib
 import json
-import random
+import threading
 import time
-from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Any, List, Dict, Optional, Tuple
 
-from bs4 import BeautifulSoup
 from curl_cffi import requests
 
+from http_retry import RetryPolicy, parse_float
+from page_parser import STREAM_PARSER, category_threads, get_parser
 
-class NodeSeekClient:
+# Cloudflare 与统计类 Cookie 会频繁轮换，不参与账号指纹
+_VOLATILE_COOKIE_PREFIXES = ("cf_", "__cf", "_ga", "_gid", "__gads", "__gpi")
+
+
+def cookie_fingerprint(cookie: str) -> str:
+    """账号 Cookie 的指纹：忽略顺序与轮换类 Cookie，只保留哈希，不在缓存文件中落盘 Cookie 原文"""
+    pairs = []
+    for part in (cookie or "").split(";"):
+        name, sep, value = part.strip().partition("=")
+        if sep and name and not name.lower().startswith(_VOLATILE_COOKIE_PREFIXES):
+            pairs.append(f"{name}={value.strip()}")
+    return hashlib.sha256("; ".join(sorted(pairs)).encode("utf-8")).hexdigest()[:32]
+
+
+def _int_or_none(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class SiteConfig:
     """
-    NodeSeek 简单客户端（HTML 抓取版）
+    页面 temp-script 中的站点配置（base64 编码的 JSON，即前端的 window.__config__）
+
+    - member_id 等为 user 字段的类型化视图，user 保留原始字段；未登录或 Cookie 失效时 user 为空
+    - coin、rank 等为抓取时的快照，缓存期内不会更新
+    """
+
+    member_id: Optional[int] = None
+    member_name: Optional[str] = None
+    rank: Optional[int] = None
+    coin: Optional[int] = None
+    is_admin: bool = False
+    comments_per_page: Optional[int] = None
+    user: Dict[str, Any] = field(default_factory=dict)
+    fetched_at: float = 0.0
+
+    @property
+    def logged_in(self) -> bool:
+        return self.member_id is not None
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any], fetched_at: float) -> "SiteConfig":
+        user = raw.get("user") if isinstance(raw.get("user"), dict) else {}
+        return cls(
+            member_id=_int_or_none(user.get("member_id")),
+            member_name=user.get("member_name"),
+            rank=_int_or_none(user.get("rank")),
+            coin=_int_or_none(user.get("coin")),
+            is_admin=bool(user.get("isAdmin")),
+            comments_per_page=_int_or_none(raw.get("commmentPerPage")),
+            user=user,
+            fetched_at=fetched_at,
+        )
+
+    def to_raw(self) -> Dict[str, Any]:
+        """缓存用的原始结构，与 temp-script 的字段名一致（直接构造时只填了类型化字段的也能还原）"""
+        user = dict(self.user)
+        typed = (("member_id", self.member_id), ("member_name", self.member_name), ("rank", self.rank), ("coin", self.coin))
+        for key, value in typed:
+            if value is not None:
+                user.setdefault(key, value)
+        if self.is_admin:
+            user.setdefault("isAdmin", True)
+        return {"user": user, "commmentPerPage": self.comments_per_page}
+
+
+class SiteConfigCache:
+    """
+    按 Cookie 指纹缓存站点配置（JSON 文件，各账号、各次运行共享）
 
     说明：
-    - 仅用于抓取帖子列表与帖子页面上下文，提交回复的接口与字段待对接。
-    - 统一使用 curl_cffi.requests 并设置 impersonate 以降低风控概率。
+    - 只缓存已登录的配置，超过 ttl 秒视为过期；ttl 为 0 时不使用磁盘缓存。
+    - 请求返回 401/403 或首页显示未登录时由客户端调用 invalidate 删除对应记录。
     """
 
-    BASE = "https://www.nodeseek.com"
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
 
-    @staticmethod
-    def _parse_int(value: Optional[str], default: int, minimum: int = 0) -> int:
+    def _load(self) -> dict:
         try:
-            num = int(value) if value is not None else default
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
         except Exception:
-            return default
-        return max(minimum, num)
+            return {}
 
-    @staticmethod
-    def _parse_float(value: Optional[str], default: float, minimum: float = 0.0) -> float:
+    def _save(self, data: dict):
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"保存站点配置缓存失败: {e}")
+
+    def get(self, key: str) -> Optional[SiteConfig]:
+        if not self.ttl:
+            return None
+        entry = self._load().get(key)
+        if not entry or time.time() - entry.get("fetched_at", 0) >= self.ttl:
+            return None
         try:
-            num = float(value) if value is not None else default
+            return SiteConfig.from_raw(entry["config"], entry["fetched_at"])
         except Exception:
-            return default
-        return max(minimum, num)
+            return None
+
+    def put(self, key: str, config: SiteConfig):
+        if not self.ttl:
+            return
+        now = time.time()
+        with self._lock:
+            data = {k: v for k, v in self._load().items() if now - v.get("fetched_at", 0) < self.ttl}
+            data[key] = {"fetched_at": config.fetched_at, "config": config.to_raw()}
+            self._save(data)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            data = self._load()
+            if data.pop(key, None) is not None:
+                self._save(data)
+
+
+class NodeSeekClient:
+    """
+    NodeSeek 简单客户端（HTML 抓取版）
+
+    说明：
+    - 仅用于抓取帖子列表与帖子页面上下文，提交回复的接口与字段待对接。
+    - 统一使用 curl_cffi.requests 并设置 impersonate 以降低风控概率。
+    """
 
+    BASE = "https://www.nodeseek.com"
 
     def __init__(self, cookie: str):
         self.cookie = cookie or ""
@@ -50,11 +164,17 @@ class NodeSeekClient:
         )
         self.logged_in_user_id: Optional[str] = None
         self.impersonate = os.getenv("NS_IMPERSONATE", "chrome110")
-        self.timeout = self._parse_float(os.getenv("NS_HTTP_TIMEOUT"), default=30.0, minimum=5.0)
-        self.max_retries = self._parse_int(os.getenv("NS_HTTP_RETRY"), default=2, minimum=0)
-        self.backoff_base = self._parse_float(os.getenv("NS_HTTP_BACKOFF_BASE"), default=1.6, minimum=1.1)
-        self.max_backoff = self._parse_float(os.getenv("NS_HTTP_MAX_BACKOFF"), default=20.0, minimum=1.0)
+        # 超时/重试/退避与签到共用同一套实现（见 http_retry）
+        self.retry_policy = RetryPolicy()
         self._session = requests.Session(impersonate=self.impersonate)
+        # 页面解析后端：NS_HTML_PARSER=auto|selectolax|lxml|bs4
+        self.parser = get_parser()
+        self.stream_threads = os.getenv("NS_THREAD_STREAM", "true").lower() == "true"
+        self.site_config_cache = SiteConfigCache(
+            os.getenv("NS_SITE_CONFIG_CACHE_PATH", "./cookie/site_config.json"),
+            parse_float(os.getenv("NS_SITE_CONFIG_TTL"), default=86400.0, minimum=0.0),
+        )
+        self._site_config: Optional[SiteConfig] = None
 
     def _headers(self, referer: Optional[str] = None) -> Dict[str, str]:
         headers = {
@@ -87,28 +207,13 @@ class NodeSeekClient:
             headers["refract-sign"] = os.getenv("NS_REFRACT_SIGN")
         return headers
 
-    def _retry_delay(self, attempt: int) -> float:
-        jitter = random.uniform(0.5, 1.5)
-        return min(self.max_backoff, (self.backoff_base ** (attempt + 1)) + jitter)
-
     def _request(self, method: str, url: str, **kwargs):
-        timeout = kwargs.pop("timeout", None) or self.timeout
-        last_exc = None
-        for attempt in range(self.max_retries + 1):
-            try:
-                resp = self._session.request(method=method, url=url, timeout=timeout, **kwargs)
-                if resp.status_code >= 500 and attempt < self.max_retries:
-                    time.sleep(self._retry_delay(attempt))
-                    continue
-                return resp
-            except Exception as exc:
-                last_exc = exc
-                if attempt >= self.max_retries:
-                    raise
-                time.sleep(self._retry_delay(attempt))
-        if last_exc:
-            raise last_exc
-        raise RuntimeError("request failed")
+        # GET 失败按 NS_HTTP_RETRY 重试；POST 默认不重试，避免重复发表评论
+        resp = self.retry_policy.request(self._session.request, method, url, **kwargs)
+        if resp.status_code in (401, 403):
+            # 登录态可能已失效，缓存的用户信息不再可信
+            self.invalidate_site_config()
+        return resp
 
     def _extract_csrf_from_cookie(self) -> Optional[str]:
         env_token = os.getenv("NS_COMMENT_STATIC_CSRF")
@@ -182,55 +287,85 @@ class NodeSeekClient:
         if html is None:
             raise RuntimeError(f"无法抓取分类页: {last_exc_msg}")
 
-        # 使用内置解析器，避免容器内安装 lxml 的负担
-        soup = BeautifulSoup(html, "html.parser")
-        threads = []
+        # 单遍扫描帖子列表容器内形如 /t/12345 或 /post-12345-1 的链接，边扫描边按帖子ID去重
+        return category_threads(html, self.BASE)
 
-        # 粗略选择器：寻找形如 /t/12345 或 /post-12345-1 的帖子链接
-        for a in soup.find_all("a", href=True):
-            href = a.get("href", "")
-            if not href:
-                continue
-            # 规范化为绝对 URL
-            full = href if href.startswith("http") else f"{self.BASE}{href if href.startswith('/') else '/' + href}"
-            # 过滤出帖子链接
-            m_t = re.search(r"/t/(\d+)", href)
-            m_p = re.search(r"/post-(\d+)(?:-[0-9]+)?", href)
-            thread_id = None
-            if m_t:
-                thread_id = int(m_t.group(1))
-            elif m_p:
-                thread_id = int(m_p.group(1))
-            if thread_id:
-                title = a.get_text(strip=True)
-                if title:
-                    threads.append({"title": title, "url": full, "thread_id": thread_id})
-
-        # 去重，保持顺序
-        seen = set()
-        uniq = []
-        for t in threads:
-            if t["thread_id"] in seen:
-                continue
-            seen.add(t["thread_id"])
-            uniq.append(t)
-        return uniq
+    def get_site_config(self, refresh: bool = False) -> SiteConfig:
+        """
+        当前 Cookie 对应的站点配置（已登录用户ID、用户名等）
+        - 依次使用内存、磁盘缓存（按 Cookie 指纹，NS_SITE_CONFIG_TTL 秒内有效），都未命中时抓取首页解析 temp-script
+        - 抓取或解析失败时返回空配置且不缓存，下次调用重试
+        """
+        cache_key = cookie_fingerprint(self.cookie) if self.cookie else None
+        if not refresh:
+            if self._site_config is not None:
+                return self._site_config
+            cached = self.site_config_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                return self._use_site_config(cached)
+
+        parser = self.parser
+        try:
+            r = self._request("GET", f"{self.BASE}/", headers=self._headers())
+            if r.status_code == 200 and r.text:
+                config_text = parser.temp_script(parser.parse(r.text))
+                if config_text:
+                    raw = json.loads(base64.b64decode(config_text).decode('utf-8'))
+                    config = SiteConfig.from_raw(raw, time.time())
+                    if config.logged_in:
+                        if cache_key:
+                            self.site_config_cache.put(cache_key, config)
+                        return self._use_site_config(config)
+                    # 带 Cookie 却显示未登录：Cookie 已失效
+                    self.invalidate_site_config()
+                    return config
+        except Exception:
+            pass
+        return SiteConfig()
+
+    def _use_site_config(self, config: SiteConfig) -> SiteConfig:
+        self._site_config = config
+        self.logged_in_user_id = str(config.member_id)
+        return config
+
+    def invalidate_site_config(self):
+        """丢弃当前 Cookie 的站点配置缓存（内存与磁盘）"""
+        self._site_config = None
+        self.logged_in_user_id = None
+        if self.cookie:
+            self.site_config_cache.invalidate(cookie_fingerprint(self.cookie))
 
     def get_thread_context(self, thread_url: str, sample_count: int = 6) -> Dict:
         """
         抓取帖子页上下文：标题、楼主摘要、其他用户近期评论；并检测自己是否已评论。
         返回: {title, op_summary, comments: [str], csrf, turnstile, has_commented, thread_id}
+        流式模式（NS_THREAD_STREAM，默认开启）边下载边解析，取够标题、楼主内容与 sample_count 条评论后即断开连接；
+        csrf 只取已读部分中出现的字段，不为此继续读取（为 None 时 post_reply 使用 NS_COMMENT_STATIC_CSRF 或生成的令牌）。
         """
         import os as _os
         ref = _os.getenv("NS_REFERER", self.BASE)
-        resp = self._request("GET", thread_url, headers=self._headers(referer=ref))
-        if resp.status_code == 403:
-            raise PermissionError(f"HTTP 403 at {thread_url}")
-        resp.raise_for_status()
-        html = resp.text
-        soup = BeautifulSoup(html, "html.parser")
-
-        title = soup.title.get_text(strip=True) if soup.title else ""
+        # 先确定自己的用户ID，流式解析读到自己的评论时才能识别
+        if self.logged_in_user_id is None:
+            self.get_site_config()
+        stream = self.stream_threads
+        resp = self._request("GET", thread_url, headers=self._headers(referer=ref), stream=stream)
+        try:
+            if resp.status_code == 403:
+                raise PermissionError(f"HTTP 403 at {thread_url}")
+            resp.raise_for_status()
+            if stream:
+                parser = STREAM_PARSER
+                doc = parser.parse(resp.iter_content(), getattr(resp, "charset_encoding", None) or "utf-8")
+            else:
+                parser = self.parser
+                doc = parser.parse(resp.text)
+            return self._thread_context(parser, doc, thread_url, sample_count, read_csrf=not stream)
+        finally:
+            if stream:
+                resp.close()
+
+    def _thread_context(self, parser, doc, thread_url: str, sample_count: int, read_csrf: bool = True) -> Dict:
+        title = parser.title(doc)
 
         # 解析帖子ID
         thread_id = None
@@ -242,84 +377,35 @@ class NodeSeekClient:
             thread_id = int(m_t.group(1))
 
         # 提取楼主内容（优先 NodeSeek 常见结构）
-        op_summary = ""
-        main_post_container = soup.find('div', class_='nsk-post')
-        if main_post_container:
-            content_article = main_post_container.find('article', class_='post-content')
-            if content_article:
-                op_summary = content_article.get_text(separator=' ', strip=True)
-        if not op_summary:
-            candidates = [
-                ("div", {"class": re.compile(r"post|content|markdown", re.I)}),
-                ("article", {}),
-            ]
-            for tag, kw in candidates:
-                el = soup.find(tag, kw)
-                if el:
-                    op_summary = el.get_text(" ", strip=True)
-                    if op_summary:
-                        break
-
-        # 获取已登录用户ID（从首页配置脚本中解析）
-        if self.logged_in_user_id is None:
-            try:
-                r = self._request("GET", f"{self.BASE}/", headers=self._headers())
-                if r.status_code == 200 and r.text:
-                    s = BeautifulSoup(r.text, "html.parser")
-                    config_script = s.find('script', id='temp-script')
-                    if config_script and config_script.string:
-                        try:
-                            json_text = base64.b64decode(config_script.string).decode('utf-8')
-                            config_data = json.loads(json_text)
-                            uid = config_data.get('user', {}).get('member_id')
-                            if uid:
-                                self.logged_in_user_id = str(uid)
-                        except Exception:
-                            pass
-            except Exception:
-                pass
+        op_summary = parser.op_summary(doc)
 
         # 收集其他用户的评论，检测是否已评论
         comments: List[str] = []
         has_commented = False
         try:
-            items = soup.select('.comment-container .content-item')
-            for item in items:
-                author_link = item.find('a', class_='author-name')
-                if not author_link:
+            for href, txt in parser.comment_items(doc):
+                if href is None:
                     continue
-                href = author_link.get('href', '')
                 is_self = False
                 if self.logged_in_user_id and self.logged_in_user_id in href:
                     is_self = True
                 if is_self:
                     has_commented = True
                     continue
-                comment_article = item.find('article', class_='post-content')
-                if comment_article:
-                    txt = comment_article.get_text(strip=True)
-                    if txt and len(txt) >= 5:
-                        comments.append(txt)
+                if txt and len(txt) >= 5:
+                    comments.append(txt)
                 if len(comments) >= sample_count:
                     break
         except Exception:
             # 回退：宽松选择器
-            for el in soup.find_all(["div", "li", "article"], {"class": re.compile(r"comment|reply|post", re.I)}):
-                txt = el.get_text(" ", strip=True)
+            for txt in parser.loose_comment_texts(doc):
                 if txt and len(txt) >= 10:
                     comments.append(txt)
                 if len(comments) >= sample_count:
                     break
 
-        # 尝试解析 CSRF/表单隐藏字段（占位）
-        csrf = None
-        meta_csrf = soup.find("meta", {"name": re.compile(r"csrf", re.I)})
-        if meta_csrf and meta_csrf.get("content"):
-            csrf = meta_csrf.get("content")
-        else:
-            hidden = soup.find("input", {"name": re.compile(r"csrf|token", re.I)})
-            if hidden and hidden.get("value"):
-                csrf = hidden.get("value")
+        # 尝试解析 CSRF/表单隐藏字段（占位）；流式模式不为此多读页面
+        csrf = parser.csrf(doc) if read_csrf else parser.known_csrf(doc)
 
         # Turnstile 信息占位（若回复也需要验证码，这里需要从页面脚本中解析）
         turnstile = None
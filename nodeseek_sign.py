@@ -1,17 +1,24 @@
 # -*- coding: utf-8 -*-
 
+import json
 import os
+import sys
 import time
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from curl_cffi import requests
 from yescaptcha import YesCaptchaSolver, YesCaptchaSolverError
 from turnstile_solver import TurnstileSolver, TurnstileSolverError
+from credit_ledger import CreditLedger, record_key
+from credit_stats import CATEGORY_SIGNIN, aggregate, classify, parse_epoch, parse_epochs
+from http_retry import RetryPolicy, parse_int
+from run_trace import current_span, span, trace, traced
 # ---------------- 通知模块动态加载 ----------------
 hadsend = False
 send = None
 try:
-    from notify import send
+    from notify import digest as notify_digest, send
     hadsend = True
 except ImportError:
     print("未加载通知模块，跳过通知功能")
@@ -118,6 +125,7 @@ def save_cookie_to_local_file(cookie_str: str):
     return save_cookie_to_file(cookie_str, LOCAL_COOKIE_FILE_PATH)
 
 # ---------------- ???????? ----------------
+@traced("save_cookie")
 def save_cookie(var_name: str, cookie: str):
     """????????Cookie?????"""
     env_type = detect_environment()
@@ -136,7 +144,128 @@ def save_cookie(var_name: str, cookie: str):
         return False
 
 
-def session_login(user, password, solver_type, api_base_url, client_key):
+# ---------------- 签到运行日志（幂等） ----------------
+SIGN_JOURNAL_FILE = os.environ.get("NS_SIGN_JOURNAL_PATH", "./cookie/sign_journal.json")
+SIGN_JOURNAL_KEEP_DAYS = 7
+SIGN_DONE_RESULTS = ("success", "already")
+
+
+def _journal_day_key() -> str:
+    return datetime.now(ZoneInfo("Asia/Shanghai")).strftime("%Y-%m-%d")
+
+
+def load_sign_journal() -> dict:
+    if os.path.exists(SIGN_JOURNAL_FILE):
+        try:
+            with open(SIGN_JOURNAL_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取签到日志失败，将视为空日志: {e}")
+    return {}
+
+
+def save_sign_journal(journal: dict):
+    """先写临时文件再替换，避免进程中断时留下半截文件"""
+    directory = os.path.dirname(SIGN_JOURNAL_FILE) or "."
+    os.makedirs(directory, exist_ok=True)
+    keep = sorted(journal)[-SIGN_JOURNAL_KEEP_DAYS:]
+    data = {day: journal[day] for day in keep}
+    tmp_path = f"{SIGN_JOURNAL_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, SIGN_JOURNAL_FILE)
+
+
+def get_sign_entry(journal: dict, account: str):
+    """返回账号今天（GMT+8）已完成的签到记录，未完成返回 None"""
+    entry = journal.get(_journal_day_key(), {}).get(account)
+    if entry and entry.get("result") in SIGN_DONE_RESULTS:
+        return entry
+    return None
+
+
+def record_sign_result(journal: dict, account: str, result: str, msg: str):
+    journal.setdefault(_journal_day_key(), {})[account] = {
+        "result": result,
+        "message": msg,
+        "time": datetime.now(ZoneInfo("Asia/Shanghai")).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    try:
+        save_sign_journal(journal)
+    except Exception as e:
+        print(f"保存签到日志失败: {e}")
+
+# ---------------- 复用连接的 HTTP 传输层 ----------------
+class NodeSeekTransport:
+    """
+    单个账号在一次运行内共用的 HTTP 传输层
+
+    说明：
+    - 登录、签到、收益查询共用同一个 curl_cffi Session，复用 keep-alive 连接，避免每次请求重新握手。
+    - 超时/重试/退避与 NodeSeekClient 共用 http_retry.RetryPolicy（NS_HTTP_TIMEOUT、NS_HTTP_RETRY、
+      NS_HTTP_BACKOFF_BASE、NS_HTTP_MAX_BACKOFF）；POST 默认不重试。
+    """
+
+    def __init__(self):
+        self.impersonate = os.getenv("NS_IMPERSONATE", "chrome110")
+        self.retry_policy = RetryPolicy()
+        self.session = requests.Session(impersonate=self.impersonate)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        try:
+            self.session.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _body_size(kwargs) -> int:
+        body = kwargs.get("data")
+        if kwargs.get("json") is not None:
+            body = json.dumps(kwargs["json"])
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        return len(body) if isinstance(body, bytes) else 0
+
+    def request(self, method: str, url: str, retry=None, **kwargs):
+        # 当前阶段的 span（见 run_trace）记录请求数、收发字节、状态码与重试次数
+        active = current_span()
+        if not active:
+            return self.retry_policy.request(self.session.request, method, url, retry=retry, **kwargs)
+        sent = self._body_size(kwargs)
+        return self.retry_policy.request(
+            self.session.request, method, url, retry=retry,
+            on_response=lambda resp: active.record_response(resp, sent),
+            on_retry=active.add_retry,
+            **kwargs,
+        )
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def warm_up(self, url: str = "https://www.nodeseek.com/") -> float:
+        """发送一次 HEAD 完成 DNS 解析与 TLS 握手并保持连接，返回耗时（秒）"""
+        start = time.perf_counter()
+        self.session.request("HEAD", url, timeout=self.retry_policy.timeout)
+        return time.perf_counter() - start
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+def transport_scope(transport=None):
+    """传入的传输层原样使用（由调用方负责关闭），未传入时新建一个并在退出 with 时关闭"""
+    return nullcontext(transport) if transport is not None else NodeSeekTransport()
+
+
+def session_login(user, password, solver_type, api_base_url, client_key, transport=None):
     try:
         if solver_type.lower() == "yescaptcha":
             print("正在使用 YesCaptcha 解决验证码...")
@@ -151,11 +280,12 @@ def session_login(user, password, solver_type, api_base_url, client_key):
                 client_key=client_key
             )
 
-        token = solver.solve(
-            url="https://www.nodeseek.com/signIn.html",
-            sitekey="0x4AAAAAAAaNy7leGjewpVyR",
-            verbose=True
-        )
+        with span("captcha", solver=solver_type.lower()):
+            token = solver.solve(
+                url="https://www.nodeseek.com/signIn.html",
+                sitekey="0x4AAAAAAAaNy7leGjewpVyR",
+                verbose=True
+            )
         if not token:
             print("验证码解析失败")
             return None
@@ -163,44 +293,50 @@ def session_login(user, password, solver_type, api_base_url, client_key):
         print(f"验证码错误: {e}")
         return None
 
-    session = requests.Session(impersonate="chrome110")
-    session.get("https://www.nodeseek.com/signIn.html", timeout=60)
+    with transport_scope(transport) as transport:
+        # 登录结果从 Cookie 容器读取，先清空旧 Cookie，连接池保持复用
+        transport.session.cookies.clear()
+        with span("login"):
+            transport.get("https://www.nodeseek.com/signIn.html", timeout=60)
 
-    data = {
-        "username": user,
-        "password": password,
-        "token": token,
-        "source": "turnstile"
-    }
-    headers = {
-        'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36 Edg/125.0.0.0",
-        'sec-ch-ua': "\"Not A(Brand\";v=\"99\", \"Microsoft Edge\";v=\"121\", \"Chromium\";v=\"121\"",
-        'sec-ch-ua-mobile': "?0",
-        'sec-ch-ua-platform': "\"Windows\"",
-        'origin': "https://www.nodeseek.com",
-        'sec-fetch-site': "same-origin",
-        'sec-fetch-mode': "cors",
-        'sec-fetch-dest': "empty",
-        'referer': "https://www.nodeseek.com/signIn.html",
-        'accept-language': "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
-        'Content-Type': "application/json"
-    }
-    try:
-        response = session.post("https://www.nodeseek.com/api/account/signIn", json=data, headers=headers, timeout=60)
-        resp_json = response.json()
-        if resp_json.get("success"):
-            cookies = session.cookies.get_dict()
-            cookie_string = '; '.join([f"{k}={v}" for k, v in cookies.items()])
-            return cookie_string
-        else:
-            print("登录失败:", resp_json.get("message"))
+        data = {
+            "username": user,
+            "password": password,
+            "token": token,
+            "source": "turnstile"
+        }
+        headers = {
+            'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36 Edg/125.0.0.0",
+            'sec-ch-ua': "\"Not A(Brand\";v=\"99\", \"Microsoft Edge\";v=\"121\", \"Chromium\";v=\"121\"",
+            'sec-ch-ua-mobile': "?0",
+            'sec-ch-ua-platform': "\"Windows\"",
+            'origin': "https://www.nodeseek.com",
+            'sec-fetch-site': "same-origin",
+            'sec-fetch-mode': "cors",
+            'sec-fetch-dest': "empty",
+            'referer': "https://www.nodeseek.com/signIn.html",
+            'accept-language': "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
+            'Content-Type': "application/json"
+        }
+        try:
+            with span("login"):
+                # 登录 POST 不重试（POST 默认不重试），避免同一个验证码 token 被重复提交
+                response = transport.post("https://www.nodeseek.com/api/account/signIn", json=data, headers=headers, timeout=60)
+            resp_json = response.json()
+            if resp_json.get("success"):
+                cookies = transport.session.cookies.get_dict()
+                cookie_string = '; '.join([f"{k}={v}" for k, v in cookies.items()])
+                return cookie_string
+            else:
+                print("登录失败:", resp_json.get("message"))
+                return None
+        except Exception as e:
+            print("登录异常:", e)
             return None
-    except Exception as e:
-        print("登录异常:", e)
-        return None
 
 # ---------------- 签到逻辑 ----------------
-def sign(ns_cookie, ns_random):
+@traced("sign")
+def sign(ns_cookie, ns_random, transport=None):
     if not ns_cookie:
         return "invalid", "无有效Cookie"
         
@@ -213,7 +349,9 @@ def sign(ns_cookie, ns_random):
     }
     try:
         url = f"https://www.nodeseek.com/api/attendance?random={ns_random}"
-        response = requests.post(url, headers=headers, impersonate="chrome110")
+        # 签到 POST 不重试（POST 默认不重试），避免超时后重复提交签到
+        with transport_scope(transport) as transport:
+            response = transport.post(url, headers=headers)
         data = response.json()
         msg = data.get("message", "")
         if "鸡腿" in msg or data.get("success"):
@@ -227,8 +365,160 @@ def sign(ns_cookie, ns_random):
         return "error", str(e)
 
 # ---------------- 查询签到收益统计函数 ----------------
-def get_signin_stats(ns_cookie, days=30):
-    """查询前days天内的签到收益统计"""
+_credit_ledger = None
+
+
+def get_credit_ledger():
+    """延迟打开本地鸡腿账本，打开失败时返回 None（退回无缓存模式）"""
+    global _credit_ledger
+    if _credit_ledger is None and os.environ.get("NS_CREDIT_LEDGER", "true").lower() == "true":
+        try:
+            _credit_ledger = CreditLedger()
+        except Exception as e:
+            print(f"本地鸡腿账本不可用，将直接查询接口: {e}")
+            _credit_ledger = False
+    return _credit_ledger or None
+
+
+CREDIT_PAGE_URL = "https://www.nodeseek.com/api/account/credit/page-{page}"
+CREDIT_MAX_PAGES = parse_int(os.getenv("NS_CREDIT_MAX_PAGES"), default=200, minimum=1)
+
+
+class CreditPageError(RuntimeError):
+    """收支明细接口返回失败"""
+
+
+class CreditPageStream:
+    """
+    惰性逐页抓取 /api/account/credit/page-N，迭代得到 (page, records)
+
+    说明：
+    - 只在调用方取下一页时才发起请求，调用方 break 即不再抓取后续页（也不再等待翻页间隔）。
+    - 接口返回空页表示已到最早记录（exhausted）；达到 max_pages 时停止并提示（truncated），不再静默截断。
+    """
+
+    def __init__(self, transport, headers, max_pages=None, delay=0.5):
+        self.transport = transport
+        self.headers = headers
+        self.max_pages = max_pages or CREDIT_MAX_PAGES
+        self.delay = delay
+        self.pages_fetched = 0
+        self.exhausted = False
+        self.truncated = False
+        self.stopped_at = None
+
+    def __iter__(self):
+        for page in range(1, self.max_pages + 1):
+            if page > 1 and self.delay:
+                time.sleep(self.delay)
+            response = self.transport.get(CREDIT_PAGE_URL.format(page=page), headers=self.headers)
+            data = response.json()
+            self.pages_fetched = page
+            if not data.get("success"):
+                raise CreditPageError(data.get("message") or f"page-{page} 查询失败")
+            records = data.get("data") or []
+            if not records:
+                self.exhausted = True
+                return
+            yield page, records
+        self.truncated = True
+        print(f"收支记录已达页数上限 {self.max_pages} 页（NS_CREDIT_MAX_PAGES），更早的记录未抓取")
+
+    def records(self, stop=None):
+        """
+        按时间倒序逐条产出 (epoch, record)，每页批量解析一次。
+        stop(epoch, record) 返回 True 时立即停止（不产出该条，也不再请求后续页），该条记入 stopped_at。
+        """
+        for _, records in self:
+            for epoch, record in zip(parse_epochs([r[3] for r in records]), records):
+                if stop is not None and stop(epoch, record):
+                    self.stopped_at = (epoch, record)
+                    return
+                yield epoch, record
+
+
+def iter_credit_records(transport, headers, stop=None, max_pages=None):
+    """按时间倒序逐条产出 (epoch, record)，见 CreditPageStream.records"""
+    return CreditPageStream(transport, headers, max_pages=max_pages).records(stop)
+
+
+def stop_before(since_epoch):
+    """遇到早于 since_epoch 的记录时停止"""
+    return lambda epoch, record: epoch < since_epoch
+
+
+def stop_at_known(known):
+    """遇到 known（账本已存记录键集合，由调用方一次性载入）中的记录时停止"""
+    return lambda epoch, record: record_key(record) in known
+
+
+def stop_any(*predicates):
+    return lambda epoch, record: any(p(epoch, record) for p in predicates)
+
+
+def fetch_credit_records(transport, headers, query_start_epoch):
+    """抓取查询起点之后的收支记录（无缓存模式），越过起点即停止翻页"""
+    return [
+        (epoch, record[0], record[1], record[2])
+        for epoch, record in iter_credit_records(transport, headers, stop=stop_before(query_start_epoch))
+    ]
+
+
+def sync_credit_ledger(transport, ledger, ledger_key, headers, query_start_time):
+    """
+    增量同步本地账本：从第1页开始逐条抓取，遇到账本中已存在的记录即停止。
+    若查询范围早于本地连续覆盖的时间，则继续回溯直到覆盖查询起点。
+    """
+    query_start_epoch = int(query_start_time.timestamp())
+    covered_since = ledger.covered_since(ledger_key)
+    need_backfill = covered_since is None or query_start_epoch < covered_since
+
+    stop = stop_before(query_start_epoch)
+    latest = None if need_backfill else ledger.latest_epoch(ledger_key)
+    known = set()
+    if latest is not None:
+        # 账本最新一秒内的记录键一次性载入；抓到其中任一条或更早的记录，说明已追上上次同步的位置
+        known = ledger.keys_since(ledger_key, latest)
+        stop = stop_any(stop, stop_at_known(known), stop_before(latest))
+
+    stream = CreditPageStream(transport, headers)
+    fetched = []
+    try:
+        for _, record in stream.records(stop):
+            fetched.append(record)
+    except Exception as e:
+        # 接口返回失败或请求异常：不更新覆盖范围，统计仍基于已有的本地数据。
+        # 只保存能与本地数据衔接的部分（越过了原有最新记录，或账本尚无覆盖范围、下次会完整回溯）；
+        # 否则新记录与原有最新记录之间留有缺口，保存后下次增量同步会误以为已追上而永远跳过这段记录
+        print(f"收支记录同步中断: {e}")
+        head = ledger.latest_epoch(ledger_key)
+        if fetched and (covered_since is None or (head is not None and parse_epoch(fetched[-1][3]) < head)):
+            ledger.add_records(ledger_key, fetched)
+        return
+    ledger.add_records(ledger_key, fetched)
+
+    if stream.stopped_at is not None:
+        epoch, record = stream.stopped_at
+        if latest is not None and (epoch < latest or record_key(record) in known):
+            # 已追上上次保存的最新记录，本地数据仍连续，覆盖范围不变
+            return
+        covered = query_start_epoch
+    elif stream.exhausted:
+        # 已到最早的记录，本地账本覆盖全部历史
+        covered = 0
+    else:
+        # 触达页数上限仍未覆盖查询起点，只能保证抓到的最早记录之后是连续的
+        covered = parse_epoch(fetched[-1][3]) if fetched else query_start_epoch
+    ledger.set_covered_since(ledger_key, covered)
+
+
+@traced("credit_crawl")
+def get_signin_stats(ns_cookie, days=30, ledger_key=None, transport=None):
+    """
+    查询前days天内的签到收益统计
+
+    传入 ledger_key 时使用本地账本增量同步，稳定状态下每次仅请求第1页。
+    """
     if not ns_cookie:
         return None, "无有效Cookie"
     
@@ -250,84 +540,25 @@ def get_signin_stats(ns_cookie, days=30):
         # 计算查询开始时间：当前时间减去指定天数
         query_start_time = now_shanghai - timedelta(days=days)
         
-        # 获取多页数据以确保覆盖指定天数内的所有数据
-        all_records = []
-        page = 1
-        
-        while page <= 20:  # 最多查询20页，防止无限循环
-            url = f"https://www.nodeseek.com/api/account/credit/page-{page}"
-            response = requests.get(url, headers=headers, impersonate="chrome110")
-            data = response.json()
-            
-            if not data.get("success") or not data.get("data"):
-                break
-                
-            records = data.get("data", [])
-            if not records:
-                break
-                
-            # 检查最后一条记录的时间，如果超出查询范围就停止
-            last_record_time = datetime.fromisoformat(
-                records[-1][3].replace('Z', '+00:00'))
-            last_record_time_shanghai = last_record_time.astimezone(shanghai_tz)
-            if last_record_time_shanghai < query_start_time:
-                # 只添加在查询范围内的记录
-                for record in records:
-                    record_time = datetime.fromisoformat(
-                        record[3].replace('Z', '+00:00'))
-                    record_time_shanghai = record_time.astimezone(shanghai_tz)
-                    if record_time_shanghai >= query_start_time:
-                        all_records.append(record)
-                break
+        query_start_epoch = int(query_start_time.timestamp())
+        ledger = get_credit_ledger() if ledger_key else None
+        with transport_scope(transport) as transport:
+            if ledger:
+                sync_credit_ledger(transport, ledger, ledger_key, headers, query_start_time)
+                rows = ledger.rows_since(ledger_key, query_start_epoch)
             else:
-                all_records.extend(records)
-                
-            page += 1
-            time.sleep(0.5)
+                rows = fetch_credit_records(transport, headers, query_start_epoch)
         
-        # 筛选指定天数内的签到收益记录
-        signin_records = []
-        for record in all_records:
-            amount, balance, description, timestamp = record
-            record_time = datetime.fromisoformat(
-                timestamp.replace('Z', '+00:00'))
-            record_time_shanghai = record_time.astimezone(shanghai_tz)
-            
-            # 只统计指定天数内的签到收益
-            if (record_time_shanghai >= query_start_time and
-                    "签到收益" in description and "鸡腿" in description):
-                signin_records.append({
-                    'amount': amount,
-                    'date': record_time_shanghai.strftime('%Y-%m-%d'),
-                    'description': description
-                })
+        stats = aggregate(rows, since_epoch=query_start_epoch)
         
         # 生成时间范围描述
         period_desc = f"近{days}天"
         if days == 1:
             period_desc = "今天"
+        stats['period'] = period_desc
         
-        if not signin_records:
-            return {
-                'total_amount': 0,
-                'average': 0,
-                'days_count': 0,
-                'records': [],
-                'period': period_desc,
-            }, f"查询成功，但没有找到{period_desc}的签到记录"
-        
-        # 统计数据
-        total_amount = sum(record['amount'] for record in signin_records)
-        days_count = len(signin_records)
-        average = round(total_amount / days_count, 2) if days_count > 0 else 0
-        
-        stats = {
-            'total_amount': total_amount,
-            'average': average,
-            'days_count': days_count,
-            'records': signin_records,
-            'period': period_desc
-        }
+        if not stats['days_count']:
+            return stats, f"查询成功，但没有找到{period_desc}的签到记录"
         
         return stats, "查询成功"
         
@@ -344,18 +575,13 @@ def print_signin_stats(stats, account_name):
     print(f"签到天数: {stats['days_count']} 天")
     print(f"总获得鸡腿: {stats['total_amount']} 个")
     print(f"平均每日鸡腿: {stats['average']} 个")
+    if stats.get('longest_streak'):
+        print(f"当前连续签到: {stats['current_streak']} 天，最长连续: {stats['longest_streak']} 天")
     
 
-# ---------------- 主流程 ----------------
-if __name__ == "__main__":
-    solver_type = os.getenv("SOLVER_TYPE", "turnstile")
-    api_base_url = os.getenv("API_BASE_URL", "")
-    client_key = os.getenv("CLIENTT_KEY", "") 
-    ns_random = os.getenv("NS_RANDOM", "true")
-
-    env_type = detect_environment()
-    print(f"当前运行环境: {env_type}")
-    
+# ---------------- 账号收集 ----------------
+def collect_accounts():
+    """收集账号密码配置与现有 Cookie，返回等长的 (accounts, cookie_list)"""
     accounts = []
 
     # 先收集账号密码配置
@@ -411,7 +637,79 @@ if __name__ == "__main__":
     while len(cookie_list) < max_count:
         cookie_list.append("")
     
+    return accounts, cookie_list
+
+
+# ---------------- 连接预热 ----------------
+def prewarm_transports(count):
+    """
+    预先建立并预热 count 个传输层（DNS + TLS + keep-alive），供定时签到在目标时刻直接发送请求。
+    预热失败的连接仍会放入池中，签到时按普通方式建立连接。
+    """
+    pool = []
+    for _ in range(count):
+        transport = NodeSeekTransport()
+        try:
+            elapsed = transport.warm_up()
+            print(f"连接预热完成（DNS+TLS+keep-alive），耗时 {elapsed * 1000:.0f} ms")
+        except Exception as e:
+            print(f"连接预热失败，将在签到时重新建立连接: {e}")
+        pool.append(transport)
+    return pool
+
+
+def wait_until(target):
+    """精确等待到目标时刻（先粗略休眠，最后一小段短间隔轮询）"""
+    while True:
+        remaining = (target - datetime.now(target.tzinfo)).total_seconds()
+        if remaining <= 0:
+            return
+        time.sleep(remaining - 0.05 if remaining > 0.1 else min(remaining, 0.005))
+
+
+# ---------------- 主流程 ----------------
+def main(fire_at=None, warm_pool=None, collected=None):
+    """
+    fire_at: 可选的目标时刻（aware datetime），第一个需要签到的账号会等到该时刻再发送签到请求。
+    warm_pool: 可选的预热传输层列表（见 prewarm_transports），按账号顺序取用。
+    collected: 可选的 collect_accounts() 结果，已收集过账号时传入，避免重复读取。
+    """
+    trace.begin_run("sign")
+    # 运行期间的通知只缓存，结束时每个渠道合并推送一次（NOTIFY_DIGEST=false 时逐条推送）
+    with notify_digest("NodeSeek 签到") if hadsend else nullcontext():
+        sign_all_accounts(fire_at, warm_pool, collected)
+    trace.print_summary()
+
+
+def prewarmed_main(fire_at):
+    """
+    定时签到：先收集账号并为每个账号预热连接，等到 fire_at 再发送签到请求。
+    调度器在目标时刻前 NS_PREWARM_SECONDS 秒调用（进程内），或以 --fire-at 参数启动本脚本（子进程）。
+    """
+    collected = collect_accounts()
+    try:
+        warm_pool = prewarm_transports(max(1, len(collected[0])))
+    except Exception as e:
+        print(f"预热失败，将在签到时建立连接: {e}")
+        warm_pool = None
+    main(fire_at, warm_pool, collected)
+
+
+def sign_all_accounts(fire_at=None, warm_pool=None, collected=None):
+    solver_type = os.getenv("SOLVER_TYPE", "turnstile")
+    api_base_url = os.getenv("API_BASE_URL", "")
+    client_key = os.getenv("CLIENTT_KEY", "") 
+    ns_random = os.getenv("NS_RANDOM", "true")
+
+    env_type = detect_environment()
+    print(f"当前运行环境: {env_type}")
+    
+    accounts, cookie_list = collected or collect_accounts()
+    max_count = len(accounts)
+    
     cookies_updated = False
+    sign_journal = load_sign_journal()
+    force_sign = os.getenv("NS_SIGN_FORCE", "false").lower() == "true"
     
     for i in range(max_count):
         account_index = i + 1
@@ -421,19 +719,31 @@ if __name__ == "__main__":
         cookie = cookie_list[i] if i < len(cookie_list) else ""
         
         display_user = user if user else f"账号{account_index}"
+        trace.bind_account(display_user)
         
         print(f"\n==== 账号 {display_user} 开始签到 ====")
+        entry = get_sign_entry(sign_journal, display_user)
+        if entry and not force_sign:
+            print(f"账号 {display_user} 今日已于 {entry['time']} 完成签到（{entry['result']}），跳过")
+            continue
+        transport = warm_pool.pop(0) if warm_pool else NodeSeekTransport()
         
         if cookie:
-            result, msg = sign(cookie, ns_random)
+            if fire_at is not None:
+                wait_until(fire_at)
+                latency_ms = (datetime.now(fire_at.tzinfo) - fire_at).total_seconds() * 1000
+                print(f"目标时间 {fire_at.strftime('%H:%M:%S')} 到发出签到请求的延迟: {latency_ms:.0f} ms")
+                fire_at = None
+            result, msg = sign(cookie, ns_random, transport=transport)
         else:
             result, msg = "invalid", "无Cookie"
+        record_sign_result(sign_journal, display_user, result, msg)
 
         if result in ["success", "already"]:
             print(f"账号 {display_user} 签到成功: {msg}")
             
             print("正在查询签到收益统计...")
-            stats, stats_msg = get_signin_stats(cookie, 30)
+            stats, stats_msg = get_signin_stats(cookie, 30, ledger_key=display_user, transport=transport)
             if stats:
                 print_signin_stats(stats, display_user)
             else:
@@ -444,7 +754,8 @@ if __name__ == "__main__":
                     notification_msg = f"账号 {display_user} 签到成功：{msg}"
                     if stats:
                         notification_msg += f"\n{stats['period']}已签到{stats['days_count']}天，共获得{stats['total_amount']}个鸡腿，平均{stats['average']}个/天"
-                    send("NodeSeek 签到", notification_msg)
+                    with span("notify"):
+                        send("NodeSeek 签到", notification_msg, severity="success")
                 except Exception as e:
                     print(f"发送通知失败: {e}")
         else:
@@ -452,16 +763,17 @@ if __name__ == "__main__":
             
             if user and password:
                 print("尝试重新登录获取新Cookie...")
-                new_cookie = session_login(user, password, solver_type, api_base_url, client_key)
+                new_cookie = session_login(user, password, solver_type, api_base_url, client_key, transport=transport)
                 if new_cookie:
                     print("登录成功，使用新Cookie重新签到...")
-                    result, msg = sign(new_cookie, ns_random)
+                    result, msg = sign(new_cookie, ns_random, transport=transport)
+                    record_sign_result(sign_journal, display_user, result, msg)
                     if result in ["success", "already"]:
                         print(f"账号 {display_user} 签到成功: {msg}")
                         cookies_updated = True
                         
                         print("正在查询签到收益统计...")
-                        stats, stats_msg = get_signin_stats(new_cookie, 30)
+                        stats, stats_msg = get_signin_stats(new_cookie, 30, ledger_key=display_user, transport=transport)
                         if stats:
                             print_signin_stats(stats, display_user)
                         else:
@@ -474,7 +786,8 @@ if __name__ == "__main__":
                                 notification_msg = f"账号 {display_user} 签到成功：{msg}"
                                 if stats:
                                     notification_msg += f"\n{stats['period']}已签到{stats['days_count']}天，共获得{stats['total_amount']}个鸡腿，平均{stats['average']}个/天"
-                                send("NodeSeek 签到", notification_msg)
+                                with span("notify"):
+                                    send("NodeSeek 签到", notification_msg, severity="success")
                             except Exception as e:
                                 print(f"发送通知失败: {e}")
                     else:
@@ -483,11 +796,15 @@ if __name__ == "__main__":
                     print(f"账号 {display_user} 登录失败，无法获取新Cookie")
                     if hadsend:
                         try:
-                            send("NodeSeek 登录失败", f"账号 {display_user} 登录失败")
+                            with span("notify"):
+                                send("NodeSeek 登录失败", f"账号 {display_user} 登录失败", severity="failure")
                         except Exception as e:
                             print(f"发送通知失败: {e}")
             else:
                 print(f"账号 {display_user} 无法重新登录: 未配置用户名或密码")
+
+        transport.close()
+    trace.bind_account(None)
     
     if cookies_updated and cookie_list:
         print("\n==== 处理完毕，保存更新后的Cookie ====")
@@ -497,3 +814,54 @@ if __name__ == "__main__":
             print("所有Cookie已成功保存")
         except Exception as e:
             print(f"保存Cookie变量异常: {e}")
+
+    for transport in warm_pool or []:
+        transport.close()
+
+
+def stats_main(days=None):
+    """只查询并推送各账号的签到收益统计（供调度器的 stats 任务使用），不执行签到"""
+    if days is None:
+        days = parse_int(os.getenv("NS_STATS_DAYS"), default=30, minimum=1)
+    trace.begin_run("stats")
+    accounts, cookie_list = collect_accounts()
+    lines = []
+    for i, account in enumerate(accounts):
+        cookie = cookie_list[i]
+        display_user = account["user"] or f"账号{i + 1}"
+        if not cookie:
+            print(f"账号 {display_user} 无Cookie，跳过统计")
+            continue
+        trace.bind_account(display_user)
+        with NodeSeekTransport() as transport:
+            stats, stats_msg = get_signin_stats(cookie, days, ledger_key=display_user, transport=transport)
+        if stats:
+            print_signin_stats(stats, display_user)
+            lines.append(
+                f"账号 {display_user}：{stats['period']}已签到{stats['days_count']}天，"
+                f"共获得{stats['total_amount']}个鸡腿，平均{stats['average']}个/天，"
+                f"当前连续{stats['current_streak']}天"
+            )
+        else:
+            print(f"账号 {display_user} 统计查询失败: {stats_msg}")
+            lines.append(f"账号 {display_user}：统计查询失败（{stats_msg}）")
+
+    trace.bind_account(None)
+
+    if lines and hadsend:
+        try:
+            with span("notify"):
+                send("NodeSeek 签到统计", "\n".join(lines), severity="info")
+        except Exception as e:
+            print(f"发送通知失败: {e}")
+    trace.print_summary()
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if "--stats" in argv:
+        stats_main()
+    elif "--fire-at" in argv[:-1]:
+        prewarmed_main(datetime.fromisoformat(argv[argv.index("--fire-at") + 1]))
+    else:
+        main()
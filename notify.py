@@ -1,20 +1,25 @@
 #!/usr/bin/env python3
 # _*_ coding:utf-8 _*_
 import base64
+import fnmatch
+import functools
 import hashlib
+import heapq
 import hmac
 import json
 import os
+import random
 import re
 import threading
 import time
 import urllib.parse
-import smtplib
-from email.mime.text import MIMEText
-from email.header import Header
-from email.utils import formataddr
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, make_dataclass
+from typing import Callable, Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
 # 原先的 print 函数和主线程的锁
 _print = print
@@ -34,6 +39,9 @@ def print(text, *args, **kw):
 # fmt: off
 push_config = {
     'HITOKOTO': True,                  # 启用一言（随机句子）
+    'HITOKOTO_POOL_PATH': './cookie/hitokoto_pool.json',  # 一言缓存池文件，跨运行复用
+    'HITOKOTO_POOL_SIZE': 10,           # 一言缓存池容量，低于一半时后台批量补充
+    'HITOKOTO_TTL': 86400,              # 缓存的一言过期时间（秒）
 
     'BARK_PUSH': '',                    # bark IP 或设备码，例：https://api.day.app/DxHcxxxxxRxxxxxxcm/
     'BARK_ARCHIVE': '',                 # bark 推送是否存档
@@ -85,6 +93,7 @@ push_config = {
     'QYWX_ORIGIN': '',                  # 企业微信代理地址
 
     'QYWX_AM': '',                      # 企业微信应用
+    'QYWX_TOKEN_CACHE_PATH': './cookie/wecom_token.json',  # 企业微信应用 access_token 缓存文件，跨运行复用
 
     'QYWX_KEY': '',                     # 企业微信机器人
 
@@ -117,30 +126,533 @@ push_config = {
     'WEBHOOK_BODY': '',                 # 自定义通知 请求体
     'WEBHOOK_HEADERS': '',              # 自定义通知 请求头
     'WEBHOOK_METHOD': '',               # 自定义通知 请求方法
-    'WEBHOOK_CONTENT_TYPE': ''          # 自定义通知 content-type
+    'WEBHOOK_CONTENT_TYPE': '',         # 自定义通知 content-type
+
+    'NOTIFY_TIMEOUT': 15,               # 单个渠道单次请求超时（秒），可用 NOTIFY_TIMEOUT_<渠道函数名> 单独覆盖，如 NOTIFY_TIMEOUT_SMTP
+    'NOTIFY_DEADLINE': 60,              # 单次 send 等待全部渠道的最长时间（秒），超时的渠道记为失败
+    'NOTIFY_MAX_WORKERS': 8,            # 推送线程池大小
+    'NOTIFY_RATE_LIMITS': '',           # 覆盖渠道限速，如 dingding_bot=20/60,telegram_bot=1/1,bark=off（条数/秒数）
+    'NOTIFY_ROUTE_SUCCESS': '',         # 成功类消息的渠道链，如 telegram_bot,bark：前一个失败或超时才尝试下一个；留空为全部渠道
+    'NOTIFY_ROUTE_INFO': '',            # 普通消息的渠道链
+    'NOTIFY_ROUTE_FAILURE': '',         # 失败类消息的渠道链，如 telegram_bot+wecom_bot,*（+ 同时推送，* 表示其余全部渠道）
+    'NOTIFY_TITLE_ROUTES': '',          # 按标题路由，每行 标题=渠道链（标题支持 * 通配，渠道链为 skip 时不推送）
+    'NOTIFY_DIGEST': 'true',            # 摘要模式：digest() 期间的消息合并为一条，结束时每个渠道只推送一次
+    'NOTIFY_OUTBOX': 'true',            # 发件箱模式：send 写入本地发件箱后立即返回，由后台线程投递并失败重试
+    'NOTIFY_OUTBOX_PATH': './cookie/notify_outbox.db',  # 发件箱 SQLite 路径
+    'NOTIFY_OUTBOX_MAX_ATTEMPTS': 8,    # 单个渠道最多投递次数，超过后转入死信
+    'NOTIFY_OUTBOX_FAILOVER_ATTEMPTS': 2,   # 有备用渠道时单个渠道的投递次数，同一步的渠道都用尽后才切换到备用渠道
+    'NOTIFY_SUPPRESS_WINDOW': 0,        # 重复通知抑制窗口（秒），窗口内相同通知只计数，结束后汇总推送一次；0 为关闭（默认）
+    'NOTIFY_SUPPRESS_SEVERITIES': 'failure',  # 参与重复抑制的消息级别，逗号分隔
+    'NOTIFY_SUPPRESS_PATH': './cookie/notify_suppress.json',  # 重复通知记录文件
 }
 # fmt: on
 
+
+
+class PushConfig(dict):
+    """推送配置字典：每次修改递增 version，渠道注册表据此判断是否需要重建"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def _changed(self):
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._changed()
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self._changed()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._changed()
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+
 # 首先读取 面板变量 或者 github action 运行变量
-for k in push_config:
-    if os.getenv(k):
-        v = os.getenv(k)
-        push_config[k] = v
+push_config = PushConfig(push_config)
+push_config.update({k: os.getenv(k) for k in push_config if os.getenv(k)})
+
+
+# ---------------- 推送分发 ----------------
+# 线程池与按主机复用的 keep-alive Session 在进程内常驻，多次 send 之间共享
+_local = threading.local()
+_sessions = {}
+_sessions_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _config_float(key: str, default: float) -> float:
+    try:
+        value = float(push_config.get(key) or default)
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+def channel_timeout(name: str) -> float:
+    """渠道超时：NOTIFY_TIMEOUT_<渠道函数名> 优先，否则使用 NOTIFY_TIMEOUT"""
+    default = _config_float("NOTIFY_TIMEOUT", 15)
+    try:
+        return float(os.getenv(f"NOTIFY_TIMEOUT_{name.upper()}") or default)
+    except ValueError:
+        return default
+
+
+def _current_timeout() -> float:
+    return getattr(_local, "timeout", None) or _config_float("NOTIFY_TIMEOUT", 15)
+
+
+def _session_for(url: str) -> requests.Session:
+    host = urllib.parse.urlsplit(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+    return session
+
+
+def _http(method: str, url: str, **kwargs) -> requests.Response:
+    """所有渠道的 HTTP 请求入口：按主机复用 Session，未指定超时时使用当前渠道的超时"""
+    kwargs.setdefault("timeout", _current_timeout())
+    return _session_for(url).request(method, url, **kwargs)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(_config_float("NOTIFY_MAX_WORKERS", 8))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notify")
+    return _executor
+
+
+# ---------------- 渠道限速 ----------------
+# 渠道函数名 -> (条数, 秒数)：令牌桶容量为条数，按 条数/秒数 的速率恢复
+DEFAULT_RATE_LIMITS = {
+    "dingding_bot": (20, 60),       # 钉钉机器人每分钟最多 20 条
+    "wecom_bot": (20, 60),          # 企业微信机器人每分钟最多 20 条
+    "feishu_bot": (5, 1),           # 飞书机器人每秒 5 条（每分钟 100 条）
+    "telegram_bot": (1, 1),         # Telegram 同一会话每秒 1 条
+    "serverJ": (5, 60),             # Server 酱
+    "pushplus_bot": (5, 60),        # PushPlus
+}
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    说明：
+    - reserve() 预占一个令牌并返回需要等待的秒数，令牌可透支为负数，
+      先预占的消息先发送，超出配额的消息被依次顺延而不是丢弃。
+    - 同时记录排队等待的次数、总时长与最大值，供 rate_limit_stats() 查看。
+    """
+
+    def __init__(self, count: float, period: float):
+        self.capacity = float(count)
+        self.rate = float(count) / float(period)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            delay = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            if delay > 0:
+                self.waiting += 1
+                self.waited += 1
+                self.total_wait += delay
+                self.max_wait = max(self.max_wait, delay)
+            return delay
+
+    def release_wait(self):
+        with self._lock:
+            self.waiting = max(0, self.waiting - 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": f"{self.capacity:g}/{self.capacity / self.rate:g}s",
+                "queued": self.waiting,
+                "waited": self.waited,
+                "total_wait_ms": round(self.total_wait * 1000, 1),
+                "max_wait_ms": round(self.max_wait * 1000, 1),
+            }
 
 
-def bark(title: str, content: str) -> None:
+class DelayedSubmitter:
+    """
+    延时提交：限速渠道排队期间不占用线程池的工作线程。
+    submit(delay, fn, *args) 立即返回 Future，由一个后台线程在到期后把任务交给线程池执行。
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, delay: float, fn, *args) -> Future:
+        if delay <= 0:
+            return _submit_now(fn, *args)
+        outer = Future()
+        with self._cond:
+            try:
+                if self._thread is None or not self._thread.is_alive():
+                    thread = threading.Thread(target=self._loop, name="notify-delay", daemon=True)
+                    thread.start()
+                    self._thread = thread
+            except RuntimeError:    # 解释器退出阶段不能再创建线程：在当前线程等待
+                outer = None
+            else:
+                self._seq += 1
+                heapq.heappush(self._heap, (time.monotonic() + delay, self._seq, outer, fn, args))
+                self._cond.notify()
+        if outer is not None:
+            return outer
+        time.sleep(delay)
+        return _submit_now(fn, *args)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                due, _, outer, fn, args = self._heap[0]
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                heapq.heappop(self._heap)
+            if not outer.set_running_or_notify_cancel():
+                continue
+            inner = _submit_now(fn, *args)
+            inner.add_done_callback(lambda inner, outer=outer: _chain(inner, outer))
+
+
+def _submit_now(fn, *args) -> Future:
+    """交给线程池执行；解释器退出阶段（atexit 中投递发件箱）线程池不再接收任务时，改为在当前线程执行"""
+    try:
+        return _get_executor().submit(fn, *args)
+    except RuntimeError:
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def _chain(inner: Future, outer: Future):
+    error = inner.exception()
+    if error is not None:
+        outer.set_exception(error)
+    else:
+        outer.set_result(inner.result())
+
+
+_delayed = DelayedSubmitter()
+_limiters = {}
+_limiters_lock = threading.Lock()
+_rate_limit_table = (None, None)    # (NOTIFY_RATE_LIMITS 原始值, 解析结果)
+
+
+def _parse_rate(value: str):
+    """解析 '条数/秒数'（秒数可带 s/m/h 单位），off/0 表示不限速，格式错误返回 False"""
+    value = str(value).strip().lower()
+    if value in ("", "0", "off", "none", "false"):
+        return None
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)?\s*([smh]?)", value)
+    if not m or float(m.group(1)) <= 0:
+        return False
+    period = float(m.group(2) or 1) * {"": 1, "s": 1, "m": 60, "h": 3600}[m.group(3)]
+    return (float(m.group(1)), period) if period > 0 else False
+
+
+def _rate_limits() -> dict:
+    """
+    默认限速叠加 NOTIFY_RATE_LIMITS 中的覆盖项（调用方持有 _limiters_lock）。
+    解析结果按配置原文缓存，push_config 中的值变化后重新解析并重建各渠道令牌桶。
+    """
+    global _rate_limit_table
+    raw = str(push_config.get("NOTIFY_RATE_LIMITS") or "")
+    if _rate_limit_table[0] == raw:
+        return _rate_limit_table[1]
+    limits = dict(DEFAULT_RATE_LIMITS)
+    for item in re.split(r"[,;\n]", str(push_config.get("NOTIFY_RATE_LIMITS") or "")):
+        if "=" not in item:
+            continue
+        name, value = (x.strip() for x in item.split("=", 1))
+        parsed = _parse_rate(value)
+        if parsed is False:
+            print(f"NOTIFY_RATE_LIMITS 中 {name} 的限速 '{value}' 格式错误，使用默认值")
+            continue
+        limits[name] = parsed
+    _rate_limit_table = (raw, limits)
+    _limiters.clear()
+    return limits
+
+
+def channel_limiter(name: str):
+    """返回渠道的令牌桶，未限速的渠道返回 None"""
+    with _limiters_lock:
+        limits = _rate_limits()
+        if name not in _limiters:
+            limit = limits.get(name)
+            _limiters[name] = TokenBucket(*limit) if limit else None
+        return _limiters[name]
+
+
+def rate_limit_stats() -> dict:
+    """各限速渠道的排队统计：当前排队数、累计排队次数、总/最大等待时间"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: bucket.stats() for name, bucket in limiters.items() if bucket is not None}
+
+
+def _reserve(name: str) -> float:
+    bucket = channel_limiter(name)
+    return bucket.reserve() if bucket is not None else 0.0
+
+
+def _run_channel(func, title: str, content: str, timeout: float, delay: float = None) -> dict:
+    """
+    执行单个渠道；delay 为 dispatch 已预占并通过延时提交等待过的时间。
+    未传入时在此预占并在当前线程等待（不经过 dispatch 直接调用时）。
+    """
+    if delay is None:
+        delay = _reserve(func.__name__)
+        if delay > 0:
+            time.sleep(delay)
+    if delay > 0:
+        bucket = channel_limiter(func.__name__)
+        if bucket is not None:
+            bucket.release_wait()
+    _local.timeout = timeout
+    start = time.perf_counter()
+    error = None
+    try:
+        ok = bool(func(title, content))
+        if not ok:
+            error = "推送失败"
+    except Exception as e:
+        ok = False
+        error = f"{type(e).__name__}: {e}"
+        print(f"{func.__name__} 推送异常: {error}")
+    finally:
+        _local.timeout = None
+    return {"ok": ok, "latency_ms": round((time.perf_counter() - start) * 1000, 1), "error": error,
+            "wait_ms": round(delay * 1000, 1)}
+
+
+def dispatch(notify_function, title: str, content: str, deadline: float = None, parts: dict = None) -> dict:
+    """
+    在常驻线程池中并发执行各渠道，最多等待 deadline 秒。
+    返回 {渠道函数名: {"ok", "latency_ms", "error", "wait_ms"}}；截止时仍未完成的渠道记为失败（其请求受渠道超时约束，会在后台结束）。
+    限速渠道在提交时按顺序预占令牌，到期后才交给线程池（排队期间不占用工作线程），排队等待的时间不计入 deadline。
+    parts 为 {渠道函数名: (title, content)}，用于各渠道同时发送各自的分片。
+    """
+    if not notify_function:
+        return {}
+    deadline = deadline or _config_float("NOTIFY_DEADLINE", 60)
+    start = time.perf_counter()
+    futures = {}
+    delays = {}
+    for func in notify_function:
+        name = func.__name__
+        delays[name] = _reserve(name)
+        part_title, part_content = (parts or {}).get(name, (title, content))
+        future = _delayed.submit(delays[name], _run_channel, func, part_title, part_content,
+                                 channel_timeout(name), delays[name])
+        futures[future] = name
+    limit = deadline + max(delays.values())
+    done, _ = wait(futures, timeout=limit)
+    results = {}
+    for future, name in futures.items():
+        if future in done:
+            results[name] = future.result()
+        else:
+            results[name] = {"ok": False, "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+                             "error": f"超过 {deadline:.0f} 秒截止时间", "wait_ms": round(delays[name] * 1000, 1)}
+    summary = ", ".join(
+        f"{name} {'成功' if r['ok'] else '失败'} {r['latency_ms']:.0f}ms"
+        + (f"（限速排队 {r['wait_ms'] / 1000:.1f}s）" if r.get("wait_ms") else "")
+        for name, r in results.items()
+    )
+    print(f"推送结果: {summary}")
+    return results
+
+
+# ---------------- 渠道注册表 ----------------
+@dataclass(frozen=True)
+class ChannelOptions:
+    """渠道配置对象的基类；各渠道注册时按其配置项生成不可变子类，字段名即配置项名"""
+
+
+@dataclass(frozen=True)
+class ChannelConfig:
+    """已启用渠道的配置快照：渠道名、推送函数与该渠道的配置对象"""
+    name: str
+    func: Callable[..., bool]
+    options: ChannelOptions
+
+
+@dataclass(frozen=True)
+class ChannelSpec:
+    """
+    渠道注册信息
+    - required: 全部非空时启用该渠道
+    - optional: 渠道用到的其余配置项
+    - options_type: 由 required + optional 生成的配置类，注册表重建时按 push_config 实例化后传给渠道函数
+    - validate(options) 返回错误描述时跳过该渠道并提示
+    """
+    name: str
+    func: Callable[..., bool]
+    required: Tuple[str, ...]
+    optional: Tuple[str, ...]
+    options_type: type
+    validate: Optional[Callable[[ChannelOptions], Optional[str]]] = None
+
+    def options(self, config: dict) -> ChannelOptions:
+        return self.options_type(**{key: config.get(key) for key in self.required + self.optional})
+
+    def build(self, config: dict) -> Optional[ChannelConfig]:
+        if not all(config.get(key) for key in self.required):
+            return None
+        options = self.options(config)
+        error = self.validate(options) if self.validate else None
+        if error:
+            print(f"{self.name} 配置无效，已跳过: {error}")
+            return None
+        return ChannelConfig(self.name, self.func, options)
+
+
+_channel_specs: List[ChannelSpec] = []
+_registry_lock = threading.Lock()
+_registry_cache = {"key": None, "channels": []}
+
+
+def register_channel(func: Callable[..., bool], required: Tuple[str, ...],
+                     validate: Optional[Callable[[ChannelOptions], Optional[str]]] = None,
+                     optional: Tuple[str, ...] = ()):
+    """
+    注册推送渠道（同名渠道会被替换），按注册顺序推送。
+    func(title, content, options) 的 options 为该渠道的配置对象；返回的包装函数按 func(title, content) 调用，
+    options 取注册表中的快照（渠道未启用时按当前 push_config 现建）。
+    """
+    keys = tuple(required) + tuple(optional)
+    options_type = make_dataclass(f"{func.__name__}_options", [(key, Optional[str], None) for key in keys],
+                                  bases=(ChannelOptions,), frozen=True)
+    spec = None
+
+    @functools.wraps(func)
+    def send(title: str, content: str, options: Optional[ChannelOptions] = None) -> bool:
+        return func(title, content, options if options is not None else channel_options(spec))
+
+    spec = ChannelSpec(func.__name__, send, tuple(required), tuple(optional), options_type, validate)
+    with _registry_lock:
+        _channel_specs[:] = [s for s in _channel_specs if s.name != spec.name] + [spec]
+        _registry_cache["key"] = None
+    return send
+
+
+def channel(*required: str, optional: Tuple[str, ...] = (), validate=None):
+    """装饰器：@channel("BARK_PUSH", optional=("BARK_SOUND",)) 表示配置了 BARK_PUSH 时启用该渠道"""
+    def decorator(func):
+        return register_channel(func, required, validate, optional)
+    return decorator
+
+
+def _config_key():
+    version = getattr(push_config, "version", None)
+    if version is None:
+        # push_config 被替换为普通 dict 时退回比较配置内容
+        return id(push_config), tuple(sorted((k, str(v)) for k, v in push_config.items()))
+    return id(push_config), version, len(_channel_specs)
+
+
+def enabled_channels() -> List[ChannelConfig]:
+    """返回已启用渠道的配置快照；仅在 push_config 或注册表变化后重建"""
+    key = _config_key()
+    with _registry_lock:
+        if _registry_cache["key"] != key:
+            config = push_config
+            _registry_cache["channels"] = [c for c in (spec.build(config) for spec in _channel_specs) if c]
+            _registry_cache["key"] = key
+        return _registry_cache["channels"]
+
+
+def channel_options(spec: ChannelSpec) -> ChannelOptions:
+    """渠道当前的配置对象：已启用时取注册表快照，否则（例如直接调用渠道函数）按 push_config 现建"""
+    for config in enabled_channels():
+        if config.name == spec.name:
+            return config.options
+    return spec.options(push_config)
+
+
+def _check_url(*keys):
+    def validate(options):
+        for key in keys:
+            value = str(getattr(options, key) or "")
+            if value and not value.startswith(("http://", "https://")):
+                return f"{key} 需要以 http:// 或 https:// 开头"
+    return validate
+
+
+def _check_qywx_am(options):
+    if len(re.split(",", options.QYWX_AM)) not in (4, 5):
+        return "QYWX_AM 需要 corpid,corpsecret,touser,agentid[,media_id]"
+
+
+@channel("BARK_PUSH", optional=("BARK_ARCHIVE", "BARK_GROUP", "BARK_SOUND", "BARK_ICON", "BARK_LEVEL", "BARK_URL"))
+def bark(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 bark 推送消息。
     """
-    if not push_config.get("BARK_PUSH"):
+    if not options.BARK_PUSH:
         print("bark 服务的 BARK_PUSH 未设置!!\n取消推送")
-        return
+        return False
     print("bark 服务启动")
 
-    if push_config.get("BARK_PUSH").startswith("http"):
-        url = f'{push_config.get("BARK_PUSH")}/{urllib.parse.quote_plus(title)}/{urllib.parse.quote_plus(content)}'
+    if options.BARK_PUSH.startswith("http"):
+        url = f'{options.BARK_PUSH}/{urllib.parse.quote_plus(title)}/{urllib.parse.quote_plus(content)}'
     else:
-        url = f'https://api.day.app/{push_config.get("BARK_PUSH")}/{urllib.parse.quote_plus(title)}/{urllib.parse.quote_plus(content)}'
+        url = f'https://api.day.app/{options.BARK_PUSH}/{urllib.parse.quote_plus(title)}/{urllib.parse.quote_plus(content)}'
 
     bark_params = {
         "BARK_ARCHIVE": "isArchive",
@@ -151,248 +663,274 @@ def bark(title: str, content: str) -> None:
         "BARK_URL": "url",
     }
     params = ""
-    for pair in filter(
-        lambda pairs: pairs[0].startswith("BARK_")
-        and pairs[0] != "BARK_PUSH"
-        and pairs[1]
-        and bark_params.get(pairs[0]),
-        push_config.items(),
-    ):
-        params += f"{bark_params.get(pair[0])}={pair[1]}&"
+    for key, param in bark_params.items():
+        if getattr(options, key):
+            params += f"{param}={getattr(options, key)}&"
     if params:
         url = url + "?" + params.rstrip("&")
-    response = requests.get(url).json()
+    response = _http("GET", url).json()
 
     if response["code"] == 200:
         print("bark 推送成功！")
+        return True
     else:
         print("bark 推送失败！")
+        return False
 
 
-def console(title: str, content: str) -> None:
+@channel("CONSOLE")
+def console(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 控制台 推送消息。
     """
     print(f"{title}\n\n{content}")
+    return True
 
 
-def dingding_bot(title: str, content: str) -> None:
+@channel("DD_BOT_TOKEN", "DD_BOT_SECRET")
+def dingding_bot(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 钉钉机器人 推送消息。
     """
-    if not push_config.get("DD_BOT_SECRET") or not push_config.get("DD_BOT_TOKEN"):
+    if not options.DD_BOT_SECRET or not options.DD_BOT_TOKEN:
         print("钉钉机器人 服务的 DD_BOT_SECRET 或者 DD_BOT_TOKEN 未设置!!\n取消推送")
-        return
+        return False
     print("钉钉机器人 服务启动")
 
     timestamp = str(round(time.time() * 1000))
-    secret_enc = push_config.get("DD_BOT_SECRET").encode("utf-8")
-    string_to_sign = "{}\n{}".format(timestamp, push_config.get("DD_BOT_SECRET"))
+    secret_enc = options.DD_BOT_SECRET.encode("utf-8")
+    string_to_sign = "{}\n{}".format(timestamp, options.DD_BOT_SECRET)
     string_to_sign_enc = string_to_sign.encode("utf-8")
     hmac_code = hmac.new(
         secret_enc, string_to_sign_enc, digestmod=hashlib.sha256
     ).digest()
     sign = urllib.parse.quote_plus(base64.b64encode(hmac_code))
-    url = f'https://oapi.dingtalk.com/robot/send?access_token={push_config.get("DD_BOT_TOKEN")}&timestamp={timestamp}&sign={sign}'
+    url = f'https://oapi.dingtalk.com/robot/send?access_token={options.DD_BOT_TOKEN}&timestamp={timestamp}&sign={sign}'
     headers = {"Content-Type": "application/json;charset=utf-8"}
     data = {"msgtype": "text", "text": {"content": f"{title}\n\n{content}"}}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
-    ).json()
+    response = _http("POST", url=url, data=json.dumps(data), headers=headers).json()
 
     if not response["errcode"]:
         print("钉钉机器人 推送成功！")
+        return True
     else:
         print("钉钉机器人 推送失败！")
+        return False
 
 
-def feishu_bot(title: str, content: str) -> None:
+@channel("FSKEY")
+def feishu_bot(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 飞书机器人 推送消息。
     """
-    if not push_config.get("FSKEY"):
+    if not options.FSKEY:
         print("飞书 服务的 FSKEY 未设置!!\n取消推送")
-        return
+        return False
     print("飞书 服务启动")
 
-    url = f'https://open.feishu.cn/open-apis/bot/v2/hook/{push_config.get("FSKEY")}'
+    url = f'https://open.feishu.cn/open-apis/bot/v2/hook/{options.FSKEY}'
     data = {"msg_type": "text", "content": {"text": f"{title}\n\n{content}"}}
-    response = requests.post(url, data=json.dumps(data)).json()
+    response = _http("POST", url, data=json.dumps(data)).json()
 
     if response.get("StatusCode") == 0 or response.get("code") == 0:
         print("飞书 推送成功！")
+        return True
     else:
         print("飞书 推送失败！错误信息如下：\n", response)
+        return False
 
 
-def go_cqhttp(title: str, content: str) -> None:
+@channel("GOBOT_URL", "GOBOT_QQ", optional=("GOBOT_TOKEN",), validate=_check_url("GOBOT_URL"))
+def go_cqhttp(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 go_cqhttp 推送消息。
     """
-    if not push_config.get("GOBOT_URL") or not push_config.get("GOBOT_QQ"):
+    if not options.GOBOT_URL or not options.GOBOT_QQ:
         print("go-cqhttp 服务的 GOBOT_URL 或 GOBOT_QQ 未设置!!\n取消推送")
-        return
+        return False
     print("go-cqhttp 服务启动")
 
-    url = f'{push_config.get("GOBOT_URL")}?access_token={push_config.get("GOBOT_TOKEN")}&{push_config.get("GOBOT_QQ")}&message=标题:{title}\n内容:{content}'
-    response = requests.get(url).json()
+    url = f'{options.GOBOT_URL}?access_token={options.GOBOT_TOKEN}&{options.GOBOT_QQ}&message=标题:{title}\n内容:{content}'
+    response = _http("GET", url).json()
 
     if response["status"] == "ok":
         print("go-cqhttp 推送成功！")
+        return True
     else:
         print("go-cqhttp 推送失败！")
+        return False
 
 
-def gotify(title: str, content: str) -> None:
+@channel("GOTIFY_URL", "GOTIFY_TOKEN", optional=("GOTIFY_PRIORITY",), validate=_check_url("GOTIFY_URL"))
+def gotify(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 gotify 推送消息。
     """
-    if not push_config.get("GOTIFY_URL") or not push_config.get("GOTIFY_TOKEN"):
+    if not options.GOTIFY_URL or not options.GOTIFY_TOKEN:
         print("gotify 服务的 GOTIFY_URL 或 GOTIFY_TOKEN 未设置!!\n取消推送")
-        return
+        return False
     print("gotify 服务启动")
 
-    url = f'{push_config.get("GOTIFY_URL")}/message?token={push_config.get("GOTIFY_TOKEN")}'
+    url = f'{options.GOTIFY_URL}/message?token={options.GOTIFY_TOKEN}'
     data = {
         "title": title,
         "message": content,
-        "priority": push_config.get("GOTIFY_PRIORITY"),
+        "priority": options.GOTIFY_PRIORITY,
     }
-    response = requests.post(url, data=data).json()
+    response = _http("POST", url, data=data).json()
 
     if response.get("id"):
         print("gotify 推送成功！")
+        return True
     else:
         print("gotify 推送失败！")
+        return False
 
 
-def iGot(title: str, content: str) -> None:
+@channel("IGOT_PUSH_KEY")
+def iGot(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 iGot 推送消息。
     """
-    if not push_config.get("IGOT_PUSH_KEY"):
+    if not options.IGOT_PUSH_KEY:
         print("iGot 服务的 IGOT_PUSH_KEY 未设置!!\n取消推送")
-        return
+        return False
     print("iGot 服务启动")
 
-    url = f'https://push.hellyw.com/{push_config.get("IGOT_PUSH_KEY")}'
+    url = f'https://push.hellyw.com/{options.IGOT_PUSH_KEY}'
     data = {"title": title, "content": content}
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    response = requests.post(url, data=data, headers=headers).json()
+    response = _http("POST", url, data=data, headers=headers).json()
 
     if response["ret"] == 0:
         print("iGot 推送成功！")
+        return True
     else:
         print(f'iGot 推送失败！{response["errMsg"]}')
+        return False
 
 
-def serverJ(title: str, content: str) -> None:
+@channel("PUSH_KEY")
+def serverJ(title: str, content: str, options: ChannelOptions) -> bool:
     """
     通过 serverJ 推送消息。
     """
-    if not push_config.get("PUSH_KEY"):
+    if not options.PUSH_KEY:
         print("serverJ 服务的 PUSH_KEY 未设置!!\n取消推送")
-        return
+        return False
     print("serverJ 服务启动")
 
     data = {"text": title, "desp": content.replace("\n", "\n\n")}
-    if push_config.get("PUSH_KEY").find("SCT") != -1:
-        url = f'https://sctapi.ftqq.com/{push_config.get("PUSH_KEY")}.send'
+    if options.PUSH_KEY.find("SCT") != -1:
+        url = f'https://sctapi.ftqq.com/{options.PUSH_KEY}.send'
     else:
-        url = f'https://sc.ftqq.com/{push_config.get("PUSH_KEY")}.send'
-    response = requests.post(url, data=data).json()
+        url = f'https://sc.ftqq.com/{options.PUSH_KEY}.send'
+    response = _http("POST", url, data=data).json()
 
     if response.get("errno") == 0 or response.get("code") == 0:
         print("serverJ 推送成功！")
+        return True
     else:
         print(f'serverJ 推送失败！错误码：{response["message"]}')
+        return False
 
 
-def pushdeer(title: str, content: str) -> None:
+@channel("DEER_KEY", optional=("DEER_URL",))
+def pushdeer(title: str, content: str, options: ChannelOptions) -> bool:
     """
     通过PushDeer 推送消息
     """
-    if not push_config.get("DEER_KEY"):
+    if not options.DEER_KEY:
         print("PushDeer 服务的 DEER_KEY 未设置!!\n取消推送")
-        return
+        return False
     print("PushDeer 服务启动")
     data = {
         "text": title,
         "desp": content,
         "type": "markdown",
-        "pushkey": push_config.get("DEER_KEY"),
+        "pushkey": options.DEER_KEY,
     }
     url = "https://api2.pushdeer.com/message/push"
-    if push_config.get("DEER_URL"):
-        url = push_config.get("DEER_URL")
+    if options.DEER_URL:
+        url = options.DEER_URL
 
-    response = requests.post(url, data=data).json()
+    response = _http("POST", url, data=data).json()
 
     if len(response.get("content").get("result")) > 0:
         print("PushDeer 推送成功！")
+        return True
     else:
         print("PushDeer 推送失败！错误信息：", response)
+        return False
 
 
-def chat(title: str, content: str) -> None:
+@channel("CHAT_URL", "CHAT_TOKEN", validate=_check_url("CHAT_URL"))
+def chat(title: str, content: str, options: ChannelOptions) -> bool:
     """
     通过Chat 推送消息
     """
-    if not push_config.get("CHAT_URL") or not push_config.get("CHAT_TOKEN"):
+    if not options.CHAT_URL or not options.CHAT_TOKEN:
         print("chat 服务的 CHAT_URL或CHAT_TOKEN 未设置!!\n取消推送")
-        return
+        return False
     print("chat 服务启动")
     data = "payload=" + json.dumps({"text": title + "\n" + content})
-    url = push_config.get("CHAT_URL") + push_config.get("CHAT_TOKEN")
-    response = requests.post(url, data=data)
+    url = options.CHAT_URL + options.CHAT_TOKEN
+    response = _http("POST", url, data=data)
 
     if response.status_code == 200:
         print("Chat 推送成功！")
+        return True
     else:
         print("Chat 推送失败！错误信息：", response)
+        return False
 
 
-def pushplus_bot(title: str, content: str) -> None:
+@channel("PUSH_PLUS_TOKEN", optional=("PUSH_PLUS_USER",))
+def pushplus_bot(title: str, content: str, options: ChannelOptions) -> bool:
     """
     通过 push+ 推送消息。
     """
-    if not push_config.get("PUSH_PLUS_TOKEN"):
+    if not options.PUSH_PLUS_TOKEN:
         print("PUSHPLUS 服务的 PUSH_PLUS_TOKEN 未设置!!\n取消推送")
-        return
+        return False
     print("PUSHPLUS 服务启动")
 
     url = "http://www.pushplus.plus/send"
     data = {
-        "token": push_config.get("PUSH_PLUS_TOKEN"),
+        "token": options.PUSH_PLUS_TOKEN,
         "title": title,
         "content": content,
-        "topic": push_config.get("PUSH_PLUS_USER"),
+        "topic": options.PUSH_PLUS_USER,
     }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = _http("POST", url=url, data=body, headers=headers).json()
 
     if response["code"] == 200:
         print("PUSHPLUS 推送成功！")
+        return True
 
     else:
         url_old = "http://pushplus.hxtrip.com/send"
         headers["Accept"] = "application/json"
-        response = requests.post(url=url_old, data=body, headers=headers).json()
+        response = _http("POST", url=url_old, data=body, headers=headers).json()
 
         if response["code"] == 200:
             print("PUSHPLUS(hxtrip) 推送成功！")
+            return True
 
         else:
             print("PUSHPLUS 推送失败！")
+            return False
 
-def weplus_bot(title: str, content: str) -> None:
+@channel("WE_PLUS_BOT_TOKEN", optional=("WE_PLUS_BOT_RECEIVER", "WE_PLUS_BOT_VERSION"))
+def weplus_bot(title: str, content: str, options: ChannelOptions) -> bool:
     """
     通过 微加机器人 推送消息。
     """
-    if not push_config.get("WE_PLUS_BOT_TOKEN"):
+    if not options.WE_PLUS_BOT_TOKEN:
         print("微加机器人 服务的 WE_PLUS_BOT_TOKEN 未设置!!\n取消推送")
-        return
+        return False
     print("微加机器人 服务启动")
 
     template = "txt"
@@ -401,53 +939,59 @@ def weplus_bot(title: str, content: str) -> None:
 
     url = "https://www.weplusbot.com/send"
     data = {
-        "token": push_config.get("WE_PLUS_BOT_TOKEN"),
+        "token": options.WE_PLUS_BOT_TOKEN,
         "title": title,
         "content": content,
         "template": template,
-        "receiver": push_config.get("WE_PLUS_BOT_RECEIVER"),
-        "version": push_config.get("WE_PLUS_BOT_VERSION"),
+        "receiver": options.WE_PLUS_BOT_RECEIVER,
+        "version": options.WE_PLUS_BOT_VERSION,
     }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = _http("POST", url=url, data=body, headers=headers).json()
 
     if response["code"] == 200:
         print("微加机器人 推送成功！")
+        return True
     else:
         print("微加机器人 推送失败！")
+        return False
 
 
-def qmsg_bot(title: str, content: str) -> None:
+@channel("QMSG_KEY", "QMSG_TYPE")
+def qmsg_bot(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 qmsg 推送消息。
     """
-    if not push_config.get("QMSG_KEY") or not push_config.get("QMSG_TYPE"):
+    if not options.QMSG_KEY or not options.QMSG_TYPE:
         print("qmsg 的 QMSG_KEY 或者 QMSG_TYPE 未设置!!\n取消推送")
-        return
+        return False
     print("qmsg 服务启动")
 
-    url = f'https://qmsg.zendee.cn/{push_config.get("QMSG_TYPE")}/{push_config.get("QMSG_KEY")}'
+    url = f'https://qmsg.zendee.cn/{options.QMSG_TYPE}/{options.QMSG_KEY}'
     payload = {"msg": f'{title}\n\n{content.replace("----", "-")}'.encode("utf-8")}
-    response = requests.post(url=url, params=payload).json()
+    response = _http("POST", url=url, params=payload).json()
 
     if response["code"] == 0:
         print("qmsg 推送成功！")
+        return True
     else:
         print(f'qmsg 推送失败！{response["reason"]}')
+        return False
 
 
-def wecom_app(title: str, content: str) -> None:
+@channel("QYWX_AM", optional=("QYWX_ORIGIN",), validate=_check_qywx_am)
+def wecom_app(title: str, content: str, options: ChannelOptions) -> bool:
     """
     通过 企业微信 APP 推送消息。
     """
-    if not push_config.get("QYWX_AM"):
+    if not options.QYWX_AM:
         print("QYWX_AM 未设置!!\n取消推送")
-        return
-    QYWX_AM_AY = re.split(",", push_config.get("QYWX_AM"))
+        return False
+    QYWX_AM_AY = re.split(",", options.QYWX_AM)
     if 4 < len(QYWX_AM_AY) > 5:
         print("QYWX_AM 设置错误!!\n取消推送")
-        return
+        return False
     print("企业微信 APP 服务启动")
 
     corpid = QYWX_AM_AY[0]
@@ -458,7 +1002,7 @@ def wecom_app(title: str, content: str) -> None:
         media_id = QYWX_AM_AY[4]
     except IndexError:
         media_id = ""
-    wx = WeCom(corpid, corpsecret, agentid)
+    wx = WeCom(corpid, corpsecret, agentid, origin=options.QYWX_ORIGIN)
     # 如果没有配置 media_id 默认就以 text 方式发送
     if not media_id:
         message = title + "\n\n" + content
@@ -468,33 +1012,158 @@ def wecom_app(title: str, content: str) -> None:
 
     if response == "ok":
         print("企业微信推送成功！")
+        return True
     else:
         print("企业微信推送失败！错误信息如下：\n", response)
+        return False
+
+
+WECOM_TOKEN_REFRESH_MARGIN = 300     # access_token 到期前多少秒主动刷新
+WECOM_TOKEN_INVALID_CODES = (40014, 42001)  # access_token 无效 / 已过期
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    跨进程互斥：对 path + '.lock' 加 fcntl.flock 排他锁，签到/评论子进程与调度器共享的缓存文件读改写时使用。
+    不支持 fcntl 的平台（Windows）退回为不加锁，调用方仍应配合线程锁使用。
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class WeComTokenCache:
+    """
+    企业微信应用 access_token 缓存
+
+    说明：
+    - 按 (代理地址, corpid, secret) 的哈希分别缓存，文件中不保存 secret 明文。
+    - 缓存写入 QYWX_TOKEN_CACHE_PATH，签到/评论子进程与调度器之间共享，跨运行复用。
+    - 距离过期不足 WECOM_TOKEN_REFRESH_MARGIN 秒时视为失效，下次取用前重新获取。
+    - 读取、刷新与写回在线程锁与文件锁（file_lock）内完成：多个进程同时发现缓存失效时只有一个去刷新，
+      其余进程拿到锁后直接使用新写入的 token，不会互相覆盖。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(origin: str, corpid: str, secret: str) -> str:
+        return hashlib.sha256(f"{origin}\0{corpid}\0{secret}".encode("utf-8")).hexdigest()[:32]
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save(self, data: dict):
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"保存企业微信 access_token 缓存失败: {e}")
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._load().get(key) or {}
+        if entry.get("access_token") and entry.get("expires_at", 0) - WECOM_TOKEN_REFRESH_MARGIN > time.time():
+            return entry["access_token"]
+        return None
+
+    def get_or_refresh(self, key: str, refresh: Callable[[], Tuple[str, float]], stale: str = None) -> str:
+        """
+        持锁读取缓存；缓存缺失、即将过期或仍是调用方判定失效的 stale token 时调用 refresh() 获取并写回。
+        refresh 返回 (access_token, expires_in)。
+        """
+        with self._lock, file_lock(self.path):
+            data = self._load()
+            now = time.time()
+            entry = data.get(key) or {}
+            token = entry.get("access_token")
+            if token and token != stale and entry.get("expires_at", 0) - WECOM_TOKEN_REFRESH_MARGIN > now:
+                return token
+            token, expires_in = refresh()
+            data = {k: v for k, v in data.items() if v.get("expires_at", 0) > now}
+            data[key] = {"access_token": token, "expires_at": now + expires_in}
+            self._save(data)
+            return token
+
+
+_wecom_token_cache = None
+
+
+def wecom_token_cache() -> WeComTokenCache:
+    global _wecom_token_cache
+    if _wecom_token_cache is None:
+        _wecom_token_cache = WeComTokenCache(
+            push_config.get("QYWX_TOKEN_CACHE_PATH") or "./cookie/wecom_token.json"
+        )
+    return _wecom_token_cache
 
 
 class WeCom:
-    def __init__(self, corpid, corpsecret, agentid):
+    def __init__(self, corpid, corpsecret, agentid, origin=None):
         self.CORPID = corpid
         self.CORPSECRET = corpsecret
         self.AGENTID = agentid
-        self.ORIGIN = "https://qyapi.weixin.qq.com"
-        if push_config.get("QYWX_ORIGIN"):
-            self.ORIGIN = push_config.get("QYWX_ORIGIN")
+        self.ORIGIN = origin or push_config.get("QYWX_ORIGIN") or "https://qyapi.weixin.qq.com"
+        self._cache_key = WeComTokenCache.cache_key(self.ORIGIN, self.CORPID, self.CORPSECRET)
 
-    def get_access_token(self):
+    def _fetch_access_token(self):
         url = f"{self.ORIGIN}/cgi-bin/gettoken"
         values = {
             "corpid": self.CORPID,
             "corpsecret": self.CORPSECRET,
         }
-        req = requests.post(url, params=values)
+        req = _http("POST", url, params=values)
         data = json.loads(req.text)
-        return data["access_token"]
+        if not data.get("access_token"):
+            raise Exception(f"获取 access_token 失败: {data.get('errcode')} {data.get('errmsg')}")
+        return data["access_token"], float(data.get("expires_in") or 7200)
+
+    def get_access_token(self, force_refresh=False, stale=None):
+        """stale 为服务端判定失效的 token：缓存中仍是它时才刷新，其他进程已刷新过则直接使用新 token"""
+        cache = wecom_token_cache()
+        if force_refresh:
+            stale = cache.get(self._cache_key) or stale
+        elif not stale:
+            token = cache.get(self._cache_key)
+            if token:
+                return token
+        return cache.get_or_refresh(self._cache_key, self._fetch_access_token, stale=stale)
+
+    def _send(self, send_values):
+        """发送应用消息；缓存的 access_token 被服务端判定无效或过期时刷新后重试一次"""
+        send_msges = bytes(json.dumps(send_values), "utf-8")
+        token = None
+        for attempt in range(2):
+            token = self.get_access_token(stale=token)
+            send_url = f"{self.ORIGIN}/cgi-bin/message/send?access_token={token}"
+            respone = _http("POST", send_url, data=send_msges)
+            respone = respone.json()
+            if respone.get("errcode") not in WECOM_TOKEN_INVALID_CODES:
+                break
+        return respone["errmsg"]
 
     def send_text(self, message, touser="@all"):
-        send_url = (
-            f"{self.ORIGIN}/cgi-bin/message/send?access_token={self.get_access_token()}"
-        )
         send_values = {
             "touser": touser,
             "msgtype": "text",
@@ -502,15 +1171,9 @@ class WeCom:
             "text": {"content": message},
             "safe": "0",
         }
-        send_msges = bytes(json.dumps(send_values), "utf-8")
-        respone = requests.post(send_url, send_msges)
-        respone = respone.json()
-        return respone["errmsg"]
+        return self._send(send_values)
 
     def send_mpnews(self, title, message, media_id, touser="@all"):
-        send_url = (
-            f"{self.ORIGIN}/cgi-bin/message/send?access_token={self.get_access_token()}"
-        )
         send_values = {
             "touser": touser,
             "msgtype": "mpnews",
@@ -528,223 +1191,234 @@ class WeCom:
                 ]
             },
         }
-        send_msges = bytes(json.dumps(send_values), "utf-8")
-        respone = requests.post(send_url, send_msges)
-        respone = respone.json()
-        return respone["errmsg"]
+        return self._send(send_values)
 
 
-def wecom_bot(title: str, content: str) -> None:
+@channel("QYWX_KEY", optional=("QYWX_ORIGIN",))
+def wecom_bot(title: str, content: str, options: ChannelOptions) -> bool:
     """
     通过 企业微信机器人 推送消息。
     """
-    if not push_config.get("QYWX_KEY"):
+    if not options.QYWX_KEY:
         print("企业微信机器人 服务的 QYWX_KEY 未设置!!\n取消推送")
-        return
+        return False
     print("企业微信机器人服务启动")
 
     origin = "https://qyapi.weixin.qq.com"
-    if push_config.get("QYWX_ORIGIN"):
-        origin = push_config.get("QYWX_ORIGIN")
+    if options.QYWX_ORIGIN:
+        origin = options.QYWX_ORIGIN
 
-    url = f"{origin}/cgi-bin/webhook/send?key={push_config.get('QYWX_KEY')}"
+    url = f"{origin}/cgi-bin/webhook/send?key={options.QYWX_KEY}"
     headers = {"Content-Type": "application/json;charset=utf-8"}
     data = {"msgtype": "text", "text": {"content": f"{title}\n\n{content}"}}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
-    ).json()
+    response = _http("POST", url=url, data=json.dumps(data), headers=headers).json()
 
     if response["errcode"] == 0:
         print("企业微信机器人推送成功！")
+        return True
     else:
         print("企业微信机器人推送失败！")
+        return False
 
 
-def telegram_bot(title: str, content: str) -> None:
+@channel("TG_BOT_TOKEN", "TG_USER_ID",
+         optional=("TG_API_HOST", "TG_THREAD_ID", "TG_PROXY_HOST", "TG_PROXY_PORT", "TG_PROXY_AUTH"))
+def telegram_bot(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 telegram 机器人 推送消息。
     """
-    if not push_config.get("TG_BOT_TOKEN") or not push_config.get("TG_USER_ID"):
+    if not options.TG_BOT_TOKEN or not options.TG_USER_ID:
         print("tg 服务的 bot_token 或者 user_id 未设置!!\n取消推送")
-        return
+        return False
     print("tg 服务启动")
 
-    if push_config.get("TG_API_HOST"):
-        url = f"{push_config.get('TG_API_HOST')}/bot{push_config.get('TG_BOT_TOKEN')}/sendMessage"
+    if options.TG_API_HOST:
+        url = f"{options.TG_API_HOST}/bot{options.TG_BOT_TOKEN}/sendMessage"
     else:
         url = (
-            f"https://api.telegram.org/bot{push_config.get('TG_BOT_TOKEN')}/sendMessage"
+            f"https://api.telegram.org/bot{options.TG_BOT_TOKEN}/sendMessage"
         )
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
     payload = {
-        "chat_id": str(push_config.get("TG_USER_ID")),
-        "message_thread_id": str(push_config.get("TG_THREAD_ID")),
+        "chat_id": str(options.TG_USER_ID),
+        "message_thread_id": str(options.TG_THREAD_ID),
         "text": f"{title}\n\n{content}",
         "disable_web_page_preview": "true",
     }
     proxies = None
-    if push_config.get("TG_PROXY_HOST") and push_config.get("TG_PROXY_PORT"):
-        if push_config.get("TG_PROXY_AUTH") is not None and "@" not in push_config.get(
-            "TG_PROXY_HOST"
-        ):
-            push_config["TG_PROXY_HOST"] = (
-                push_config.get("TG_PROXY_AUTH")
-                + "@"
-                + push_config.get("TG_PROXY_HOST")
-            )
-        proxyStr = "http://{}:{}".format(
-            push_config.get("TG_PROXY_HOST"), push_config.get("TG_PROXY_PORT")
-        )
+    if options.TG_PROXY_HOST and options.TG_PROXY_PORT:
+        proxy_host = options.TG_PROXY_HOST
+        if options.TG_PROXY_AUTH is not None and "@" not in proxy_host:
+            proxy_host = options.TG_PROXY_AUTH + "@" + proxy_host
+        proxyStr = "http://{}:{}".format(proxy_host, options.TG_PROXY_PORT)
         proxies = {"http": proxyStr, "https": proxyStr}
-    response = requests.post(
-        url=url, headers=headers, params=payload, proxies=proxies
-    ).json()
+    response = _http("POST", url=url, headers=headers, params=payload, proxies=proxies).json()
 
     if response["ok"]:
         print("tg 推送成功！")
+        return True
     else:
         print("tg 推送失败！")
+        return False
 
 
-def aibotk(title: str, content: str) -> None:
+@channel("AIBOTK_KEY", "AIBOTK_TYPE", "AIBOTK_NAME")
+def aibotk(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 智能微秘书 推送消息。
     """
     if (
-        not push_config.get("AIBOTK_KEY")
-        or not push_config.get("AIBOTK_TYPE")
-        or not push_config.get("AIBOTK_NAME")
+        not options.AIBOTK_KEY
+        or not options.AIBOTK_TYPE
+        or not options.AIBOTK_NAME
     ):
         print(
             "智能微秘书 的 AIBOTK_KEY 或者 AIBOTK_TYPE 或者 AIBOTK_NAME 未设置!!\n取消推送"
         )
-        return
+        return False
     print("智能微秘书 服务启动")
 
-    if push_config.get("AIBOTK_TYPE") == "room":
+    if options.AIBOTK_TYPE == "room":
         url = "https://api-bot.aibotk.com/openapi/v1/chat/room"
         data = {
-            "apiKey": push_config.get("AIBOTK_KEY"),
-            "roomName": push_config.get("AIBOTK_NAME"),
+            "apiKey": options.AIBOTK_KEY,
+            "roomName": options.AIBOTK_NAME,
             "message": {"type": 1, "content": f"【青龙快讯】\n\n{title}\n{content}"},
         }
     else:
         url = "https://api-bot.aibotk.com/openapi/v1/chat/contact"
         data = {
-            "apiKey": push_config.get("AIBOTK_KEY"),
-            "name": push_config.get("AIBOTK_NAME"),
+            "apiKey": options.AIBOTK_KEY,
+            "name": options.AIBOTK_NAME,
             "message": {"type": 1, "content": f"【青龙快讯】\n\n{title}\n{content}"},
         }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = _http("POST", url=url, data=body, headers=headers).json()
     print(response)
     if response["code"] == 0:
         print("智能微秘书 推送成功！")
+        return True
     else:
         print(f'智能微秘书 推送失败！{response["error"]}')
+        return False
 
 
-def smtp(title: str, content: str) -> None:
+@channel("SMTP_SERVER", "SMTP_SSL", "SMTP_EMAIL", "SMTP_PASSWORD", "SMTP_NAME")
+def smtp(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 SMTP 邮件 推送消息。
     """
     if (
-        not push_config.get("SMTP_SERVER")
-        or not push_config.get("SMTP_SSL")
-        or not push_config.get("SMTP_EMAIL")
-        or not push_config.get("SMTP_PASSWORD")
-        or not push_config.get("SMTP_NAME")
+        not options.SMTP_SERVER
+        or not options.SMTP_SSL
+        or not options.SMTP_EMAIL
+        or not options.SMTP_PASSWORD
+        or not options.SMTP_NAME
     ):
         print(
             "SMTP 邮件 的 SMTP_SERVER 或者 SMTP_SSL 或者 SMTP_EMAIL 或者 SMTP_PASSWORD 或者 SMTP_NAME 未设置!!\n取消推送"
         )
-        return
+        return False
     print("SMTP 邮件 服务启动")
 
+    # 仅在启用 SMTP 时才加载邮件相关模块（python -X importtime 实测：requests 已加载 email 基础模块后仍省约 7ms，
+    # notify 导入总计约 140ms，其中 requests 约 105ms）
+    import smtplib
+    from email.header import Header
+    from email.mime.text import MIMEText
+    from email.utils import formataddr
+
     message = MIMEText(content, "plain", "utf-8")
     message["From"] = formataddr(
         (
-            Header(push_config.get("SMTP_NAME"), "utf-8").encode(),
-            push_config.get("SMTP_EMAIL"),
+            Header(options.SMTP_NAME, "utf-8").encode(),
+            options.SMTP_EMAIL,
         )
     )
     message["To"] = formataddr(
         (
-            Header(push_config.get("SMTP_NAME"), "utf-8").encode(),
-            push_config.get("SMTP_EMAIL"),
+            Header(options.SMTP_NAME, "utf-8").encode(),
+            options.SMTP_EMAIL,
         )
     )
     message["Subject"] = Header(title, "utf-8")
 
     try:
         smtp_server = (
-            smtplib.SMTP_SSL(push_config.get("SMTP_SERVER"))
-            if push_config.get("SMTP_SSL") == "true"
-            else smtplib.SMTP(push_config.get("SMTP_SERVER"))
+            smtplib.SMTP_SSL(options.SMTP_SERVER, timeout=_current_timeout())
+            if options.SMTP_SSL == "true"
+            else smtplib.SMTP(options.SMTP_SERVER, timeout=_current_timeout())
         )
         smtp_server.login(
-            push_config.get("SMTP_EMAIL"), push_config.get("SMTP_PASSWORD")
+            options.SMTP_EMAIL, options.SMTP_PASSWORD
         )
         smtp_server.sendmail(
-            push_config.get("SMTP_EMAIL"),
-            push_config.get("SMTP_EMAIL"),
+            options.SMTP_EMAIL,
+            options.SMTP_EMAIL,
             message.as_bytes(),
         )
         smtp_server.close()
         print("SMTP 邮件 推送成功！")
+        return True
     except Exception as e:
         print(f"SMTP 邮件 推送失败！{e}")
+        return False
 
 
-def pushme(title: str, content: str) -> None:
+@channel("PUSHME_KEY", optional=("PUSHME_URL", "date", "type"))
+def pushme(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 PushMe 推送消息。
     """
-    if not push_config.get("PUSHME_KEY"):
+    if not options.PUSHME_KEY:
         print("PushMe 服务的 PUSHME_KEY 未设置!!\n取消推送")
-        return
+        return False
     print("PushMe 服务启动")
 
-    url = push_config.get("PUSHME_URL") if push_config.get("PUSHME_URL") else "https://push.i-i.me/"
+    url = options.PUSHME_URL if options.PUSHME_URL else "https://push.i-i.me/"
     data = {
-        "push_key": push_config.get("PUSHME_KEY"),
+        "push_key": options.PUSHME_KEY,
         "title": title,
         "content": content,
-        "date": push_config.get("date") if push_config.get("date") else "",
-        "type": push_config.get("type") if push_config.get("type") else "",
+        "date": options.date if options.date else "",
+        "type": options.type if options.type else "",
     }
-    response = requests.post(url, data=data)
+    response = _http("POST", url, data=data)
 
     if response.status_code == 200 and response.text == "success":
         print("PushMe 推送成功！")
+        return True
     else:
         print(f"PushMe 推送失败！{response.status_code} {response.text}")
+        return False
 
 
-def chronocat(title: str, content: str) -> None:
+@channel("CHRONOCAT_URL", "CHRONOCAT_QQ", "CHRONOCAT_TOKEN", validate=_check_url("CHRONOCAT_URL"))
+def chronocat(title: str, content: str, options: ChannelOptions) -> bool:
     """
     使用 CHRONOCAT 推送消息。
     """
     if (
-        not push_config.get("CHRONOCAT_URL")
-        or not push_config.get("CHRONOCAT_QQ")
-        or not push_config.get("CHRONOCAT_TOKEN")
+        not options.CHRONOCAT_URL
+        or not options.CHRONOCAT_QQ
+        or not options.CHRONOCAT_TOKEN
     ):
         print("CHRONOCAT 服务的 CHRONOCAT_URL 或 CHRONOCAT_QQ 未设置!!\n取消推送")
-        return
+        return False
 
     print("CHRONOCAT 服务启动")
 
-    user_ids = re.findall(r"user_id=(\d+)", push_config.get("CHRONOCAT_QQ"))
-    group_ids = re.findall(r"group_id=(\d+)", push_config.get("CHRONOCAT_QQ"))
+    user_ids = re.findall(r"user_id=(\d+)", options.CHRONOCAT_QQ)
+    group_ids = re.findall(r"group_id=(\d+)", options.CHRONOCAT_QQ)
 
-    url = f'{push_config.get("CHRONOCAT_URL")}/api/message/send'
+    url = f'{options.CHRONOCAT_URL}/api/message/send'
     headers = {
         "Content-Type": "application/json",
-        "Authorization": f'Bearer {push_config.get("CHRONOCAT_TOKEN")}',
+        "Authorization": f'Bearer {options.CHRONOCAT_TOKEN}',
     }
 
+    ok = True
     for chat_type, ids in [(1, user_ids), (2, group_ids)]:
         if not ids:
             continue
@@ -758,17 +1432,19 @@ def chronocat(title: str, content: str) -> None:
                     }
                 ],
             }
-            response = requests.post(url, headers=headers, data=json.dumps(data))
+            response = _http("POST", url, headers=headers, data=json.dumps(data))
             if response.status_code == 200:
                 if chat_type == 1:
                     print(f"QQ个人消息:{ids}推送成功！")
                 else:
                     print(f"QQ群消息:{ids}推送成功！")
             else:
+                ok = False
                 if chat_type == 1:
                     print(f"QQ个人消息:{ids}推送失败！")
                 else:
                     print(f"QQ群消息:{ids}推送失败！")
+    return ok
 
 
 def parse_headers(headers):
@@ -822,25 +1498,26 @@ def parse_body(body, content_type, value_format_fn=None):
     return parsed
 
 
-def custom_notify(title: str, content: str) -> None:
+@channel("WEBHOOK_URL", "WEBHOOK_METHOD", optional=("WEBHOOK_CONTENT_TYPE", "WEBHOOK_BODY", "WEBHOOK_HEADERS"))
+def custom_notify(title: str, content: str, options: ChannelOptions) -> bool:
     """
     通过 自定义通知 推送消息。
     """
-    if not push_config.get("WEBHOOK_URL") or not push_config.get("WEBHOOK_METHOD"):
+    if not options.WEBHOOK_URL or not options.WEBHOOK_METHOD:
         print("自定义通知的 WEBHOOK_URL 或 WEBHOOK_METHOD 未设置!!\n取消推送")
-        return
+        return False
 
     print("自定义通知服务启动")
 
-    WEBHOOK_URL = push_config.get("WEBHOOK_URL")
-    WEBHOOK_METHOD = push_config.get("WEBHOOK_METHOD")
-    WEBHOOK_CONTENT_TYPE = push_config.get("WEBHOOK_CONTENT_TYPE")
-    WEBHOOK_BODY = push_config.get("WEBHOOK_BODY")
-    WEBHOOK_HEADERS = push_config.get("WEBHOOK_HEADERS")
+    WEBHOOK_URL = options.WEBHOOK_URL
+    WEBHOOK_METHOD = options.WEBHOOK_METHOD
+    WEBHOOK_CONTENT_TYPE = options.WEBHOOK_CONTENT_TYPE
+    WEBHOOK_BODY = options.WEBHOOK_BODY
+    WEBHOOK_HEADERS = options.WEBHOOK_HEADERS
 
     if "$title" not in WEBHOOK_URL and "$title" not in WEBHOOK_BODY:
         print("请求头或者请求体中必须包含 $title 和 $content")
-        return
+        return False
 
     headers = parse_headers(WEBHOOK_HEADERS)
     body = parse_body(
@@ -851,14 +1528,16 @@ def custom_notify(title: str, content: str) -> None:
     formatted_url = WEBHOOK_URL.replace(
         "$title", urllib.parse.quote_plus(title)
     ).replace("$content", urllib.parse.quote_plus(content))
-    response = requests.request(
-        method=WEBHOOK_METHOD, url=formatted_url, headers=headers, timeout=15, data=body
+    response = _http(
+        method=WEBHOOK_METHOD, url=formatted_url, headers=headers, data=body
     )
 
     if response.status_code == 200:
         print("自定义通知推送成功！")
+        return True
     else:
         print(f"自定义通知推送失败！{response.status_code} {response.text}")
+        return False
 
 
 def one() -> str:
@@ -867,79 +1546,446 @@ def one() -> str:
     :return:
     """
     url = "https://v1.hitokoto.cn/"
-    res = requests.get(url).json()
+    res = _http("GET", url, timeout=5).json()
     return res["hitokoto"] + "    ----" + res["from"]
 
 
-def add_notify_function():
-    notify_function = []
-    if push_config.get("BARK_PUSH"):
-        notify_function.append(bark)
-    if push_config.get("CONSOLE"):
-        notify_function.append(console)
-    if push_config.get("DD_BOT_TOKEN") and push_config.get("DD_BOT_SECRET"):
-        notify_function.append(dingding_bot)
-    if push_config.get("FSKEY"):
-        notify_function.append(feishu_bot)
-    if push_config.get("GOBOT_URL") and push_config.get("GOBOT_QQ"):
-        notify_function.append(go_cqhttp)
-    if push_config.get("GOTIFY_URL") and push_config.get("GOTIFY_TOKEN"):
-        notify_function.append(gotify)
-    if push_config.get("IGOT_PUSH_KEY"):
-        notify_function.append(iGot)
-    if push_config.get("PUSH_KEY"):
-        notify_function.append(serverJ)
-    if push_config.get("DEER_KEY"):
-        notify_function.append(pushdeer)
-    if push_config.get("CHAT_URL") and push_config.get("CHAT_TOKEN"):
-        notify_function.append(chat)
-    if push_config.get("PUSH_PLUS_TOKEN"):
-        notify_function.append(pushplus_bot)
-    if push_config.get("WE_PLUS_BOT_TOKEN"):
-        notify_function.append(weplus_bot)
-    if push_config.get("QMSG_KEY") and push_config.get("QMSG_TYPE"):
-        notify_function.append(qmsg_bot)
-    if push_config.get("QYWX_AM"):
-        notify_function.append(wecom_app)
-    if push_config.get("QYWX_KEY"):
-        notify_function.append(wecom_bot)
-    if push_config.get("TG_BOT_TOKEN") and push_config.get("TG_USER_ID"):
-        notify_function.append(telegram_bot)
-    if (
-        push_config.get("AIBOTK_KEY")
-        and push_config.get("AIBOTK_TYPE")
-        and push_config.get("AIBOTK_NAME")
-    ):
-        notify_function.append(aibotk)
-    if (
-        push_config.get("SMTP_SERVER")
-        and push_config.get("SMTP_SSL")
-        and push_config.get("SMTP_EMAIL")
-        and push_config.get("SMTP_PASSWORD")
-        and push_config.get("SMTP_NAME")
-    ):
-        notify_function.append(smtp)
-    if push_config.get("PUSHME_KEY"):
-        notify_function.append(pushme)
-    if (
-        push_config.get("CHRONOCAT_URL")
-        and push_config.get("CHRONOCAT_QQ")
-        and push_config.get("CHRONOCAT_TOKEN")
-    ):
-        notify_function.append(chronocat)
-    if push_config.get("WEBHOOK_URL") and push_config.get("WEBHOOK_METHOD"):
-        notify_function.append(custom_notify)
+# 接口不可用且缓存池为空时使用的离线一言
+OFFLINE_HITOKOTO = [
+    "路漫漫其修远兮，吾将上下而求索。    ----离骚",
+    "不积跬步，无以至千里；不积小流，无以成江海。    ----劝学",
+    "千里之行，始于足下。    ----道德经",
+    "长风破浪会有时，直挂云帆济沧海。    ----行路难",
+    "纸上得来终觉浅，绝知此事要躬行。    ----冬夜读书示子聿",
+    "山重水复疑无路，柳暗花明又一村。    ----游山西村",
+    "业精于勤，荒于嬉；行成于思，毁于随。    ----进学解",
+    "莫等闲，白了少年头，空悲切。    ----满江红",
+]
 
-    if not notify_function:
+
+class HitokotoPool:
+    """
+    一言缓存池
+
+    说明：
+    - take() 只从本地缓存取一条（取出即移除），从不发起网络请求；池空时返回离线一言。
+    - 剩余数量低于容量一半时，在后台线程批量拉取补满并写回文件，供本次和后续运行使用。
+    - 超过 HITOKOTO_TTL 的条目视为过期，取用时丢弃。
+    """
+
+    def __init__(self, path: str, size: int, ttl: float):
+        self.path = path
+        self.size = max(1, size)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._quotes = self._load()
+
+    def _load(self) -> list:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return [q for q in json.load(f).get("quotes", []) if q.get("text")]
+        except Exception:
+            return []
+
+    def _save(self):
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"quotes": self._quotes}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"保存一言缓存失败: {e}")
+
+    def take(self) -> str:
+        now = time.time()
+        with self._lock:
+            fresh = [q for q in self._quotes if now - q.get("fetched_at", 0) < self.ttl]
+            text = fresh.pop(0)["text"] if fresh else None
+            changed = len(fresh) != len(self._quotes)
+            self._quotes = fresh
+            if changed:
+                self._save()
+            low = len(fresh) < (self.size + 1) // 2
+        if low:
+            self.refill_async()
+        return text or random.choice(OFFLINE_HITOKOTO)
+
+    def refill(self):
+        """同步批量补满缓存池（接口异常时提前结束）"""
+        with self._lock:
+            missing = self.size - len(self._quotes)
+        fetched = []
+        for _ in range(max(0, missing)):
+            try:
+                fetched.append({"text": one(), "fetched_at": time.time()})
+            except Exception as e:
+                print(f"补充一言缓存失败: {e}")
+                break
+        if fetched:
+            with self._lock:
+                self._quotes.extend(fetched)
+                self._save()
+
+    def refill_async(self):
+        with self._lock:
+            if self._refilling:
+                return
+            self._refilling = True
+
+        def run():
+            try:
+                self.refill()
+            finally:
+                with self._lock:
+                    self._refilling = False
+
+        threading.Thread(target=run, name="hitokoto-refill", daemon=True).start()
+
+
+_hitokoto_pool = None
+
+
+def hitokoto() -> str:
+    """从缓存池取一条一言（不阻塞）"""
+    global _hitokoto_pool
+    if _hitokoto_pool is None:
+        _hitokoto_pool = HitokotoPool(
+            push_config.get("HITOKOTO_POOL_PATH") or "./cookie/hitokoto_pool.json",
+            int(_config_float("HITOKOTO_POOL_SIZE", 10)),
+            _config_float("HITOKOTO_TTL", 86400),
+        )
+    return _hitokoto_pool.take()
+
+
+def add_notify_function(quiet: bool = False):
+    notify_function = [c.func for c in enabled_channels()]
+    if not notify_function and not quiet:
         print(f"无推送渠道，请检查通知变量是否正确")
     return notify_function
 
 
-def send(title: str, content: str, ignore_default_config: bool = False, **kwargs):
+# ---------------- 消息长度限制与拆分 ----------------
+# 渠道函数名 -> (上限, 计量方式)；计量包含渠道拼接的 "标题\n\n内容"
+CHANNEL_LIMITS = {
+    "telegram_bot": (4096, "utf16"),    # Telegram sendMessage 文本上限 4096 字符（UTF-16 码元）
+    "wecom_bot": (2048, "utf8"),        # 企业微信机器人 text.content 上限 2048 字节
+    "dingding_bot": (20000, "utf8"),    # 钉钉机器人 text 消息上限 20000 字节
+}
+
+
+def _measure(text: str, unit: str) -> int:
+    if unit == "utf8":
+        return len(text.encode("utf-8"))
+    if unit == "utf16":
+        return len(text.encode("utf-16-le")) // 2
+    return len(text)
+
+
+def _hard_split(text: str, budget: int, unit: str) -> list:
+    """把超长的单段按行（必要时按字符）切开"""
+    pieces, current = [], ""
+    for line in text.splitlines(keepends=True):
+        while _measure(line, unit) > budget:
+            # 二分查找不超过 budget 的最长前缀
+            low, high = 1, len(line)
+            while low < high:
+                mid = (low + high + 1) // 2
+                if _measure(line[:mid], unit) <= budget:
+                    low = mid
+                else:
+                    high = mid - 1
+            cut = low
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:cut])
+            line = line[cut:]
+        if current and _measure(current + line, unit) > budget:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_message(title: str, content: str, limit: tuple = None, sep: str = "\n\n") -> list:
+    """
+    按渠道上限拆分消息，返回 [(title, content), ...]。
+    优先在段落（sep）边界拆分，分片标题追加 (i/n)。
+    """
+    if not limit:
+        return [(title, content)]
+    max_size, unit = limit
+    if _measure(f"{title}\n\n{content}", unit) <= max_size:
+        return [(title, content)]
+
+    # 预留分片标题后缀 " (n/n)" 与标题分隔符；分片数超出预留位数时按更多位数重新拆分
+    digits = 2
+    while True:
+        suffix = " ({0}/{0})".format("9" * digits)
+        budget = max(16, max_size - _measure(f"{title}{suffix}\n\n", unit))
+        chunks, current = [], ""
+        for section in content.split(sep):
+            parts = [section] if _measure(section, unit) <= budget else _hard_split(section, budget, unit)
+            for part in parts:
+                candidate = f"{current}{sep}{part}" if current else part
+                if current and _measure(candidate, unit) > budget:
+                    chunks.append(current)
+                    current = part
+                else:
+                    current = candidate
+        if current:
+            chunks.append(current)
+        if len(chunks) < 10 ** digits:
+            break
+        digits += 1
+    total = len(chunks)
+    return [(f"{title} ({i}/{total})", chunk) for i, chunk in enumerate(chunks, 1)]
+
+
+def deliver(notify_function, title: str, content: str, resume: dict = None) -> dict:
+    """
+    按渠道上限拆分后分发，结果按渠道合并。
+    第 i 轮同时发送各渠道的第 i 个分片：不同渠道之间并发，同一渠道的分片按顺序发送，某一分片失败后不再发送该渠道的后续分片。
+    resume 为 {渠道函数名: 已成功的分片数}，从下一个分片继续（发件箱重试用）；结果中的 parts_sent 为累计成功的分片数。
+    """
+    resume = resume or {}
+    splits = {}
+    plans = {}
+    for func in notify_function:
+        limit = CHANNEL_LIMITS.get(func.__name__)
+        if limit not in splits:
+            splits[limit] = split_message(title, content, limit)
+        plans[func] = splits[limit]
+
+    results = {}
+    failed = set()
+    rounds = max((len(parts) for parts in plans.values()), default=0)
+    for index in range(rounds):
+        funcs = [func for func, parts in plans.items()
+                 if resume.get(func.__name__, 0) <= index < len(parts) and func.__name__ not in failed]
+        if not funcs:
+            continue
+        parts = {func.__name__: plans[func][index] for func in funcs}
+        for name, result in dispatch(funcs, title, content, parts=parts).items():
+            if not result["ok"]:
+                failed.add(name)
+            merged = results.get(name)
+            if merged is None:
+                results[name] = dict(result, parts=1, parts_sent=resume.get(name, 0) + int(result["ok"]))
+            else:
+                merged["ok"] = merged["ok"] and result["ok"]
+                merged["latency_ms"] = round(merged["latency_ms"] + result["latency_ms"], 1)
+                merged["error"] = merged["error"] or result["error"]
+                merged["wait_ms"] = round(merged.get("wait_ms", 0) + result.get("wait_ms", 0), 1)
+                merged["parts"] += 1
+                merged["parts_sent"] += int(result["ok"])
+    return results
+
+
+# ---------------- 消息路由 ----------------
+SEVERITIES = ("success", "info", "failure")    # 按严重程度递增
+_FAILURE_WORDS = ("失败", "异常", "错误", "无效")
+
+
+def infer_severity(title: str) -> str:
+    """未显式指定级别时按标题推断：含失败/异常等字样为 failure，含成功为 success，否则为 info"""
+    if any(word in title for word in _FAILURE_WORDS):
+        return "failure"
+    if "成功" in title:
+        return "success"
+    return "info"
+
+
+def title_route(title: str) -> Optional[str]:
+    """
+    按标题查找路由，返回渠道链；"skip" 表示不推送，None 表示按级别路由。
+    SKIP_PUSH_TITLE 中的标题等同于路由到 skip。
+    """
+    skip_title = os.getenv("SKIP_PUSH_TITLE")
+    if skip_title and title in re.split("\n", skip_title):
+        return "skip"
+    for line in re.split(r"[\n;]", str(push_config.get("NOTIFY_TITLE_ROUTES") or "")):
+        if "=" not in line:
+            continue
+        pattern, chain = (x.strip() for x in line.rsplit("=", 1))
+        if pattern and fnmatch.fnmatchcase(title, pattern):
+            return chain or None
+    return None
+
+
+def route_chain(severity: str, route: Optional[str] = None) -> str:
+    if route:
+        return route
+    return str(push_config.get(f"NOTIFY_ROUTE_{severity.upper()}") or "")
+
+
+def plan_route(notify_function, chain: str) -> List[list]:
+    """
+    把渠道链展开为按顺序尝试的步骤，每步是一组同时推送的渠道函数。
+    链为空或 * 时只有一步（全部渠道）；未启用的渠道被忽略，链中没有可用渠道时退回全部渠道。
+    """
+    chain = (chain or "").strip()
+    if not chain or chain == "*":
+        return [list(notify_function)] if notify_function else []
+    by_name = {func.__name__: func for func in notify_function}
+    used, steps = set(), []
+    for step in chain.split(","):
+        funcs = []
+        for name in (x.strip() for x in step.split("+")):
+            if name == "*":
+                funcs.extend(f for n, f in by_name.items() if n not in used and f not in funcs)
+            elif name in by_name and name not in used and by_name[name] not in funcs:
+                funcs.append(by_name[name])
+        used.update(func.__name__ for func in funcs)
+        if funcs:
+            steps.append(funcs)
+    if not steps and notify_function:
+        print(f"渠道链 '{chain}' 中没有已启用的渠道，改为推送到全部渠道")
+        return [list(notify_function)]
+    return steps
+
+
+def format_steps(steps: List[list]) -> str:
+    return ",".join("+".join(func.__name__ for func in step) for step in steps)
+
+
+def deliver_routed(steps: List[list], title: str, content: str) -> dict:
+    """按步骤推送：某一步至少一个渠道成功即停止，全部失败或超时才尝试下一步"""
+    results = {}
+    for index, step in enumerate(steps):
+        step_results = deliver(step, title, content)
+        results.update(step_results)
+        if any(r["ok"] for r in step_results.values()):
+            break
+        if index + 1 < len(steps):
+            print(f"{format_steps([step])} 推送失败，切换到备用渠道 {format_steps(steps[index + 1:index + 2])}")
+    return results
+
+
+# ---------------- 摘要模式 ----------------
+class Digest:
+    """
+    一次运行内缓存的消息，flush 时合并为一条（超出渠道上限时自动拆分）
+    按标题路由到特定渠道链的消息单独成组；其余消息合并，级别取其中最严重的一条
+    """
+
+    def __init__(self, title: str):
+        self.title = title
+        self.entries = []
+
+    def add(self, title: str, content: str, severity: str = "info", route: Optional[str] = None):
+        self.entries.append((title, content, severity, route))
+
+    def groups(self) -> List[tuple]:
+        """返回 [(标题, 内容, 级别, 路由), ...]，每组推送一次"""
+        grouped = {}
+        for entry in self.entries:
+            grouped.setdefault(entry[3], []).append(entry)
+        result = []
+        for route, entries in grouped.items():
+            title = self.title
+            if len(entries) > 1:
+                title = f"{title}（{len(entries)} 条）"
+            severity = max((e[2] for e in entries), key=SEVERITIES.index)
+            result.append((title, self.render(entries), severity, route))
+        return result
+
+    def render(self, entries: list = None) -> str:
+        sections = []
+        for title, content, *_ in (self.entries if entries is None else entries):
+            sections.append(content if title == self.title else f"【{title}】\n{content}")
+        return "\n\n".join(sections)
+
+
+_digest = None
+_digest_lock = threading.Lock()
+
+
+def start_digest(title: str) -> bool:
+    """开始缓存消息（NOTIFY_DIGEST=false 时不生效），之后的 send 只入缓存，直到 flush_digest"""
+    global _digest
+    if str(push_config.get("NOTIFY_DIGEST")).lower() != "true":
+        return False
+    with _digest_lock:
+        if _digest is None:
+            _digest = Digest(title)
+    return True
+
+
+def flush_digest() -> dict:
+    """结束缓存并把已缓存的消息合并推送，返回各渠道结果"""
+    global _digest
+    with _digest_lock:
+        current, _digest = _digest, None
+    if current is None or not current.entries:
+        return {}
+    results = {}
+    for title, content, severity, route in current.groups():
+        results.update(_send_now(title, content, severity=severity, route=route))
+    return results
+
+
+@contextmanager
+def digest(title: str):
+    """
+    with digest("NodeSeek 签到"):
+        send(...)  # 仅缓存
+    # 退出时每个渠道推送一次合并后的消息
+    """
+    started = start_digest(title)
+    try:
+        yield
+    finally:
+        if started:
+            flush_digest()
+
+
+def _send_now(title: str, content: str, idempotency_key: str = None, severity: str = "info",
+              route: Optional[str] = None) -> dict:
+    notify_function = add_notify_function()
+    if not notify_function:
+        return {}
+    steps = plan_route(notify_function, route_chain(severity, route))
+
+    # 幂等键按追加一言之前的内容计算，同一条通知重复发送时键保持不变
+    outbox = None
+    try:
+        from notify_outbox import get_outbox, make_idempotency_key
+
+        outbox = get_outbox()
+    except ImportError:
+        pass
+    if outbox is not None:
+        idempotency_key = idempotency_key or make_idempotency_key(title, content)
+
+    if push_config.get("HITOKOTO"):
+        content += "\n\n" + hitokoto()
+
+    if outbox is not None:
+        queued = outbox.enqueue(title, content, [func.__name__ for func in steps[0]], idempotency_key,
+                                fallback=format_steps(steps[1:]))
+        outbox.start_drainer()
+        backup = f"，备用: {format_steps(steps[1:])}" if len(steps) > 1 else ""
+        print(f"通知已写入发件箱，后台投递渠道: {', '.join(queued)}{backup}")
+        return {name: {"ok": None, "queued": is_new} for name, is_new in queued.items()}
+    return deliver_routed(steps, title, content)
+
+
+def send(title: str, content: str, ignore_default_config: bool = False, idempotency_key: str = None,
+         severity: str = None, **kwargs):
+    """
+    推送通知。severity 为 success/info/failure，未指定时按标题推断，用于选择 NOTIFY_ROUTE_<级别> 渠道链；
+    NOTIFY_TITLE_ROUTES 中匹配标题的路由优先。
+    """
     if kwargs:
         global push_config
         if ignore_default_config:
-            push_config = kwargs  # 清空从环境变量获取的配置
+            push_config = PushConfig(kwargs)  # 清空从环境变量获取的配置
         else:
             push_config.update(kwargs)
 
@@ -947,23 +1993,56 @@ def send(title: str, content: str, ignore_default_config: bool = False, **kwargs
         print(f"{title} 推送内容为空！")
         return
 
-    # 根据标题跳过一些消息推送，环境变量：SKIP_PUSH_TITLE 用回车分隔
-    skipTitle = os.getenv("SKIP_PUSH_TITLE")
-    if skipTitle:
-        if title in re.split("\n", skipTitle):
-            print(f"{title} 在SKIP_PUSH_TITLE环境变量内，跳过推送！")
-            return
+    # 根据标题跳过或路由消息，环境变量：SKIP_PUSH_TITLE 用回车分隔，NOTIFY_TITLE_ROUTES 每行 标题=渠道链
+    route = title_route(title)
+    if route == "skip":
+        print(f"{title} 在SKIP_PUSH_TITLE/NOTIFY_TITLE_ROUTES 中设置为跳过，跳过推送！")
+        return
+    if severity not in SEVERITIES:
+        severity = infer_severity(title)
 
-    hitokoto = push_config.get("HITOKOTO")
-    content += "\n\n" + one() if hitokoto else ""
+    # 重复通知抑制：先补发已结束窗口的汇总，再判断本条是否在窗口内重复
+    suppressor = None
+    try:
+        from notify_suppress import applies_to, get_suppressor
 
-    notify_function = add_notify_function()
-    ts = [
-        threading.Thread(target=mode, args=(title, content), name=mode.__name__)
-        for mode in notify_function
-    ]
-    [t.start() for t in ts]
-    [t.join() for t in ts]
+        suppressor = get_suppressor()
+    except ImportError:
+        pass
+    results = flush_suppressed()
+    if suppressor is not None and applies_to(severity) and not suppressor.check(title, content, severity):
+        print(f"{title} 与窗口内已推送的通知重复，仅计数不推送")
+        return results
+
+    results.update(_route_message(title, content, idempotency_key, severity, route))
+    return results
+
+
+def flush_suppressed() -> dict:
+    """补发已结束抑制窗口的“重复 N 次”汇总；send 前以及发件箱后台投递线程中定期调用"""
+    try:
+        from notify_suppress import get_suppressor
+    except ImportError:
+        return {}
+    suppressor = get_suppressor()
+    if suppressor is None:
+        return {}
+    results = {}
+    for original, summary_title, summary, summary_severity in suppressor.pop_closed():
+        results.update(_route_message(summary_title, summary, None, summary_severity, title_route(original)))
+    return results
+
+
+def _route_message(title: str, content: str, idempotency_key: str, severity: str, route: Optional[str]) -> dict:
+    """摘要模式下只入缓存，否则立即推送"""
+    if route == "skip":
+        return {}
+    with _digest_lock:
+        if _digest is not None:
+            _digest.add(title, content, severity, route)
+            return {}
+
+    return _send_now(title, content, idempotency_key, severity, route)
 
 
 def main():
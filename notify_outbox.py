@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+
+import atexit
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+import notify
+
+BACKOFF_BASE = 30.0         # 首次重试等待（秒），之后按 2 的指数增长
+MAX_BACKOFF = 3600.0        # 单次重试最长等待（秒）
+LEASE_SECONDS = 300.0       # 认领后未完成的记录超过该时间视为投递进程已退出，可被重新认领
+SENT_KEEP_DAYS = 7          # 已投递记录保留天数（用于幂等去重）
+IDLE_WAIT = 60.0            # 后台投递线程无到期记录时的最长等待（秒）
+
+# 未经 run_trace.begin_run 标记运行时，以当前进程作为一次运行
+_PROCESS_RUN_ID = uuid.uuid4().hex
+
+OutboxRow = namedtuple("OutboxRow", "id channel title content attempts idem_key fallback parts_sent step_group")
+
+
+def current_run_id() -> str:
+    try:
+        from run_trace import trace
+    except ImportError:
+        return _PROCESS_RUN_ID
+    return trace.run_id or _PROCESS_RUN_ID
+
+
+def make_idempotency_key(title: str, content: str, run_id: Optional[str] = None) -> str:
+    """
+    默认幂等键：同一次运行内标题与内容相同的消息视为同一条通知。
+    不同运行（例如同一天的补签或手动重跑）中内容相同的通知各自投递。
+    """
+    run_id = run_id or current_run_id()
+    return hashlib.sha256(f"{run_id}\0{title}\0{content}".encode("utf-8")).hexdigest()
+
+
+class NotificationOutbox:
+    """
+    通知发件箱（SQLite）
+
+    说明：
+    - send 只把消息按渠道写入发件箱即返回，网络请求由后台线程完成，不占用签到流程时间。
+    - 每个渠道独立记录重试次数，失败后按指数退避重试，超过最大次数进入死信（status='dead'）。
+    - 超出渠道长度上限的消息按分片投递，parts_sent 记录已成功的分片数，重试时从失败的分片继续。
+    - (idem_key, channel) 唯一，重复入队同一条通知不会重复推送。
+    - 投递前先认领（status='sending' + 租约），调度器与任务子进程同时投递时不会重复发送。
+    - 同一步入队的渠道共用一个 step_group，到期的记录按组交给 notify.deliver 并发投递（沿用线程池、截止时间与限速）。
+    - 带备用渠道链（fallback）的记录最多投递 failover_attempts 次（同样按指数退避），用尽后标记为转交（status='failover'）；
+      同组全部渠道都转交后才把备用渠道链的下一步写入发件箱，组内任一渠道成功则不再切换。
+      链上最后一步按上面的规则重试直至死信。
+    """
+
+    def __init__(self, path: str, max_attempts: int = 8, failover_attempts: int = 2):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.failover_attempts = failover_attempts
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idem_key TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                lease_until REAL,
+                last_error TEXT,
+                sent_at REAL,
+                fallback TEXT NOT NULL DEFAULT '',
+                parts_sent INTEGER NOT NULL DEFAULT 0,
+                step_group TEXT NOT NULL DEFAULT '',
+                UNIQUE (idem_key, channel)
+            );
+            CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt);
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        if "fallback" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN fallback TEXT NOT NULL DEFAULT ''")
+        if "parts_sent" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN parts_sent INTEGER NOT NULL DEFAULT 0")
+        if "step_group" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN step_group TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_group ON outbox (step_group)")
+        self._conn.commit()
+        self._wakeup = threading.Event()
+        self._drainer = None
+
+    # ---------------- 入队 ----------------
+    def enqueue(self, title: str, content: str, channels: List[str], idem_key: str,
+                fallback: str = "") -> Dict[str, bool]:
+        """
+        按渠道写入发件箱，返回 {渠道: 是否新入队}（False 表示该幂等键已存在）
+        fallback 为这些渠道失败后依次尝试的备用渠道链（notify.format_steps 格式），这些渠道记为同一组
+        """
+        now = time.time()
+        group = uuid.uuid4().hex
+        result = {}
+        with self._lock:
+            for channel in channels:
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO outbox "
+                    "(idem_key, channel, title, content, created_at, next_attempt, fallback, step_group) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (idem_key, channel, title, content, now, now, fallback, group),
+                )
+                result[channel] = cur.rowcount > 0
+            self._conn.commit()
+        self._wakeup.set()
+        return result
+
+    # ---------------- 投递 ----------------
+    def _claim_due(self, limit: int = 20) -> List[OutboxRow]:
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, channel, title, content, attempts, idem_key, fallback, parts_sent, step_group FROM outbox "
+                "WHERE (status = 'pending' AND next_attempt <= ?) OR (status = 'sending' AND lease_until < ?) "
+                "ORDER BY next_attempt LIMIT ?",
+                (now, now, limit),
+            ).fetchall()
+            claimed = []
+            for row in rows:
+                cur = self._conn.execute(
+                    "UPDATE outbox SET status = 'sending', lease_until = ? "
+                    "WHERE id = ? AND (status = 'pending' OR (status = 'sending' AND lease_until < ?))",
+                    (now + LEASE_SECONDS, row[0], now),
+                )
+                if cur.rowcount:
+                    claimed.append(OutboxRow(*row))
+            self._conn.commit()
+        return claimed
+
+    def _mark_sent(self, row_id: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'sent', sent_at = ?, lease_until = NULL, last_error = NULL WHERE id = ?",
+                (time.time(), row_id),
+            )
+            self._conn.commit()
+
+    def _mark_part_sent(self, row_id: int, parts_sent: int):
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET parts_sent = ? WHERE id = ?", (parts_sent, row_id))
+            self._conn.commit()
+
+    def _mark_failed(self, row: OutboxRow, error: str, functions: Dict, final: bool = False):
+        """
+        记录一次投递失败：未到次数上限时按指数退避重试；
+        带备用渠道链的记录用尽 failover_attempts 次后转交，其余记录用尽 max_attempts 次后转入死信。
+        final 表示无需再重试（渠道已不在推送配置中）。
+        """
+        attempts = row.attempts + 1
+        failover = bool(row.fallback and functions)
+        limit = self.failover_attempts if failover else self.max_attempts
+        if final:
+            attempts = max(attempts, limit)
+        if attempts < limit:
+            delay = min(MAX_BACKOFF, BACKOFF_BASE * (2 ** (attempts - 1))) * random.uniform(0.8, 1.2)
+            status, next_attempt = "pending", time.time() + delay
+            print(f"通知渠道 {row.channel} 投递失败（第 {attempts} 次），{delay:.0f} 秒后重试: {error}")
+        elif failover:
+            status, next_attempt = "failover", time.time()
+        else:
+            status, next_attempt = "dead", time.time()
+            print(f"通知渠道 {row.channel} 连续 {attempts} 次投递失败，已转入死信: {error}")
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, lease_until = NULL, last_error = ? "
+                "WHERE id = ?",
+                (status, attempts, next_attempt, error, row.id),
+            )
+            self._conn.commit()
+        if status == "failover":
+            self._fail_over(row, error, functions)
+
+    def _fail_over(self, row: OutboxRow, error: str, functions: Dict):
+        """同组渠道全部转交后，把备用渠道链的下一步写入发件箱；组内有渠道已成功或仍在重试时不切换"""
+        if row.step_group:
+            with self._lock:
+                states = [state for (state,) in self._conn.execute(
+                    "SELECT status FROM outbox WHERE step_group = ?", (row.step_group,))]
+            if any(state != "failover" for state in states):
+                print(f"通知渠道 {row.channel} 投递失败，同组其他渠道已成功或仍在投递，不切换备用渠道: {error}")
+                return
+        steps = [step.split("+") for step in row.fallback.split(",")]
+        nxt = [name for name in steps[0] if name in functions] or list(functions)
+        rest = ",".join("+".join(step) for step in steps[1:])
+        print(f"通知渠道 {row.channel} 投递失败，切换到备用渠道 {'+'.join(nxt)}: {error}")
+        # 多个进程同时判定整组失败时，(idem_key, channel) 唯一约束保证下一步只入队一次
+        self.enqueue(row.title, row.content, nxt, row.idem_key, fallback=rest)
+
+    def _deliver_batch(self, rows: List[OutboxRow], functions: Dict):
+        """同一条通知的到期记录一起交给 notify.deliver 并发投递；重试时各渠道跳过上次已成功的分片"""
+        known = [row for row in rows if row.channel in functions]
+        results = {}
+        if known:
+            results = notify.deliver([functions[row.channel] for row in known], rows[0].title, rows[0].content,
+                                     resume={row.channel: row.parts_sent for row in known})
+        for row in rows:
+            if row.channel not in functions:
+                self._mark_failed(row, "渠道已不在当前推送配置中", functions, final=True)
+                continue
+            result = results.get(row.channel)
+            if result is None or result["ok"]:   # None: 各分片在之前的投递中均已成功
+                self._mark_sent(row.id)
+                continue
+            if result["parts_sent"] > row.parts_sent:
+                self._mark_part_sent(row.id, result["parts_sent"])
+            self._mark_failed(row, result["error"] or "推送失败", functions)
+
+    def drain_once(self, deadline: Optional[float] = None) -> int:
+        """投递当前所有到期记录，返回本轮处理条数"""
+        functions = {func.__name__: func for func in notify.add_notify_function(quiet=True)}
+        processed = 0
+        while deadline is None or time.time() < deadline:
+            rows = self._claim_due()
+            if not rows:
+                break
+            batches = {}
+            for row in rows:
+                batches.setdefault((row.idem_key, row.title, row.content), []).append(row)
+            for batch in batches.values():
+                self._deliver_batch(batch, functions)
+                processed += len(batch)
+        return processed
+
+    def next_due_in(self) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(CASE WHEN status = 'pending' THEN next_attempt ELSE lease_until END) "
+                "FROM outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()
+        if not row or row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()[0]
+
+    # ---------------- 后台投递线程 ----------------
+    def _drain_loop(self):
+        self.purge()
+        while True:
+            try:
+                # 补发已结束抑制窗口的重复汇总：不必等到下一次有新通知时才推送
+                notify.flush_suppressed()
+            except Exception as e:
+                print(f"补发重复通知汇总失败: {e}")
+            try:
+                self.drain_once()
+            except Exception as e:
+                print(f"通知发件箱投递异常: {e}")
+            wait = self.next_due_in()
+            self._wakeup.wait(IDLE_WAIT if wait is None else min(IDLE_WAIT, max(1.0, wait)))
+            self._wakeup.clear()
+
+    def start_drainer(self):
+        with self._lock:
+            if self._drainer is None or not self._drainer.is_alive():
+                self._drainer = threading.Thread(target=self._drain_loop, name="notify-outbox", daemon=True)
+                self._drainer.start()
+
+    def flush(self, timeout: float):
+        """进程退出前尽量投递已到期的记录；仍在退避中的记录留给调度器的后台线程"""
+        self.drain_once(deadline=time.time() + timeout)
+        remaining = self.pending_count()
+        if remaining:
+            print(f"通知发件箱仍有 {remaining} 条待重试，将由调度器后台继续投递")
+
+    # ---------------- 维护 ----------------
+    def dead_letters(self) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, channel, title, attempts, last_error, created_at FROM outbox WHERE status = 'dead' ORDER BY id"
+            ).fetchall()
+        keys = ("id", "channel", "title", "attempts", "last_error", "created_at")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def requeue_dead(self, channel: Optional[str] = None) -> int:
+        """把死信重新放回待投递队列（可按渠道）"""
+        sql = "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt = ? WHERE status = 'dead'"
+        params = [time.time()]
+        if channel:
+            sql += " AND channel = ?"
+            params.append(channel)
+        with self._lock:
+            count = self._conn.execute(sql, params).rowcount
+            self._conn.commit()
+        self._wakeup.set()
+        return count
+
+    def purge(self, keep_days: int = SENT_KEEP_DAYS):
+        with self._lock:
+            cutoff = time.time() - keep_days * 86400
+            self._conn.execute(
+                "DELETE FROM outbox WHERE (status = 'sent' AND sent_at < ?) OR (status = 'failover' AND created_at < ?)",
+                (cutoff, cutoff),
+            )
+            self._conn.commit()
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Optional[NotificationOutbox]:
+    """按 push_config 打开发件箱；未启用或打开失败时返回 None（退回直接推送）"""
+    global _outbox
+    if str(notify.push_config.get("NOTIFY_OUTBOX")).lower() != "true":
+        return None
+    with _outbox_lock:
+        if _outbox is None:
+            try:
+                max_attempts = int(notify._config_float("NOTIFY_OUTBOX_MAX_ATTEMPTS", 8))
+                failover_attempts = int(notify._config_float("NOTIFY_OUTBOX_FAILOVER_ATTEMPTS", 2))
+                _outbox = NotificationOutbox(notify.push_config.get("NOTIFY_OUTBOX_PATH"), max_attempts,
+                                             failover_attempts)
+                atexit.register(_flush_at_exit)
+            except Exception as e:
+                print(f"通知发件箱不可用，改为直接推送: {e}")
+                _outbox = False
+    return _outbox or None
+
+
+def _flush_at_exit():
+    if _outbox:
+        try:
+            _outbox.flush(notify._config_float("NOTIFY_DEADLINE", 60))
+        except Exception as e:
+            print(f"通知发件箱退出前投递失败: {e}")
+
+
+def start_background_drainer() -> bool:
+    """常驻进程（如 scheduler.py）启动时调用，持续投递包括其他进程遗留的待重试通知"""
+    outbox = get_outbox()
+    if outbox is None:
+        return False
+    outbox.start_drainer()
+    return True
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional, Tuple
+
+import notify
+
+GMT8 = timezone(timedelta(hours=8))
+
+# 模板化比较：数字（时间、次数、状态码等）与连续空白不参与比较
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(title: str, content: str) -> str:
+    """标题与模板化内容的哈希，仅数字或空白不同的消息视为同一条"""
+    normalized = _SPACE_RE.sub(" ", _NUMBER_RE.sub("#", content)).strip()
+    return hashlib.sha256(f"{title}\0{normalized}".encode("utf-8")).hexdigest()[:32]
+
+
+def _fmt(ts: float) -> str:
+    return datetime.fromtimestamp(ts, GMT8).strftime("%Y-%m-%d %H:%M")
+
+
+class SuppressionCache:
+    """
+    重复通知抑制
+
+    说明：
+    - 每条消息按 fingerprint 记录首次出现时间，窗口内再次出现只计数、不推送。
+    - 窗口结束后（下一次 send 或发件箱后台投递线程检查时），若期间有被抑制的重复，补发一条“重复 N 次”的汇总。
+    - 记录写入 JSON 文件，签到/评论子进程与调度器共享，跨运行生效；读改写在线程锁与 notify.file_lock 内完成，
+      多个进程同时推送时计数不会丢失，同一条汇总也只会被一个进程取出。
+    """
+
+    def __init__(self, path: str, window: float):
+        self.path = path
+        self.window = window
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save(self, data: dict):
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"保存重复通知记录失败: {e}")
+
+    def check(self, title: str, content: str, severity: str) -> bool:
+        """返回 True 表示应当推送；窗口内的重复消息只计数并返回 False"""
+        key = fingerprint(title, content)
+        now = time.time()
+        with self._lock, notify.file_lock(self.path):
+            data = self._load()
+            entry = data.get(key)
+            if entry and entry["window_end"] > now:
+                entry["count"] += 1
+                entry["last_seen"] = now
+                self._save(data)
+                return False
+            # 已过期且有重复的旧记录先留给 pop_closed 汇总，新记录使用新窗口
+            if entry and entry["count"] > 1:
+                data[f"{key}:{int(entry['first_seen'])}"] = entry
+            data[key] = {
+                "title": title,
+                "severity": severity,
+                "sample": content,
+                "first_seen": now,
+                "last_seen": now,
+                "window_end": now + self.window,
+                "count": 1,
+            }
+            self._save(data)
+        return True
+
+    def pop_closed(self) -> List[Tuple[str, str, str, str]]:
+        """取出已结束窗口的重复汇总 [(原标题, 汇总标题, 汇总内容, 级别), ...]，并清理过期记录"""
+        now = time.time()
+        summaries = []
+        with self._lock, notify.file_lock(self.path):
+            data = self._load()
+            closed = [k for k, v in data.items() if v["window_end"] <= now]
+            if not closed:
+                return []
+            for key in closed:
+                entry = data.pop(key)
+                if entry["count"] > 1:
+                    summaries.append((
+                        entry["title"],
+                        f"{entry['title']}（重复 {entry['count']} 次）",
+                        f"以下通知在 {_fmt(entry['first_seen'])} 至 {_fmt(entry['last_seen'])} 期间"
+                        f"重复出现 {entry['count']} 次，已省略 {entry['count'] - 1} 次推送：\n\n{entry['sample']}",
+                        entry.get("severity") or "info",
+                    ))
+            self._save(data)
+        return summaries
+
+
+_suppressor = None
+_suppressor_lock = threading.Lock()
+
+
+def get_suppressor() -> Optional[SuppressionCache]:
+    """按 push_config 创建抑制缓存；NOTIFY_SUPPRESS_WINDOW 为 0（默认）时不启用"""
+    global _suppressor
+    window = notify._config_float("NOTIFY_SUPPRESS_WINDOW", 0)
+    if not window:
+        return None
+    with _suppressor_lock:
+        if _suppressor is None or _suppressor.window != window:
+            _suppressor = SuppressionCache(
+                notify.push_config.get("NOTIFY_SUPPRESS_PATH") or "./cookie/notify_suppress.json", window
+            )
+    return _suppressor
+
+
+def applies_to(severity: str) -> bool:
+    levels = str(notify.push_config.get("NOTIFY_SUPPRESS_SEVERITIES") or "")
+    return severity in {x.strip() for x in levels.split(",")}
@@ -0,0 +1,644 @@
+# -*- coding: utf-8 -*-
+
+import codecs
+import os
+import re
+from html import unescape
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# 与 BeautifulSoup get_text() 一致：这些标签内的文本（脚本、样式、模板、注音）不计入正文
+SKIP_TEXT_TAGS = frozenset(("script", "style", "template", "rt", "rp"))
+# html.parser 下 BeautifulSoup 视为空元素、不入栈的标签
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem", "meta",
+    "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame", "image", "isindex",
+    "nextid", "spacer",
+))
+
+_POST_CLASS_RE = re.compile(r"post|content|markdown", re.I)
+_COMMENT_CLASS_RE = re.compile(r"comment|reply|post", re.I)
+_CSRF_META_RE = re.compile(r"csrf", re.I)
+_CSRF_INPUT_RE = re.compile(r"csrf|token", re.I)
+
+BACKENDS = ("selectolax", "lxml", "bs4")
+
+# 分类页帖子链接：/t/12345 或 /post-12345-1，与 get_category_threads 原有规则一致（/t/ 优先）
+_THREAD_T_RE = re.compile(r"/t/(\d+)")
+_THREAD_POST_RE = re.compile(r"/post-(\d+)(?:-[0-9]+)?")
+# 帖子列表容器的起始标签（class 含 post-list，不匹配 post-list-item 等）
+_POST_LIST_RE = re.compile(r"<([a-zA-Z][\w-]*)\b[^>]*?\bclass\s*=\s*[\"']?[^\"'>]*?(?<![\w-])post-list(?![\w-])", re.I)
+_ATTRS = r"((?:[^>\"']|\"[^\"]*\"|'[^']*')*)"
+# 分类页扫描：注释 | script/style 块 | <a ...> 起始标签（group 2 为属性）
+_SCAN_RE = re.compile(rf"<!--.*?(?:-->|$)|<(script|style)\b[^>]*>.*?(?:</\1\s*>|$)|<a\b{_ATTRS}>", re.I | re.S)
+_HREF_RE = re.compile(r"(?<![\w-])href\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s\"'>]+))", re.I)
+_ANCHOR_END_RE = re.compile(r"</a\s*>|<a\b", re.I)
+_INNER_SKIP_RE = re.compile(r"<!--.*?(?:-->|$)|<(script|style|template|rt|rp)\b[^>]*>.*?(?:</\1\s*>|$)", re.I | re.S)
+_TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>|<>")
+
+
+def _join(texts, separator: str = "") -> str:
+    """与 get_text(separator, strip=True) 相同：逐段 strip，丢弃空段后拼接"""
+    return separator.join(t for t in (text.strip() for text in texts) if t)
+
+
+class Bs4Parser:
+    """BeautifulSoup + html.parser：无需额外依赖，作为兜底实现，也是其他后端输出的基准"""
+
+    name = "bs4"
+
+    def __init__(self, features: str = "html.parser"):
+        from bs4 import BeautifulSoup
+
+        self._soup = BeautifulSoup
+        self.features = features
+
+    def parse(self, html: str):
+        return self._soup(html, self.features)
+
+    def links(self, doc) -> List[Tuple[str, str]]:
+        return [(a.get("href", ""), a.get_text(strip=True)) for a in doc.find_all("a", href=True)]
+
+    def title(self, doc) -> str:
+        return doc.title.get_text(strip=True) if doc.title else ""
+
+    def op_summary(self, doc) -> str:
+        main_post = doc.find("div", class_="nsk-post")
+        if main_post:
+            article = main_post.find("article", class_="post-content")
+            if article:
+                text = article.get_text(separator=" ", strip=True)
+                if text:
+                    return text
+        for tag, kw in (("div", {"class": _POST_CLASS_RE}), ("article", {})):
+            el = doc.find(tag, kw)
+            if el:
+                text = el.get_text(" ", strip=True)
+                if text:
+                    return text
+        return ""
+
+    def comment_items(self, doc) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+        for item in doc.select(".comment-container .content-item"):
+            author = item.find("a", class_="author-name")
+            if not author:
+                yield None, None
+                continue
+            article = item.find("article", class_="post-content")
+            yield author.get("href", ""), article.get_text(strip=True) if article else None
+
+    def loose_comment_texts(self, doc) -> Iterator[str]:
+        for el in doc.find_all(["div", "li", "article"], {"class": _COMMENT_CLASS_RE}):
+            yield el.get_text(" ", strip=True)
+
+    def csrf(self, doc) -> Optional[str]:
+        meta = doc.find("meta", {"name": _CSRF_META_RE})
+        if meta and meta.get("content"):
+            return meta.get("content")
+        hidden = doc.find("input", {"name": _CSRF_INPUT_RE})
+        if hidden and hidden.get("value"):
+            return hidden.get("value")
+        return None
+
+    def temp_script(self, doc) -> Optional[str]:
+        script = doc.find("script", id="temp-script")
+        return script.string if script else None
+
+
+class LxmlParser:
+    """lxml.html（libxml2）：C 实现的解析与 XPath 查询"""
+
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+
+        self._html = lxml.html
+
+    @staticmethod
+    def _class_xpath(cls: str) -> str:
+        return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+    def _texts(self, el) -> Iterator[str]:
+        if el.text:
+            yield el.text
+        for child in el:
+            # 注释、处理指令的 tag 不是字符串，只保留其后的 tail 文本
+            if isinstance(child.tag, str) and child.tag not in SKIP_TEXT_TAGS:
+                yield from self._texts(child)
+            if child.tail:
+                yield child.tail
+
+    def _first(self, el, xpath: str):
+        found = el.xpath(xpath)
+        return found[0] if found else None
+
+    def parse(self, html: str):
+        return self._html.document_fromstring(html)
+
+    def links(self, doc) -> List[Tuple[str, str]]:
+        return [(a.get("href") or "", _join(self._texts(a))) for a in doc.iter("a") if a.get("href") is not None]
+
+    def title(self, doc) -> str:
+        el = next(doc.iter("title"), None)
+        return _join(self._texts(el)) if el is not None else ""
+
+    def op_summary(self, doc) -> str:
+        main_post = self._first(doc, f"//div[{self._class_xpath('nsk-post')}]")
+        if main_post is not None:
+            article = self._first(main_post, f".//article[{self._class_xpath('post-content')}]")
+            if article is not None:
+                text = _join(self._texts(article), " ")
+                if text:
+                    return text
+        fallback = (
+            next((div for div in doc.iter("div") if _POST_CLASS_RE.search(div.get("class") or "")), None),
+            next(doc.iter("article"), None),
+        )
+        for el in fallback:
+            if el is not None:
+                text = _join(self._texts(el), " ")
+                if text:
+                    return text
+        return ""
+
+    def comment_items(self, doc) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+        items = doc.xpath(
+            f"//*[{self._class_xpath('comment-container')}]//*[{self._class_xpath('content-item')}]"
+        )
+        for item in items:
+            author = self._first(item, f".//a[{self._class_xpath('author-name')}]")
+            if author is None:
+                yield None, None
+                continue
+            article = self._first(item, f".//article[{self._class_xpath('post-content')}]")
+            yield author.get("href", ""), _join(self._texts(article)) if article is not None else None
+
+    def loose_comment_texts(self, doc) -> Iterator[str]:
+        for el in doc.iter("div", "li", "article"):
+            if _COMMENT_CLASS_RE.search(el.get("class") or ""):
+                yield _join(self._texts(el), " ")
+
+    def csrf(self, doc) -> Optional[str]:
+        meta = next((m for m in doc.iter("meta") if _CSRF_META_RE.search(m.get("name") or "")), None)
+        if meta is not None and meta.get("content"):
+            return meta.get("content")
+        hidden = next((i for i in doc.iter("input") if _CSRF_INPUT_RE.search(i.get("name") or "")), None)
+        if hidden is not None and hidden.get("value"):
+            return hidden.get("value")
+        return None
+
+    def temp_script(self, doc) -> Optional[str]:
+        script = next((s for s in doc.iter("script") if s.get("id") == "temp-script"), None)
+        return script.text if script is not None else None
+
+
+class SelectolaxParser:
+    """selectolax（lexbor）：解析与 CSS 查询最快，内存占用最低"""
+
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser = LexborHTMLParser
+
+    def _texts(self, node) -> Iterator[str]:
+        for child in node.iter(include_text=True):
+            tag = child.tag
+            if tag == "-text":
+                yield child.text_content or ""
+            elif tag.startswith(("-", "_", "!")) or tag in SKIP_TEXT_TAGS:
+                # 注释、doctype 以及不计入正文的标签
+                continue
+            else:
+                yield from self._texts(child)
+
+    def parse(self, html: str):
+        return self._parser(html)
+
+    def links(self, doc) -> List[Tuple[str, str]]:
+        return [(a.attributes.get("href") or "", _join(self._texts(a))) for a in doc.css("a[href]")]
+
+    def title(self, doc) -> str:
+        el = doc.css_first("title")
+        return _join(self._texts(el)) if el is not None else ""
+
+    def op_summary(self, doc) -> str:
+        main_post = doc.css_first("div.nsk-post")
+        if main_post is not None:
+            article = main_post.css_first("article.post-content")
+            if article is not None:
+                text = _join(self._texts(article), " ")
+                if text:
+                    return text
+        fallback = (
+            next((div for div in doc.css("div[class]") if _POST_CLASS_RE.search(div.attributes.get("class") or "")), None),
+            doc.css_first("article"),
+        )
+        for el in fallback:
+            if el is not None:
+                text = _join(self._texts(el), " ")
+                if text:
+                    return text
+        return ""
+
+    def comment_items(self, doc) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+        for item in doc.css(".comment-container .content-item"):
+            author = item.css_first("a.author-name")
+            if author is None:
+                yield None, None
+                continue
+            article = item.css_first("article.post-content")
+            yield author.attributes.get("href") or "", _join(self._texts(article)) if article is not None else None
+
+    def loose_comment_texts(self, doc) -> Iterator[str]:
+        for el in doc.css("div[class], li[class], article[class]"):
+            if _COMMENT_CLASS_RE.search(el.attributes.get("class") or ""):
+                yield _join(self._texts(el), " ")
+
+    def csrf(self, doc) -> Optional[str]:
+        meta = next((m for m in doc.css("meta[name]") if _CSRF_META_RE.search(m.attributes.get("name") or "")), None)
+        if meta is not None and meta.attributes.get("content"):
+            return meta.attributes.get("content")
+        hidden = next((i for i in doc.css("input[name]") if _CSRF_INPUT_RE.search(i.attributes.get("name") or "")), None)
+        if hidden is not None and hidden.attributes.get("value"):
+            return hidden.attributes.get("value")
+        return None
+
+    def temp_script(self, doc) -> Optional[str]:
+        script = doc.css_first("script#temp-script")
+        return (script.text(deep=True) or None) if script is not None else None
+
+
+PARSERS = {"selectolax": SelectolaxParser, "lxml": LxmlParser, "bs4": Bs4Parser}
+_parsers = {}
+
+
+def get_parser(name: Optional[str] = None):
+    """
+    返回页面解析后端实例（按名称缓存）
+    - name 为空时读取 NS_HTML_PARSER，默认 auto：依次尝试 selectolax、lxml，都未安装时使用 bs4
+    - 指定的后端未安装时打印提示并退回 bs4
+    """
+    name = (name or os.getenv("NS_HTML_PARSER") or "auto").strip().lower()
+    if name in _parsers:
+        return _parsers[name]
+    candidates = BACKENDS if name == "auto" else (name,)
+    parser = None
+    for candidate in candidates:
+        cls = PARSERS.get(candidate)
+        if cls is None:
+            print(f"未知的页面解析后端 '{candidate}'，可选: {', '.join(BACKENDS)}")
+            continue
+        try:
+            parser = cls()
+            break
+        except ImportError:
+            if name != "auto":
+                print(f"页面解析后端 {candidate} 未安装，改用 bs4")
+    _parsers[name] = parser or Bs4Parser()
+    return _parsers[name]
+
+
+
+def _anchor_text(inner: str) -> str:
+    """<a> 内部 HTML 的文本，与 get_text(strip=True) 一致"""
+    segments = _TAG_RE.split(_INNER_SKIP_RE.sub("<>", inner))
+    return "".join(t for t in (unescape(seg).strip() for seg in segments) if t)
+
+
+def category_threads(html: str, base: str) -> List[Dict]:
+    """
+    从分类页提取帖子列表 [{"title", "url", "thread_id"}]
+
+    说明：
+    - 不构建 DOM：找到帖子列表容器（class 含 post-list）后只扫描容器内部，找不到时扫描整页。
+    - 单个预编译正则依次匹配注释、script/style 块与 <a> 起始标签，注释和脚本中的链接被跳过。
+    - 按 thread_id 边扫描边去重，已出现的帖子不再提取文本；结果与原先 BeautifulSoup 整页遍历一致。
+    """
+    start, end = 0, len(html)
+    m = _POST_LIST_RE.search(html)
+    if m:
+        start = m.start()
+        depth = 0
+        for tag in re.finditer(rf"<(/?){m.group(1)}\b[^>]*>", html[start:], re.I):
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                end = start + tag.end()
+                break
+
+    threads: List[Dict] = []
+    seen = set()
+    for token in _SCAN_RE.finditer(html, start, end):
+        attrs = token.group(2)
+        if attrs is None:
+            continue
+        href_match = _HREF_RE.search(attrs)
+        if not href_match:
+            continue
+        href = unescape(next(g for g in href_match.groups() if g is not None))
+        found = _THREAD_T_RE.search(href) or _THREAD_POST_RE.search(href)
+        thread_id = int(found.group(1)) if found else 0
+        if not thread_id or thread_id in seen:
+            continue
+        # 链接文本到 </a> 为止；遇到下一个 <a> 视为当前链接结束（与 HTML5 解析一致）
+        close = _ANCHOR_END_RE.search(html, token.end(), end)
+        title = _anchor_text(html[token.end():close.start() if close else end])
+        if title:
+            seen.add(thread_id)
+            full = href if href.startswith("http") else f"{base}{href if href.startswith('/') else '/' + href}"
+            threads.append({"title": title, "url": full, "thread_id": thread_id})
+    return threads
+
+
+class _Element:
+    """流式解析时的打开元素：标签名、class 列表与挂在该元素上的文本收集回调"""
+
+    __slots__ = ("tag", "classes", "collectors", "item")
+
+    def __init__(self, tag: str, classes: List[str]):
+        self.tag = tag
+        self.classes = classes
+        self.collectors = []
+        self.item = None
+
+
+class _CommentItem:
+    """评论楼层：第一个 a.author-name 的 href 与第一个 article.post-content 的文本"""
+
+    __slots__ = ("href", "article_seen", "text", "done")
+
+    def __init__(self):
+        self.href: Optional[str] = None
+        self.article_seen = False
+        self.text: Optional[str] = None
+        self.done = False
+
+
+class ThreadStream(HTMLParser):
+    """
+    帖子页的增量解析状态：按需从分块迭代器读取并投喂 HTMLParser，只记录 get_thread_context 需要的字段
+
+    说明：
+    - 元素栈按 BeautifulSoup(html.parser) 的规则维护：结束标签弹出到最近的同名元素，空元素不入栈，
+      因此标题、楼主内容、评论与 CSRF 的结果与整页解析一致。
+    - 各字段在能确定时即返回，调用方取够所需内容后关闭连接，剩余页面不再下载与解析。
+    - 已读取的文本另存一份（不保留解析树，大小随实际读取量），需要整页解析的回退路径可通过 text() 读完并取回全文。
+    """
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]], encoding: str = "utf-8"):
+        super().__init__(convert_charrefs=True)
+        self._chunks = iter(chunks)
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.bytes_read = 0
+        self.eof = False
+        self._raw: List[str] = []
+        self._stack: List[_Element] = []
+        self._skip = 0
+        self._pending: List[str] = []
+        self._active = []
+        self._containers = 0
+        self.title: Optional[str] = None
+        self._title_seen = False
+        self._nsk_seen = False
+        self._nsk_post: Optional[_Element] = None
+        self._primary_seen = False
+        self.primary: Optional[str] = None
+        self._fallback_div_seen = False
+        self.fallback_div: Optional[str] = None
+        self._fallback_article_seen = False
+        self.fallback_article: Optional[str] = None
+        self.items: List[_CommentItem] = []
+        self._csrf_meta_seen = False
+        self.csrf_meta: Optional[str] = None
+        self._csrf_input_seen = False
+        self.csrf_input: Optional[str] = None
+
+    def pull(self) -> bool:
+        """读取并解析下一块，已到结尾时返回 False"""
+        if self.eof:
+            return False
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                self.bytes_read += len(chunk)
+                chunk = self._decoder.decode(chunk)
+            else:
+                self.bytes_read += len(chunk.encode("utf-8"))
+            if chunk:
+                self._raw.append(chunk)
+                self.feed(chunk)
+                return True
+        tail = self._decoder.decode(b"", final=True)
+        if tail:
+            self._raw.append(tail)
+            self.feed(tail)
+        self.close()
+        self._flush()
+        while self._stack:
+            self._pop()
+        self.eof = True
+        return False
+
+    def text(self) -> str:
+        """读完剩余内容并返回整页 HTML"""
+        while self.pull():
+            pass
+        return "".join(self._raw)
+
+    @property
+    def csrf_resolved(self) -> bool:
+        """CSRF 结果是否已与整页解析一致：meta 优先，首个 meta 的 content 为空时取首个 input 的 value"""
+        return self._csrf_meta_seen and (bool(self.csrf_meta) or self._csrf_input_seen)
+
+    # -- 文本收集 --
+
+    def _collect(self, element: _Element, separator: str, done):
+        parts: List[str] = []
+        entry = (parts, separator, done)
+        element.collectors.append(entry)
+        self._active.append(entry)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        text = "".join(self._pending).strip()
+        self._pending = []
+        if text and not self._skip:
+            for parts, _, _ in self._active:
+                parts.append(text)
+
+    def _pop(self):
+        element = self._stack.pop()
+        if element.tag in SKIP_TEXT_TAGS:
+            self._skip -= 1
+        if "comment-container" in element.classes:
+            self._containers -= 1
+        for entry in element.collectors:
+            self._active.remove(entry)
+            parts, separator, done = entry
+            done(separator.join(parts))
+        if element is self._nsk_post:
+            self._nsk_post = None
+            if self.primary is None:
+                self.primary = ""
+        if element.item is not None:
+            element.item.done = True
+
+    # -- HTMLParser 回调 --
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        attrs = dict(attrs)
+        if tag == "meta" and not self._csrf_meta_seen and _CSRF_META_RE.search(attrs.get("name") or ""):
+            self._csrf_meta_seen = True
+            self.csrf_meta = attrs.get("content")
+        elif tag == "input" and not self._csrf_input_seen and _CSRF_INPUT_RE.search(attrs.get("name") or ""):
+            self._csrf_input_seen = True
+            self.csrf_input = attrs.get("value")
+        if tag in VOID_TAGS:
+            return
+
+        classes = (attrs.get("class") or "").split()
+        in_container = self._containers > 0
+        open_items = [el.item for el in self._stack if el.item is not None] if self.items else []
+        element = _Element(tag, classes)
+        self._stack.append(element)
+        if tag in SKIP_TEXT_TAGS:
+            self._skip += 1
+        if "comment-container" in classes:
+            self._containers += 1
+
+        if tag == "title" and not self._title_seen:
+            self._title_seen = True
+            self._collect(element, "", lambda text: setattr(self, "title", text))
+        elif tag == "div":
+            if not self._nsk_seen and "nsk-post" in classes:
+                self._nsk_seen = True
+                self._nsk_post = element
+            if not self._fallback_div_seen and _POST_CLASS_RE.search(attrs.get("class") or ""):
+                self._fallback_div_seen = True
+                self._collect(element, " ", lambda text: setattr(self, "fallback_div", text))
+        elif tag == "article":
+            if not self._fallback_article_seen:
+                self._fallback_article_seen = True
+                self._collect(element, " ", lambda text: setattr(self, "fallback_article", text))
+            if "post-content" in classes:
+                if self._nsk_post is not None and not self._primary_seen:
+                    self._primary_seen = True
+                    self._collect(element, " ", lambda text: setattr(self, "primary", text))
+                for item in open_items:
+                    if not item.article_seen:
+                        item.article_seen = True
+                        self._collect(element, "", lambda text, item=item: setattr(item, "text", text))
+        elif tag == "a" and "author-name" in classes:
+            for item in open_items:
+                if item.href is None:
+                    item.href = attrs.get("href") or ""
+
+        if in_container and "content-item" in classes:
+            element.item = _CommentItem()
+            self.items.append(element.item)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self._flush()
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index].tag == tag:
+                while len(self._stack) > index:
+                    self._pop()
+                return
+
+    def handle_data(self, data):
+        self._pending.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        # html.parser 下 BeautifulSoup 把 CDATA 作为单独的文本节点
+        self._flush()
+        if data.startswith("CDATA["):
+            self._pending.append(data[6:])
+            self._flush()
+
+
+class StreamThreadParser:
+    """
+    帖子页流式解析：接口与其他后端相同，parse 接收 HTTP 响应的分块迭代器而不是完整 HTML
+
+    - title / op_summary / comment_items 按需继续读取，取够即止
+    - csrf 继续读取到能确定结果为止，页面不含 CSRF 字段时会读到结尾；
+      known_csrf 只看已读取的部分，不为 CSRF 多读（get_thread_context 使用，回复时再回退到生成的令牌）
+    - loose_comment_texts 读完整页后交给 get_parser() 的整页后端处理
+    """
+
+    name = "stream"
+
+    def parse(self, chunks: Iterable[Union[bytes, str]], encoding: str = "utf-8") -> ThreadStream:
+        return ThreadStream(chunks, encoding)
+
+    def title(self, doc: ThreadStream) -> str:
+        while doc.title is None and doc.pull():
+            pass
+        return doc.title or ""
+
+    def _resolved_op(self, doc: ThreadStream) -> Optional[str]:
+        if doc.primary:
+            return doc.primary
+        if doc.primary is None and not doc.eof:
+            return None
+        for text in (doc.fallback_div, doc.fallback_article):
+            if text is None and not doc.eof:
+                return None
+            if text:
+                return text
+        return ""
+
+    def op_summary(self, doc: ThreadStream) -> str:
+        text = self._resolved_op(doc)
+        while text is None:
+            doc.pull()
+            text = self._resolved_op(doc)
+        return text
+
+    def comment_items(self, doc: ThreadStream) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+        index = 0
+        while True:
+            while index < len(doc.items) and doc.items[index].done:
+                item = doc.items[index]
+                index += 1
+                yield (item.href, item.text) if item.href is not None else (None, None)
+            if index >= len(doc.items) and doc.eof:
+                return
+            if not doc.pull() and index >= len(doc.items):
+                return
+
+    def loose_comment_texts(self, doc: ThreadStream) -> Iterator[str]:
+        parser = get_parser()
+        return parser.loose_comment_texts(parser.parse(doc.text()))
+
+    def csrf(self, doc: ThreadStream) -> Optional[str]:
+        while not doc.csrf_resolved and doc.pull():
+            pass
+        return doc.csrf_meta or doc.csrf_input or None
+
+    def known_csrf(self, doc: ThreadStream) -> Optional[str]:
+        """已读取部分中能确定的 CSRF，尚未确定时返回 None"""
+        return (doc.csrf_meta or doc.csrf_input or None) if doc.csrf_resolved else None
+
+
+STREAM_PARSER = StreamThreadParser()
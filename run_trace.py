@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import uuid
+import functools
+import threading
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+from http_retry import parse_float
+
+GMT8 = timezone(timedelta(hours=8))
+
+TRACE_ENABLED = os.environ.get("NS_TRACE", "true").lower() == "true"
+TRACE_FILE = os.environ.get("NS_TRACE_PATH", "./cookie/run_trace.jsonl")
+# 明细文件超过该大小（MB）时轮转为 .1 备份，只保留一份；0 表示不限制
+TRACE_MAX_BYTES = int(parse_float(os.environ.get("NS_TRACE_MAX_MB"), default=5.0) * 1024 * 1024)
+
+
+def _response_size(resp) -> int:
+    """
+    响应体字节数：优先取 Content-Length，其次取已读入内存的响应体；
+    不访问 resp.content 属性，避免为了统计而强制读取流式响应
+    """
+    headers = getattr(resp, "headers", None) or {}
+    try:
+        length = headers.get("Content-Length")
+        if length is not None:
+            return int(length)
+    except (TypeError, ValueError):
+        pass
+    body = vars(resp).get("_content") if hasattr(resp, "__dict__") else None
+    if not isinstance(body, bytes):
+        # curl_cffi 的 content 是普通属性（流式响应时为空），requests 的 content 是会触发读取的 property
+        body = vars(resp).get("content") if hasattr(resp, "__dict__") else None
+    return len(body) if isinstance(body, bytes) else 0
+
+
+def _pad(text, width: int, right: bool = False) -> str:
+    """按终端显示宽度补齐（中文等宽字符占两列）"""
+    text = str(text)
+    shown = sum(2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1 for ch in text)
+    fill = " " * max(0, width - shown)
+    return fill + text if right else text + fill
+
+
+class Span:
+    """
+    单个阶段的计时记录
+
+    说明：
+    - 通过 trace.span() 创建，退出 with 块时自动结束并写入 JSONL。
+    - 传输层在活动 span 上累加请求数、收发字节、最后一次 HTTP 状态码与重试次数。
+    """
+
+    __slots__ = ("phase", "account", "parent", "started_at", "_start", "duration",
+                 "requests", "bytes_in", "bytes_out", "status", "retries", "error", "attrs")
+
+    def __init__(self, phase: str, account: Optional[str], parent: Optional[str], attrs: Dict):
+        self.phase = phase
+        self.account = account
+        self.parent = parent
+        self.started_at = datetime.now(GMT8)
+        self._start = time.perf_counter()
+        self.duration = 0.0
+        self.requests = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.status = None
+        self.retries = 0
+        self.error = None
+        self.attrs = attrs
+
+    def record_response(self, resp, sent: int = 0):
+        self.requests += 1
+        self.status = getattr(resp, "status_code", None)
+        self.bytes_in += _response_size(resp)
+        self.bytes_out += sent
+
+    def add_retry(self):
+        self.retries += 1
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self, run_id: str) -> Dict:
+        data = {
+            "run_id": run_id,
+            "phase": self.phase,
+            "account": self.account,
+            "parent": self.parent,
+            "start": self.started_at.isoformat(timespec="milliseconds"),
+            "duration_ms": round(self.duration * 1000, 1),
+            "requests": self.requests,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "status": self.status,
+            "retries": self.retries,
+            "ok": self.error is None,
+        }
+        if self.error:
+            data["error"] = self.error
+        data.update(self.attrs)
+        return data
+
+
+class RunTrace:
+    """一次运行内的 span 收集器：结束的 span 追加写入 JSONL 文件，并可打印汇总表"""
+
+    def __init__(self, path: str = TRACE_FILE, enabled: bool = TRACE_ENABLED, max_bytes: int = TRACE_MAX_BYTES):
+        self.path = path
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.run_id = ""
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def begin_run(self, name: str) -> str:
+        self.run_id = f"{name}-{datetime.now(GMT8).strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        with self._lock:
+            self.spans = []
+        return self.run_id
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def bind_account(self, account: Optional[str]):
+        """设置当前线程后续 span 的默认账号"""
+        self._local.account = account
+
+    def current(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, phase: str, account: Optional[str] = None, **attrs):
+        """记录一个阶段；未指定 account 时沿用外层 span 或 bind_account 设置的账号"""
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        if account is None:
+            account = parent.account if parent is not None else getattr(self._local, "account", None)
+        current = Span(phase, account, parent.phase if parent else None, attrs)
+        stack.append(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.duration = time.perf_counter() - current._start
+            stack.pop()
+            self._finish(current)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+            if not self.enabled:
+                return
+            try:
+                directory = os.path.dirname(self.path) or "."
+                os.makedirs(directory, exist_ok=True)
+                self._rotate()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(span.to_dict(self.run_id), ensure_ascii=False) + "\n")
+            except Exception as e:
+                print(f"写入运行追踪文件失败，本次运行不再写入: {e}")
+                self.enabled = False
+
+    def _rotate(self):
+        """明细文件超过 max_bytes 时改名为 .1 备份（覆盖旧备份），之后从空文件重新追加"""
+        if not self.max_bytes:
+            return
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size >= self.max_bytes:
+            os.replace(self.path, self.path + ".1")
+
+    def summary_rows(self) -> List[Dict]:
+        """按 (账号, 阶段) 汇总：次数、总耗时、收发字节、最后状态码、重试次数、失败次数"""
+        rows: Dict[tuple, Dict] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            key = (span.account or "-", span.phase)
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = {"account": key[0], "phase": key[1], "count": 0, "duration_ms": 0.0,
+                                   "bytes": 0, "status": None, "retries": 0, "errors": 0}
+            row["count"] += 1
+            row["duration_ms"] += span.duration * 1000
+            row["bytes"] += span.bytes_in + span.bytes_out
+            if span.status is not None:
+                row["status"] = span.status
+            row["retries"] += span.retries
+            row["errors"] += span.error is not None
+        return list(rows.values())
+
+    def print_summary(self):
+        rows = self.summary_rows()
+        if not rows:
+            return
+        print(f"\n==== 运行耗时汇总 ({self.run_id}) ====")
+        widths = (14, 14, 6, 10, 10, 6, 6, 6)
+        header = ("账号", "阶段", "次数", "耗时(ms)", "字节", "状态", "重试", "失败")
+        print("".join(_pad(h, w, right=i > 1) for i, (h, w) in enumerate(zip(header, widths))))
+        for row in rows:
+            cells = (row["account"], row["phase"], row["count"], f"{row['duration_ms']:.0f}",
+                     row["bytes"], row["status"] or "-", row["retries"], row["errors"])
+            print("".join(_pad(c, w, right=i > 1) for i, (c, w) in enumerate(zip(cells, widths))))
+        if self.enabled:
+            print(f"详细记录已写入 {self.path}")
+
+
+trace = RunTrace()
+
+
+def span(phase: str, account: Optional[str] = None, **attrs):
+    return trace.span(phase, account, **attrs)
+
+
+def current_span() -> Optional[Span]:
+    return trace.current()
+
+
+def traced(phase: str):
+    """装饰器：把整个函数调用记录为一个 span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace.span(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
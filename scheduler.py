@@ -1,102 +1,51 @@
 import os
-import sys
-import time
 import datetime
-import random
-import subprocess
-import re
 from datetime import timezone, timedelta
 from pathlib import Path
 
+from job_scheduler import Job, JobScheduler, get_run_config as get_job_run_config
+from task_runner import run_task
+
 # 测试程序时使用
-from dotenv import load_dotenv
+from dotenv import find_dotenv, load_dotenv
 load_dotenv()
 
 GMT8 = timezone(timedelta(hours=8))
 
 def get_run_config():
     """
-    从环境变量 RUN_AT 读取并解析运行时间配置。
-    - 'HH:MM': 固定时间
-    - 'HH:MM-HH:MM': 随机时间范围
-    - 未设置或格式错误: 默认为 '08:00-10:59'
+    从环境变量 RUN_AT 读取并解析签到运行时间配置。
+    支持固定时间 'HH:MM'、随机时间范围 'HH:MM-HH:MM'、固定间隔 'every 6h' 与 5 段 cron 表达式，
+    未设置或格式错误时默认为 '08:00-10:59'。
     返回一个元组 (mode, value)
     """
-    run_at_env = os.environ.get('RUN_AT', '08:00-10:59')
-
-    if re.fullmatch(r'\d{2}:\d{2}', run_at_env):
-        print(f"检测到固定时间模式: {run_at_env}", flush=True)
-        return 'fixed', run_at_env
-    
-    if re.fullmatch(r'\d{2}:\d{2}-\d{2}:\d{2}', run_at_env):
-        print(f"检测到随机时间范围模式: {run_at_env}", flush=True)
-        return 'range', run_at_env
-
-    if os.environ.get('RUN_AT'):
-        print(f"警告: 环境变量 RUN_AT 的格式 '{run_at_env}' 无效。", flush=True)
-    
-    print("将使用默认随机时间范围 '08:00-10:59'。", flush=True)
-    return 'range', '08:00-10:59'
-
-def calculate_next_run_time(mode, value):
+    return get_job_run_config("RUN_AT", "08:00-10:59")
+
+def run_checkin_task():
     """
-    根据当前时间和配置计算下一次运行的 datetime 对象。
-    智能寻找下一个可用的运行时间点（今天或明天），并使用 GMT+8 时区。
+    执行 nodeseek_sign.py 签到任务（子进程或进程内，见 NS_TASK_RUNNER）。
     """
-    now = datetime.datetime.now(GMT8)
-
-    if mode == 'fixed':
-        h, m = map(int, value.split(':'))
-        next_run_attempt = now.replace(hour=h, minute=m, second=0, microsecond=0)
-        if next_run_attempt > now:
-            return next_run_attempt
-        else:
-            return next_run_attempt + datetime.timedelta(days=1)
-
-    elif mode == 'range':
-        start_str, end_str = value.split('-')
-        start_h, start_m = map(int, start_str.split(':'))
-        end_h, end_m = map(int, end_str.split(':'))
-        
-        start_time = datetime.time(start_h, start_m)
-        end_time = datetime.time(end_h, end_m)
+    return run_task("nodeseek_sign.py", "签到任务")
 
-        start_today = now.replace(hour=start_h, minute=start_m, second=0, microsecond=0)
 
-        if now < start_today:
-            target_date = now.date()
-        else:
-            target_date = now.date() + datetime.timedelta(days=1)
-
-        start_target = datetime.datetime.combine(target_date, start_time, tzinfo=GMT8)
-        end_target = datetime.datetime.combine(target_date, end_time, tzinfo=GMT8)
-
-        if start_target > end_target:
-            end_target += datetime.timedelta(days=1)
+def get_prewarm_seconds():
+    """读取固定时间模式下的提前预热秒数，默认 20 秒，0 表示关闭预热"""
+    value = os.environ.get("NS_PREWARM_SECONDS", "20").strip()
+    try:
+        seconds = float(value) if value else 0.0
+    except ValueError:
+        print(f"警告: NS_PREWARM_SECONDS='{value}' 非法，将使用默认值 20 秒", flush=True)
+        seconds = 20.0
+    return max(0.0, seconds)
 
-        start_timestamp = int(start_target.timestamp())
-        end_timestamp = int(end_target.timestamp())
-        
-        random_timestamp = random.randint(start_timestamp, end_timestamp)
-        return datetime.datetime.fromtimestamp(random_timestamp, tz=GMT8)
 
-def run_checkin_task():
+def run_prewarmed_checkin(target_time):
     """
-    执行 nodeseek_sign.py 脚本。
+    提前启动签到任务：收集账号、预热连接后等到 target_time 准时发送签到请求。
+    执行方式同样遵循 NS_TASK_RUNNER：子进程模式以 --fire-at 参数启动脚本，在子进程内预热并等待。
     """
-    print(f"[{datetime.datetime.now(GMT8).strftime('%Y-%m-%d %H:%M:%S')}] 开始执行签到任务...", flush=True)
-    try:
-        subprocess.run([sys.executable, "nodeseek_sign.py"], check=True)
-        print(f"[{datetime.datetime.now(GMT8).strftime('%Y-%m-%d %H:%M:%S')}] 签到任务执行完毕。", flush=True)
-    except FileNotFoundError:
-        print("错误: 'nodeseek_sign.py' 未找到。请确保它与 scheduler.py 位于同一目录。", flush=True)
-    except subprocess.CalledProcessError as e:
-        print(f"签到任务执行失败，返回码: {e.returncode}", flush=True)
-    except Exception as e:
-        print(f"执行签到任务时发生未知错误: {e}", flush=True)
-
-
-
+    return run_task("nodeseek_sign.py", "签到任务", entry="prewarmed_main",
+                    args=("--fire-at", target_time.isoformat()), fire_at=target_time)
 
 
 def has_available_cookie():
@@ -142,64 +91,97 @@ def get_comment_delay_seconds():
     return delay_minutes * 60
 
 
-def maybe_run_comment_followup():
-    """??????????????????"""
-    if os.environ.get("NS_COMMENT_ENABLED", "false").lower() != "true":
+def is_comment_enabled():
+    return os.environ.get("NS_COMMENT_ENABLED", "false").lower() == "true"
+
+
+def run_comment_task(target_time=None):
+    return run_task("commenter.py", "评论任务")
+
+
+def schedule_comment_followup(scheduler):
+    """签到完成后把评论任务作为一次性任务放入调度队列，等待期间不阻塞其他任务"""
+    if not is_comment_enabled() or os.environ.get("COMMENT_RUN_AT"):
         return
 
     if not has_available_cookie():
-        print("?????? Cookie???????", flush=True)
+        print("未找到可用的 Cookie，跳过评论任务", flush=True)
         return
 
     delay_seconds = get_comment_delay_seconds()
     if delay_seconds > 0:
-        minutes = delay_seconds / 60
-        print(f"?????? {minutes:.1f} ??????????? Cookie", flush=True)
-        time.sleep(delay_seconds)
+        print(f"评论任务将在 {delay_seconds / 60:.1f} 分钟后执行，以便复用最新的 Cookie", flush=True)
+    when = datetime.datetime.now(GMT8) + datetime.timedelta(seconds=delay_seconds)
+    scheduler.schedule_once("comment-followup", when, run_comment_task)
+
+
+def run_stats_task(target_time=None):
+    return run_task("nodeseek_sign.py", "签到统计任务", entry="stats_main", args=("--stats",))
+
+
+def build_jobs(scheduler):
+    """
+    根据当前环境变量构建任务列表：
+    - checkin: RUN_AT，签到（固定时间模式下提前预热），完成后按需追加一次性评论任务
+    - comment: COMMENT_RUN_AT，设置且 NS_COMMENT_ENABLED=true 时作为独立任务调度（此时不再追加签到后评论）
+    - stats: STATS_RUN_AT，设置后定时推送签到收益统计
+    """
+    mode, value = get_run_config()
+    prewarm_seconds = get_prewarm_seconds() if mode == 'fixed' else 0.0
+    if prewarm_seconds:
+        print(f"固定时间模式将提前 {prewarm_seconds:.0f} 秒预热连接", flush=True)
+
+    def checkin(target_time):
+        if prewarm_seconds:
+            ok = run_prewarmed_checkin(target_time)
+        else:
+            ok = run_checkin_task()
+        schedule_comment_followup(scheduler)
+        return ok
+
+    jobs = [Job("checkin", checkin, mode, value, lead_seconds=prewarm_seconds)]
+
+    if is_comment_enabled() and os.environ.get("COMMENT_RUN_AT"):
+        comment_mode, comment_value = get_job_run_config("COMMENT_RUN_AT", "14:00-21:00")
+        jobs.append(Job("comment", run_comment_task, comment_mode, comment_value))
+
+    if os.environ.get("STATS_RUN_AT"):
+        stats_mode, stats_value = get_job_run_config("STATS_RUN_AT", "22:00")
+        jobs.append(Job("stats", run_stats_task, stats_mode, stats_value))
+
+    return jobs
+
+
+def reload_env():
+    """SIGHUP 时重新读取 .env（或 NS_SCHEDULER_ENV_FILE 指定的文件），覆盖当前环境变量"""
+    env_file = os.environ.get("NS_SCHEDULER_ENV_FILE") or find_dotenv(usecwd=True)
+    if env_file and os.path.exists(env_file):
+        load_dotenv(env_file, override=True)
+        print(f"已重新加载配置文件: {env_file}", flush=True)
     else:
-        print("??????????????? Cookie", flush=True)
+        print("未找到配置文件，按当前环境变量重新计划", flush=True)
+
 
-    print(f"[{datetime.datetime.now(GMT8).strftime('%Y-%m-%d %H:%M:%S')}] ????????...", flush=True)
+def start_notify_drainer():
+    """在调度进程中常驻通知发件箱投递线程，继续投递签到/评论子进程退出时仍在退避重试的通知"""
     try:
-        subprocess.run([sys.executable, "commenter.py"], check=True)
-        print(f"[{datetime.datetime.now(GMT8).strftime('%Y-%m-%d %H:%M:%S')}] ????????", flush=True)
-    except FileNotFoundError:
-        print("??: 'commenter.py' ????????? scheduler.py ??????", flush=True)
-    except subprocess.CalledProcessError as e:
-        print(f"????????????: {e.returncode}", flush=True)
+        from notify_outbox import start_background_drainer
+        if start_background_drainer():
+            print("通知发件箱后台投递已启动", flush=True)
     except Exception as e:
-        print(f"?????????????: {e}", flush=True)
-
-
+        print(f"通知发件箱后台投递启动失败: {e}", flush=True)
 
 
 def main():
     """
-    主调度循环。
+    主调度循环：签到、评论、统计任务共用一个按运行时间排序的任务队列。
     """
     print("调度器启动...", flush=True)
-    mode, value = get_run_config()
-    print(f"调度模式: '{mode}', 配置值: '{value}'", flush=True)
-    
-    # run_checkin_task() # 启动时执行，用于测试程序
-
-    while True:
-        next_run_time = calculate_next_run_time(mode, value)
-        now = datetime.datetime.now(GMT8)
-        sleep_duration = (next_run_time - now).total_seconds()
-
-        if sleep_duration > 0:
-            print(f"下一次签到任务计划在: {next_run_time.strftime('%Y-%m-%d %H:%M:%S')}", flush=True)
-            hours, remainder = divmod(sleep_duration, 3600)
-            minutes, _ = divmod(remainder, 60)
-            print(f"程序将休眠 {int(hours)} 小时 {int(minutes)} 分钟。", flush=True)
-            time.sleep(sleep_duration)
-        else:
-            print("计算出的下一个运行时间已过，等待 60 秒后重试...", flush=True)
-            time.sleep(60)
-
-        run_checkin_task()
-        maybe_run_comment_followup()
+    if os.environ.get("NS_SCHEDULER_ENV_FILE"):
+        reload_env()
+    start_notify_drainer()
+    scheduler = JobScheduler(lambda: build_jobs(scheduler), on_reload=reload_env)
+    scheduler.run_forever()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,85 @@
+import os
+import json
+import datetime
+from datetime import timezone, timedelta
+from typing import Optional
+
+GMT8 = timezone(timedelta(hours=8))
+
+STATE_FILE = os.environ.get("NS_SCHEDULER_STATE_PATH", "./cookie/scheduler_state.json")
+
+
+def _load_all() -> dict:
+    if os.path.exists(STATE_FILE):
+        try:
+            with open(STATE_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取调度状态失败，将重新计划: {e}", flush=True)
+    return {}
+
+
+def _save_all(data: dict):
+    directory = os.path.dirname(STATE_FILE) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{STATE_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def _parse(value: Optional[str]) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def load_job_state(job: str) -> dict:
+    return _load_all().get(job, {})
+
+
+def update_job_state(job: str, **fields):
+    """合并更新某个任务的状态字段（datetime 自动转为 ISO 字符串）"""
+    data = _load_all()
+    state = data.setdefault(job, {})
+    for key, value in fields.items():
+        state[key] = value.isoformat() if isinstance(value, datetime.datetime) else value
+    try:
+        _save_all(data)
+    except Exception as e:
+        print(f"保存调度状态失败: {e}", flush=True)
+
+
+def save_planned_run(job: str, spec: str, next_run: datetime.datetime):
+    update_job_state(job, spec=spec, next_run=next_run)
+
+
+def mark_completed(job: str, when: Optional[datetime.datetime] = None):
+    update_job_state(job, last_completed=when or datetime.datetime.now(GMT8))
+
+
+def resume_next_run(job: str, spec: str) -> Optional[datetime.datetime]:
+    """
+    启动时恢复上次保存的计划：
+    - 配置未变且计划时间尚未到达：沿用原计划时间（避免重启后重新随机）。
+    - 计划时间已过且之后没有完成记录：说明错过了本次运行，返回当前时间立即补跑。
+    - 其他情况返回 None，由调用方重新计算。
+    """
+    state = load_job_state(job)
+    if state.get("spec") != spec:
+        return None
+    planned = _parse(state.get("next_run"))
+    if planned is None:
+        return None
+    now = datetime.datetime.now(GMT8)
+    if planned > now:
+        print(f"[{job}] 恢复已保存的计划时间: {planned.strftime('%Y-%m-%d %H:%M:%S')}", flush=True)
+        return planned
+    last_completed = _parse(state.get("last_completed"))
+    if last_completed is None or last_completed < planned:
+        print(f"[{job}] 检测到错过的计划运行 {planned.strftime('%Y-%m-%d %H:%M:%S')}，立即补跑", flush=True)
+        return now
+    return None
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+签到收益统计微基准：三条路径的输入都是同一份合成收支记录（接口分页格式，每页 15 条）
+- 原三次循环：逐条 fromisoformat + astimezone + 子串匹配
+- 单次遍历（无缓存）：与 fetch_credit_records 相同，按页批量解析一次、越过起点即停止，再 aggregate
+- 本地账本：记录预先写入临时 SQLite 账本，计时包含 rows_since 读取与 aggregate
+只比较 CPU 耗时，不含网络请求：本地账本的收益在于同步时少请求页面，读取 SQLite 的耗时与原循环相当。
+
+用法：python scripts/bench_credit_stats.py [记录数=10000] [统计天数=365]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+# ensure project root on sys.path
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from credit_ledger import CreditLedger
+from credit_stats import aggregate, parse_epochs
+
+
+def make_records(count: int):
+    """生成按时间倒序的合成收支记录，约一半为签到收益"""
+    now = datetime.now(timezone.utc)
+    balance = 10 * count
+    records = []
+    for i in range(count):
+        ts = now - timedelta(hours=i * 6, minutes=random.randint(0, 59))
+        if i % 2 == 0:
+            amount, desc = random.randint(1, 10), f"签到收益{random.randint(1, 10)}个鸡腿"
+        else:
+            amount, desc = random.choice((-5, 2, 3)), random.choice(("评论奖励", "发帖奖励", "转账"))
+        balance -= amount
+        records.append([amount, balance, desc, ts.strftime('%Y-%m-%dT%H:%M:%S.000Z')])
+    return records
+
+
+def make_pages(records, size=15):
+    return [records[start:start + size] for start in range(0, len(records), size)]
+
+
+def legacy_stats(pages, days):
+    """baseline：get_signin_stats 原有的页边界检查 + 范围过滤 + 最终筛选三次循环"""
+    shanghai_tz = ZoneInfo("Asia/Shanghai")
+    query_start_time = datetime.now(shanghai_tz) - timedelta(days=days)
+    all_records = []
+    for page in pages:
+        last = datetime.fromisoformat(page[-1][3].replace('Z', '+00:00')).astimezone(shanghai_tz)
+        if last < query_start_time:
+            for record in page:
+                t = datetime.fromisoformat(record[3].replace('Z', '+00:00')).astimezone(shanghai_tz)
+                if t >= query_start_time:
+                    all_records.append(record)
+            break
+        all_records.extend(page)
+    signin_records = []
+    for amount, balance, description, timestamp in all_records:
+        t = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).astimezone(shanghai_tz)
+        if t >= query_start_time and "签到收益" in description and "鸡腿" in description:
+            signin_records.append({'amount': amount, 'date': t.strftime('%Y-%m-%d'), 'description': description})
+    total = sum(r['amount'] for r in signin_records)
+    return total, len(signin_records)
+
+
+def single_pass_stats(pages, days):
+    """无缓存路径：同 iter_credit_records + stop_before + fetch_credit_records"""
+    since = int(time.time()) - days * 86400
+    rows = []
+    for page in pages:
+        for epoch, record in zip(parse_epochs([r[3] for r in page]), page):
+            if epoch < since:
+                break
+            rows.append((epoch, record[0], record[1], record[2]))
+        else:
+            continue
+        break
+    stats = aggregate(rows, since_epoch=since)
+    return stats['total_amount'], stats['days_count']
+
+
+def ledger_stats(ledger, days):
+    """本地账本路径：同 get_signin_stats 同步完成后的 rows_since + aggregate"""
+    since = int(time.time()) - days * 86400
+    stats = aggregate(ledger.rows_since("bench", since), since_epoch=since)
+    return stats['total_amount'], stats['days_count']
+
+
+def bench(cases, repeat=15, number=10):
+    """
+    交替执行各用例以抵消机器负载波动，取每个用例最快一轮的单次平均耗时
+    cases: [(fn, args), ...]，返回 [(耗时秒, 结果), ...]
+    """
+    best = [float("inf")] * len(cases)
+    results = [None] * len(cases)
+    for _ in range(repeat):
+        for i, (fn, args) in enumerate(cases):
+            start = time.perf_counter()
+            for _ in range(number):
+                results[i] = fn(*args)
+            best[i] = min(best[i], (time.perf_counter() - start) / number)
+    return list(zip(best, results))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    pages = make_pages(make_records(count))
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = CreditLedger(os.path.join(tmp, "credit_ledger.db"))
+        for page in pages:
+            ledger.add_records("bench", page)
+        (legacy_time, legacy_result), (single_time, single_result), (ledger_time, ledger_result) = bench([
+            (legacy_stats, (pages, days)),
+            (single_pass_stats, (pages, days)),
+            (ledger_stats, (ledger, days)),
+        ])
+        ledger.close()
+    print(f"记录数: {count}，统计天数: {days}")
+    print(f"原三次循环:             {legacy_time * 1000:8.2f} ms  结果={legacy_result}")
+    print(f"单次遍历（无缓存）:     {single_time * 1000:8.2f} ms  结果={single_result}  "
+          f"加速比 {legacy_time / single_time:.2f}x")
+    print(f"本地账本（读取+聚合）:  {ledger_time * 1000:8.2f} ms  结果={ledger_result}  "
+          f"加速比 {legacy_time / ledger_time:.2f}x")
+    print(f"结果一致: {legacy_result == single_result == ledger_result}")
+
+
+if __name__ == "__main__":
+    main()
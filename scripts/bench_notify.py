@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+通知推送基准：在本地启动模拟各推送服务接口的 HTTP 桩服务，
+把 push_config 指向桩服务后连续调用 notify.send，统计吞吐、单次扇出耗时 p50/p99 与失败处理。
+
+覆盖渠道：bark、Telegram、企业微信机器人/应用、钉钉、飞书、Gotify、PushPlus、自定义 webhook。
+钉钉、飞书、PushPlus 的接口地址写死在 notify 中，基准内把这三个主机的请求改写到桩服务。
+
+用法：python scripts/bench_notify.py [--counts 1,5,10,20,50] [--latency-ms 20] [--jitter-ms 10]
+                                     [--error-rate 0.05] [--slow feishu_bot=3000] [--deadline 2]
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# ensure project root on sys.path
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import notify
+
+# 桩服务路径前缀 -> (渠道函数名, 成功响应, 失败响应)
+PROVIDERS = {
+    "bark": ("bark", {"code": 200, "message": "success"}, {"code": 400, "message": "injected"}),
+    "tg": ("telegram_bot", {"ok": True, "result": {}}, {"ok": False, "description": "injected"}),
+    "qywx-bot": ("wecom_bot", {"errcode": 0, "errmsg": "ok"}, {"errcode": 45009, "errmsg": "injected"}),
+    "qywx": ("wecom_app", {"errcode": 0, "errmsg": "ok"}, {"errcode": 45009, "errmsg": "injected"}),
+    "dingtalk": ("dingding_bot", {"errcode": 0, "errmsg": "ok"}, {"errcode": 130101, "errmsg": "injected"}),
+    "feishu": ("feishu_bot", {"code": 0, "msg": "success"}, {"code": 9499, "msg": "injected"}),
+    "gotify": ("gotify", {"id": 1}, {"error": "injected"}),
+    "pushplus": ("pushplus_bot", {"code": 200, "msg": "ok"}, {"code": 500, "msg": "injected"}),
+    "webhook": ("custom_notify", {"ok": True}, {"ok": False}),
+}
+# notify 中写死的主机 -> 桩服务路径前缀
+HOST_REWRITES = {
+    "oapi.dingtalk.com": "dingtalk",
+    "open.feishu.cn": "feishu",
+    "www.pushplus.plus": "pushplus",
+    "pushplus.hxtrip.com": "pushplus",
+}
+
+
+class StubState:
+    """桩服务的延迟/错误注入配置与请求计数"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float, slow: dict):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.slow = slow
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def hit(self, channel: str):
+        with self._lock:
+            self.requests[channel] = self.requests.get(channel, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+
+
+def make_handler(state: StubState):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            path = urllib.parse.urlsplit(self.path).path
+            prefix = path.strip("/").split("/", 1)[0]
+            if prefix == "qywx" and "/cgi-bin/gettoken" in path:
+                body, status = {"errcode": 0, "access_token": "stub-token", "expires_in": 7200}, 200
+            elif prefix in PROVIDERS:
+                channel, ok_body, fail_body = PROVIDERS[prefix]
+                state.hit(channel)
+                delay = state.slow.get(channel, state.latency_ms + random.uniform(0, state.jitter_ms))
+                time.sleep(delay / 1000)
+                failed = random.random() < state.error_rate
+                body, status = (fail_body, 500) if failed else (ok_body, 200)
+            else:
+                body, status = {"error": "unknown endpoint"}, 404
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = _reply
+        do_POST = _reply
+
+    return StubHandler
+
+
+def start_stub(state: StubState):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="notify-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def configure(base: str, workdir: str, keep_rate_limits: bool):
+    """把各渠道配置指向桩服务，并关闭发件箱、摘要、一言与重复抑制等与基准无关的功能"""
+    notify.push_config.update({
+        "BARK_PUSH": f"{base}/bark/stub-key",
+        "TG_BOT_TOKEN": "123:stub",
+        "TG_USER_ID": "1",
+        "TG_API_HOST": f"{base}/tg",
+        "QYWX_KEY": "stub-key",
+        "QYWX_AM": "corpid,secret,@all,1000002",
+        "QYWX_ORIGIN": f"{base}/qywx",
+        "QYWX_TOKEN_CACHE_PATH": f"{workdir}/wecom_token.json",
+        "DD_BOT_TOKEN": "stub-token",
+        "DD_BOT_SECRET": "stub-secret",
+        "FSKEY": "stub-key",
+        "GOTIFY_URL": f"{base}/gotify",
+        "GOTIFY_TOKEN": "stub-token",
+        "PUSH_PLUS_TOKEN": "stub-token",
+        "WEBHOOK_URL": f"{base}/webhook?title=$title",
+        "WEBHOOK_METHOD": "POST",
+        "WEBHOOK_CONTENT_TYPE": "text/plain",
+        "WEBHOOK_BODY": "$content",
+        "HITOKOTO": "",
+        "NOTIFY_OUTBOX": "false",
+        "NOTIFY_DIGEST": "false",
+        "NOTIFY_SUPPRESS_WINDOW": 0,
+    })
+    if not keep_rate_limits:
+        notify.push_config["NOTIFY_RATE_LIMITS"] = ",".join(f"{name}=off" for name in notify.DEFAULT_RATE_LIMITS)
+
+    # 企业微信机器人与应用共用 QYWX_ORIGIN，按路径区分到不同桩
+    original_http = notify._http
+
+    def routed_http(method, url, **kwargs):
+        parts = urllib.parse.urlsplit(url)
+        if parts.netloc in HOST_REWRITES:
+            url = f"{base}/{HOST_REWRITES[parts.netloc]}{parts.path}?{parts.query}"
+        elif url.startswith(f"{base}/qywx/cgi-bin/webhook/"):
+            url = url.replace(f"{base}/qywx/", f"{base}/qywx-bot/", 1)
+        return original_http(method, url, **kwargs)
+
+    notify._http = routed_http
+
+
+def percentile(values, pct: float) -> float:
+    """最近秩百分位"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_batch(count: int, state: StubState):
+    state.reset()
+    latencies = []
+    outcomes = {}
+    start = time.perf_counter()
+    for i in range(count):
+        t0 = time.perf_counter()
+        results = notify.send(f"基准消息 {i + 1}", f"第 {i + 1}/{count} 条基准测试通知", severity="info") or {}
+        latencies.append((time.perf_counter() - t0) * 1000)
+        for name, result in results.items():
+            ok, failed = outcomes.get(name, (0, 0))
+            outcomes[name] = (ok + bool(result.get("ok")), failed + (not result.get("ok")))
+    elapsed = time.perf_counter() - start
+    return elapsed, latencies, outcomes, dict(state.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="notify 扇出基准（本地桩服务）")
+    parser.add_argument("--counts", default="1,5,10,20,50", help="每轮发送的消息条数，逗号分隔")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="桩服务基础延迟")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="桩服务随机附加延迟上限")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="桩服务返回失败的概率")
+    parser.add_argument("--slow", action="append", default=[], help="指定渠道固定延迟，如 feishu_bot=3000")
+    parser.add_argument("--deadline", type=float, default=None, help="覆盖 NOTIFY_DEADLINE（秒）")
+    parser.add_argument("--rate-limits", action="store_true", help="保留内置渠道限速（默认关闭以测量纯扇出耗时）")
+    parser.add_argument("--verbose", action="store_true", help="显示各渠道的推送日志")
+    args = parser.parse_args()
+
+    slow = {}
+    for item in args.slow:
+        name, _, ms = item.partition("=")
+        slow[name.strip()] = float(ms)
+    state = StubState(args.latency_ms, args.jitter_ms, args.error_rate, slow)
+    server, base = start_stub(state)
+    workdir = tempfile.mkdtemp(prefix="bench_notify_")
+    configure(base, workdir, args.rate_limits)
+    if args.deadline:
+        notify.push_config["NOTIFY_DEADLINE"] = args.deadline
+    if not args.verbose:
+        notify.print = lambda *a, **k: None
+
+    channels = [func.__name__ for func in notify.add_notify_function()]
+    print(f"桩服务: {base}，渠道 {len(channels)} 个: {', '.join(channels)}")
+    print(f"延迟 {args.latency_ms:.0f}+{args.jitter_ms:.0f}ms，错误率 {args.error_rate:.0%}"
+          f"{'，慢渠道 ' + str(slow) if slow else ''}\n")
+    print(f"{'条数':>4} {'总耗时(s)':>9} {'条/秒':>7} {'请求/秒':>8} {'p50(ms)':>8} {'p99(ms)':>8} {'失败':>5}")
+    failures_by_channel = {}
+    for count in (int(x) for x in args.counts.split(",") if x.strip()):
+        elapsed, latencies, outcomes, requests_made = run_batch(count, state)
+        failed = sum(f for _, f in outcomes.values())
+        for name, (_, f) in outcomes.items():
+            failures_by_channel[name] = failures_by_channel.get(name, 0) + f
+        print(
+            f"{count:>4} {elapsed:>9.2f} {count / elapsed:>7.1f} {sum(requests_made.values()) / elapsed:>8.1f} "
+            f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f} {failed:>5}"
+        )
+    if any(failures_by_channel.values()):
+        print("\n各渠道失败次数: " + ", ".join(
+            f"{name}={count}" for name, count in failures_by_channel.items() if count))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+NodeSeekClient 页面解析基准与回归检查（离线）
+
+使用仓库中的 page.html 以及按其结构生成的合成页面（分类页、10～2000 条评论的帖子页），
+在不访问网络的情况下调用 get_category_threads / get_thread_context，
+按页面解析后端（page_parser）统计解析耗时、峰值内存，并检查各后端输出是否与 bs4 一致。
+
+用法：python scripts/bench_parser.py [--backends bs4,lxml,selectolax,stream] [--repeat 5] [--sample-count 6]
+                                      [--dump 目录] [--save-baseline 文件] [--baseline 文件]
+- stream：帖子页流式解析（NS_THREAD_STREAM），“读取”列为实际读取的帖子页字节数
+- --dump：把生成的夹具页面写入目录，便于人工查看或在其他版本上复用
+- --save-baseline / --baseline：保存或对比解析结果，用于修改解析代码前后的回归检查（任一不一致时退出码为 1）
+- 另外单独对比分类页单遍提取器（page_parser.category_threads）与原先基于 BeautifulSoup 整页遍历的实现
+"""
+
+import argparse
+import base64
+import json
+import random
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# ensure project root on sys.path
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bs4 import BeautifulSoup
+
+import page_parser
+from nodeseek_client import NodeSeekClient
+
+SELF_MEMBER_ID = 16033
+CATEGORY_SIZES = (20, 200, 1000)
+LARGE_CATEGORY_SIZES = (5000,)
+COMMENT_SIZES = (10, 100, 500, 2000)
+WORDS = ("服务器", "线路", "测速", "延迟", "带宽", "优惠", "续费", "机房", "稳定", "性价比",
+         "IPv6", "CN2", "回程", "解锁", "流媒体", "教程", "求助", "分享", "评测", "补货")
+
+
+class FakeResponse:
+    """模拟 curl_cffi 响应；iter_content 按 STREAM_CHUNK 个字符分块并统计实际读取的字节数"""
+
+    STREAM_CHUNK = 16 * 1024
+
+    def __init__(self, text: str, status_code: int = 200):
+        self.text = text
+        self.status_code = status_code
+        self.charset_encoding = "utf-8"
+        self.bytes_read = 0
+        self.closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self):
+        for offset in range(0, len(self.text), self.STREAM_CHUNK):
+            if self.closed:
+                return
+            chunk = self.text[offset:offset + self.STREAM_CHUNK].encode("utf-8")
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return "".join(rng.choice(WORDS) for _ in range(words)) + "。"
+
+
+def _shell(title: str, body: str) -> str:
+    """按 page.html 的头部与导航结构包装页面主体"""
+    page = (ROOT / "page.html").read_text(encoding="utf-8")
+    head_end = page.index("<body")
+    nav = ''.join(f'<a href="/categories/{c}">{c}</a>' for c in
+                  ("daily", "tech", "info", "review", "trade", "carpool", "promotion"))
+    head = page[:head_end].replace("几个Gmail被多号关联，解封不了，怎么搞？", title)
+    return f'{head}<body class="bg1 light-layout"><header><div id="nsk-head">{nav}</div></header>{body}</body></html>'
+
+
+def make_category_page(count: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        tid = 400000 + i * 7
+        uid = rng.randint(1000, 60000)
+        title = _sentence(rng, rng.randint(3, 8))
+        items.append(
+            f'<li class="post-list-item"><div class="post-list-content"><div class="post-title">'
+            f'<a href="/post-{tid}-1">{title}</a></div><div class="post-info">'
+            f'<a href="/space/{uid}" class="info-author">user{uid}</a> '
+            f'<a href="/post-{tid}-{rng.randint(1, 9)}#last">最后回复</a></div></div></li>'
+        )
+        # 置顶区与列表中重复出现的链接
+        if i % 25 == 0:
+            items.append(f'<li class="pinned"><a href="/t/{tid}"> {title} </a></li>')
+    pager = "".join(f'<a href="/categories/tech/page-{p}">{p}</a>' for p in range(1, 8))
+    body = f'<div id="nsk-body"><ul class="post-list">{"".join(items)}</ul><div class="nsk-pager">{pager}</div></div>'
+    return _shell("技术 - NodeSeek", body)
+
+
+def make_thread_page(comments: int, seed: int = 2) -> str:
+    rng = random.Random(seed)
+    title = f"合成帖子 {comments} 条评论"
+    op = "".join(f"<p>{_sentence(rng, rng.randint(8, 20))}</p>" for _ in range(6))
+    items = []
+    for floor in range(1, comments + 1):
+        uid = SELF_MEMBER_ID if floor == comments // 2 else rng.randint(1000, 60000)
+        text = "".join(f"<p>{_sentence(rng, rng.randint(1, 12))}</p>" for _ in range(rng.randint(1, 3)))
+        items.append(
+            f'<li class="content-item" data-comment-id="{6000000 + floor}" id="{floor}">'
+            f'<div class="nsk-content-meta-info"><div class="avatar-wrapper"><a href="/space/{uid}" title="u{uid}">'
+            f'<img alt="u{uid}" class="avatar-normal" src="/avatar/{uid}.png"/></a></div> <div><div class="author-info">'
+            f'<a class="author-name" href="/space/{uid}">u{uid}</a><!-- --></div> <div class="content-info">'
+            f'<span class="date-created"><time datetime="2025-09-20T14:37:15.000Z">1h ago</time></span></div></div>'
+            f' <div class="floor-link-wrapper"><a class="floor-link" href="#{floor}">#{floor}</a></div></div>'
+            f' <article class="post-content">{text}</article> <div class="comment-menu-mount"></div></li>'
+        )
+    body = (
+        f'<div id="nsk-body"><div class="nsk-post"><div class="post-title"><h1>'
+        f'<a class="post-title-link" href="/post-500000-1">{title}</a></h1></div>'
+        f'<article class="post-content">{op}</article></div>'
+        f'<meta name="csrf-token" content="synthetic-csrf-{comments}">'
+        f'<div class="comment-container"><ul class="comments">{"".join(items)}</ul></div></div>'
+    )
+    return _shell(title, body)
+
+
+def make_home_page() -> str:
+    config = base64.b64encode(json.dumps({"user": {"member_id": SELF_MEMBER_ID}}).encode("utf-8")).decode("ascii")
+    return _shell("NodeSeek", f'<div id="nsk-body"></div><script id="temp-script" type="text/plain">{config}</script>')
+
+
+def build_fixtures():
+    """返回 [(名称, 类型, html)]"""
+    fixtures = [("page.html", "thread", (ROOT / "page.html").read_text(encoding="utf-8"))]
+    fixtures += [(f"category-{n}", "category", make_category_page(n)) for n in CATEGORY_SIZES]
+    fixtures += [(f"thread-{n}", "thread", make_thread_page(n)) for n in COMMENT_SIZES]
+    return fixtures
+
+
+def make_client(html: str, home: str, parser, stream: bool = False, responses=None) -> NodeSeekClient:
+    client = NodeSeekClient("")
+    client.parser = parser
+    client.stream_threads = stream
+
+    def fake_request(method, url, **kwargs):
+        resp = FakeResponse(home if url.rstrip("/") == NodeSeekClient.BASE else html)
+        if responses is not None and resp.text is html:
+            responses.append(resp)
+        return resp
+
+    client._request = fake_request
+    return client
+
+
+def parse(kind: str, html: str, home: str, parser, stream: bool, sample_count: int):
+    """返回 (解析结果, 帖子页读取字节数)"""
+    responses = []
+    client = make_client(html, home, parser, stream, responses)
+    if kind == "category":
+        result = client.get_category_threads("tech")
+    else:
+        result = client.get_thread_context(f"{NodeSeekClient.BASE}/post-500000-1", sample_count=sample_count)
+    read = sum(r.bytes_read if stream else len(r.text.encode("utf-8")) for r in responses)
+    return result, read
+
+
+def measure(kind: str, html: str, home: str, parser, stream: bool, repeat: int, sample_count: int):
+    best = float("inf")
+    result, read = None, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result, read = parse(kind, html, home, parser, stream, sample_count)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    parse(kind, html, home, parser, stream, sample_count)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, read, result
+
+
+def legacy_category_threads(html: str):
+    """user-023 之前的 get_category_threads 解析部分：BeautifulSoup 整页遍历 <a>，结束后再去重"""
+    soup = BeautifulSoup(html, "html.parser")
+    threads = []
+    for a in soup.find_all("a", href=True):
+        href = a.get("href", "")
+        if not href:
+            continue
+        full = href if href.startswith("http") else f"{NodeSeekClient.BASE}{href if href.startswith('/') else '/' + href}"
+        m_t = re.search(r"/t/(\d+)", href)
+        m_p = re.search(r"/post-(\d+)(?:-[0-9]+)?", href)
+        thread_id = None
+        if m_t:
+            thread_id = int(m_t.group(1))
+        elif m_p:
+            thread_id = int(m_p.group(1))
+        if thread_id:
+            title = a.get_text(strip=True)
+            if title:
+                threads.append({"title": title, "url": full, "thread_id": thread_id})
+    seen = set()
+    uniq = []
+    for t in threads:
+        if t["thread_id"] in seen:
+            continue
+        seen.add(t["thread_id"])
+        uniq.append(t)
+    return uniq
+
+
+def timed(func, html: str, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(html)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def bench_category(fixtures, repeat: int) -> int:
+    """对比分类页单遍提取器与旧实现，返回不一致的夹具数"""
+    pages = [(name, html) for name, kind, html in fixtures if kind == "category" or name == "page.html"]
+    pages += [(f"category-{n}", make_category_page(n)) for n in LARGE_CATEGORY_SIZES]
+    implementations = (
+        ("旧实现", legacy_category_threads),
+        ("单遍提取", lambda html: page_parser.category_threads(html, NodeSeekClient.BASE)),
+    )
+    mismatches = 0
+    print(f"\n分类页链接提取\n{'夹具':<16}{'大小(KB)':>9}  {'实现':<10}{'耗时(ms)':>10}{'峰值内存(MB)':>14}{'帖子数':>8}  一致")
+    for name, html in pages:
+        reference = None
+        for label, func in implementations:
+            best, peak, result = timed(func, html, repeat)
+            reference = result if reference is None else reference
+            same = result == reference
+            mismatches += not same
+            print(f"{name:<16}{len(html) / 1024:>9.1f}  {label:<10}{best * 1000:>10.2f}"
+                  f"{peak / 1024 / 1024:>14.2f}{len(result):>8}  {'是' if same else '否'}")
+    return mismatches
+
+
+def load_backend(name: str):
+    """按名称创建解析后端，未知或未安装时返回 None；stream 为帖子页流式解析（首页仍用默认后端）"""
+    if name == "stream":
+        return page_parser.get_parser()
+    cls = page_parser.PARSERS.get(name)
+    if cls is None:
+        return None
+    try:
+        return cls()
+    except ImportError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NodeSeekClient 解析基准（离线）")
+    parser.add_argument("--backends", default="bs4,lxml,selectolax,stream",
+                        help=f"解析后端，逗号分隔，可选 {','.join(page_parser.BACKENDS)},stream")
+    parser.add_argument("--repeat", type=int, default=5, help="每项取最快一次的重复次数")
+    parser.add_argument("--sample-count", type=int, default=6, help="get_thread_context 采样评论数（调大可覆盖全部评论）")
+    parser.add_argument("--dump", help="把夹具页面写入该目录")
+    parser.add_argument("--save-baseline", help="把第一个后端（默认 bs4）的解析结果保存为 JSON")
+    parser.add_argument("--baseline", help="与之前保存的解析结果对比")
+    args = parser.parse_args()
+
+    fixtures = build_fixtures()
+    home = make_home_page()
+    if args.dump:
+        out = Path(args.dump)
+        out.mkdir(parents=True, exist_ok=True)
+        for name, _, html in fixtures:
+            (out / (name if name.endswith(".html") else f"{name}.html")).write_text(html, encoding="utf-8")
+        (out / "home.html").write_text(home, encoding="utf-8")
+        print(f"夹具已写入 {out}")
+
+    backends = {}
+    missing = []
+    for name in (b.strip() for b in args.backends.split(",") if b.strip()):
+        backend = load_backend(name)
+        if backend is None:
+            missing.append(name)
+        else:
+            backends[name] = backend
+    if missing:
+        print(f"未知或未安装的后端（跳过）: {', '.join(missing)}")
+    reference = {}
+    mismatches = 0
+    print(f"{'夹具':<16}{'大小(KB)':>9}  {'后端':<12}{'耗时(ms)':>10}{'峰值内存(MB)':>14}{'读取(KB)':>10}  一致")
+    for name, kind, html in fixtures:
+        for backend_name, backend in backends.items():
+            stream = backend_name == "stream"
+            if stream and kind == "category":
+                continue
+            best, peak, read, result = measure(kind, html, home, backend, stream, args.repeat, args.sample_count)
+            reference.setdefault(name, result)
+            same = result == reference[name]
+            mismatches += not same
+            print(f"{name:<16}{len(html) / 1024:>9.1f}  {backend_name:<12}{best * 1000:>10.2f}"
+                  f"{peak / 1024 / 1024:>14.2f}{read / 1024:>10.1f}  {'是' if same else '否'}")
+
+    mismatches += bench_category(fixtures, args.repeat)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(reference, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"解析结果已保存到 {args.save_baseline}")
+    if args.baseline:
+        saved = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        changed = [name for name in reference if name in saved and saved[name] != json.loads(json.dumps(reference[name]))]
+        mismatches += len(changed)
+        print(f"与基线对比: {'全部一致' if not changed else '不一致: ' + ', '.join(changed)}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
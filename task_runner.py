@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+import datetime
+import importlib
+import subprocess
+import threading
+from datetime import timezone, timedelta
+
+GMT8 = timezone(timedelta(hours=8))
+
+# 任务执行方式：
+# - subprocess: 每次启动新的 Python 解释器执行脚本（默认，进程级隔离）
+# - inprocess: 在调度器进程内导入一次任务模块并直接调用入口函数，免去重复的解释器启动与依赖导入。
+#   任务模块只导入一次，模块级读取的环境变量（如 NS_CREDIT_MAX_PAGES、NS_SIGN_JOURNAL_PATH）
+#   保持首次导入时的值，SIGHUP 重新加载配置不会刷新它们，修改后需重启调度器。
+TASK_RUNNER = os.environ.get("NS_TASK_RUNNER", "subprocess").strip().lower()
+
+
+def _parse_timeout(value):
+    try:
+        timeout = float(value)
+    except (TypeError, ValueError):
+        return 1800.0
+    return timeout if timeout > 0 else None
+
+
+TASK_TIMEOUT = _parse_timeout(os.environ.get("NS_TASK_TIMEOUT", "1800"))
+
+_loaded_modules = {}
+_import_seconds = {}
+# 进程内模式下各模块正在执行的任务线程：超时后线程无法强制终止，仍在运行时拒绝再次启动同一任务
+_running_threads = {}
+_running_lock = threading.Lock()
+
+
+def _now_str():
+    return datetime.datetime.now(GMT8).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def load_task_module(module_name):
+    module = _loaded_modules.get(module_name)
+    if module is not None:
+        print(f"复用已加载的 {module_name} 模块（首次导入耗时 {_import_seconds[module_name]:.2f} 秒，"
+              f"子进程模式每次运行都要重新导入）", flush=True)
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    _import_seconds[module_name] = time.perf_counter() - start
+    _loaded_modules[module_name] = module
+    print(f"首次加载 {module_name} 模块，耗时 {_import_seconds[module_name]:.2f} 秒", flush=True)
+    return module
+
+
+def run_inprocess(module_name, entry="main", timeout=TASK_TIMEOUT, **kwargs):
+    """
+    在当前进程内调用 module_name.entry(**kwargs)。
+    任务在独立线程中执行，异常（包括 SystemExit）被捕获在任务边界内，超时后调度器不再等待。
+    同一模块上次超时的线程仍在运行时跳过本次执行。
+    返回是否成功完成。
+    """
+    outcome = {}
+
+    def target():
+        try:
+            getattr(load_task_module(module_name), entry)(**kwargs)
+            outcome["ok"] = True
+        except SystemExit as e:
+            outcome["ok"] = e.code in (None, 0)
+            if not outcome["ok"]:
+                outcome["error"] = f"退出码 {e.code}"
+        except BaseException as e:
+            outcome["ok"] = False
+            outcome["error"] = f"{type(e).__name__}: {e}"
+
+    with _running_lock:
+        previous = _running_threads.get(module_name)
+        if previous is not None and previous.is_alive():
+            print(f"任务 {module_name} 上次执行的线程仍在运行，跳过本次执行", flush=True)
+            return False
+        worker = threading.Thread(target=target, name=f"task-{module_name}", daemon=True)
+        _running_threads[module_name] = worker
+        start = time.perf_counter()
+        worker.start()
+    worker.join(timeout)
+    elapsed = time.perf_counter() - start
+    if worker.is_alive():
+        print(f"任务 {module_name} 超过 {timeout:.0f} 秒未完成，调度器不再等待（任务线程仍在后台运行，"
+              f"结束前不会再次启动该任务）", flush=True)
+        return False
+    if not outcome.get("ok"):
+        print(f"任务 {module_name} 执行失败: {outcome.get('error')}", flush=True)
+        return False
+    print(f"任务 {module_name} 进程内执行完毕，耗时 {elapsed:.2f} 秒", flush=True)
+    return True
+
+
+def run_subprocess(script, timeout=TASK_TIMEOUT, args=()):
+    """以子进程方式执行脚本，返回是否成功完成"""
+    start = time.perf_counter()
+    try:
+        subprocess.run([sys.executable, script, *args], check=True, timeout=timeout)
+    except FileNotFoundError:
+        print(f"错误: '{script}' 未找到。请确保它与调度脚本位于同一目录。", flush=True)
+        return False
+    except subprocess.TimeoutExpired:
+        print(f"任务 {script} 超过 {timeout:.0f} 秒未完成，已终止", flush=True)
+        return False
+    except subprocess.CalledProcessError as e:
+        print(f"任务 {script} 执行失败，返回码: {e.returncode}", flush=True)
+        return False
+    except Exception as e:
+        print(f"执行任务 {script} 时发生未知错误: {e}", flush=True)
+        return False
+    print(f"任务 {script} 子进程执行完毕，耗时 {time.perf_counter() - start:.2f} 秒", flush=True)
+    return True
+
+
+def run_task(script, label, entry="main", args=(), **kwargs):
+    """
+    按 NS_TASK_RUNNER 选择执行方式运行任务脚本（如 'nodeseek_sign.py'）。
+    进程内模式以 kwargs 调用模块的 entry 函数，子进程模式把 args 作为命令行参数传给脚本。
+    """
+    print(f"[{_now_str()}] 开始执行{label}...", flush=True)
+    if TASK_RUNNER == "inprocess":
+        ok = run_inprocess(os.path.splitext(os.path.basename(script))[0], entry=entry, **kwargs)
+    else:
+        ok = run_subprocess(script, args=args)
+    if ok:
+        print(f"[{_now_str()}] {label}执行完毕。", flush=True)
+    return ok
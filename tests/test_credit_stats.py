@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""credit_stats 解析与聚合的离线测试"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from credit_stats import (CATEGORY_OTHER, CATEGORY_SIGNIN, DAY_SECONDS, GMT8_OFFSET,
+                          aggregate, classify, parse_epoch, parse_epochs)
+
+
+@pytest.mark.parametrize("timestamp", [
+    "2025-10-18T03:04:05.000Z",
+    "2025-10-18T03:04:05Z",
+    "2025-10-18T03:04:05.123456Z",
+    "2025-10-18T11:04:05+08:00",
+    "2025-10-18T03:04:05.000+00:00",
+])
+def test_parse_epoch_matches_datetime(timestamp):
+    expected = int(datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp())
+    assert parse_epoch(timestamp) == expected
+    assert parse_epochs([timestamp]) == [expected]
+
+
+def test_classify():
+    assert classify("签到收益5个鸡腿") == CATEGORY_SIGNIN
+    assert classify("签到收益") == CATEGORY_OTHER
+    assert classify("评论奖励") == CATEGORY_OTHER
+
+
+def _row(when, amount, description):
+    return (int(when.timestamp()), amount, 0, description)
+
+
+def test_aggregate_window_breakdown_and_streaks():
+    # 以 GMT+8 当天正午为基准，保证同一天的记录不会跨日
+    today = (int(time.time()) + GMT8_OFFSET) // DAY_SECONDS
+    noon = datetime.fromtimestamp(today * DAY_SECONDS - GMT8_OFFSET + 12 * 3600, timezone.utc)
+    rows = [
+        _row(noon, 5, "签到收益5个鸡腿"),
+        _row(noon - timedelta(hours=1), -3, "转账"),
+        _row(noon - timedelta(days=1), 2.5, "签到收益2.5个鸡腿"),
+        _row(noon - timedelta(days=3), 4, "签到收益4个鸡腿"),
+        _row(noon - timedelta(days=4), 1, "签到收益1个鸡腿"),
+        _row(noon - timedelta(days=40), 9, "签到收益9个鸡腿"),
+    ]
+    stats = aggregate(rows, since_epoch=int((noon - timedelta(days=30)).timestamp()))
+    assert stats["total_amount"] == 12.5
+    assert stats["days_count"] == 4
+    assert stats["average"] == 3.12
+    assert stats["current_streak"] == 2
+    assert stats["longest_streak"] == 2
+    assert stats["by_category"] == {
+        "其他": {"count": 1, "amount": -3},
+        "签到收益": {"count": 4, "amount": 12.5},
+    }
+    assert [r["amount"] for r in stats["records"]] == [5, 2.5, 4, 1]
+    assert list(stats["daily"]) == sorted(stats["daily"])
+
+    everything = aggregate(rows)
+    assert everything["days_count"] == 5
+    assert everything["total_amount"] == 21.5
+
+
+def test_aggregate_stops_at_window_boundary():
+    now = datetime.now(timezone.utc)
+    old = _row(now - timedelta(days=10), 1, "签到收益1个鸡腿")
+    # 倒序排列时越过起点即停止，起点之后的乱序记录不再计入
+    rows = [_row(now, 3, "签到收益3个鸡腿"), old, _row(now, 7, "签到收益7个鸡腿")]
+    stats = aggregate(rows, since_epoch=int((now - timedelta(days=1)).timestamp()))
+    assert stats["total_amount"] == 3
+    assert aggregate([], since_epoch=0)["days_count"] == 0
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""收支记录逐页抓取与本地账本增量同步的离线测试（用假的传输层代替接口）"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import nodeseek_sign
+from credit_ledger import CreditLedger
+from nodeseek_sign import iter_credit_records, stop_before, sync_credit_ledger
+
+NOW = datetime(2025, 10, 18, 12, 0, tzinfo=timezone.utc)
+PAGE_SIZE = 15
+
+
+def make_history(count, start=NOW):
+    """每 6 小时一条，按时间倒序的接口格式记录 [amount, balance, description, timestamp]"""
+    records = []
+    for i in range(count):
+        ts = (start - timedelta(hours=6 * i)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        records.append([5, 1000 - i, f"签到收益5个鸡腿 #{count - i}", ts])
+    return records
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class FakeTransport:
+    def __init__(self, records, fail_page=None, error=None):
+        self.records = records
+        self.fail_page = fail_page
+        self.error = error
+        self.pages = []
+
+    def get(self, url, headers=None):
+        page = int(url.rsplit("-", 1)[1])
+        self.pages.append(page)
+        if page == self.fail_page:
+            if self.error is not None:
+                raise self.error
+            return FakeResponse({"success": False, "message": "boom"})
+        start = (page - 1) * PAGE_SIZE
+        return FakeResponse({"success": True, "data": self.records[start:start + PAGE_SIZE]})
+
+
+@pytest.fixture(autouse=True)
+def no_page_delay(monkeypatch):
+    monkeypatch.setattr(nodeseek_sign.time, "sleep", lambda seconds: None)
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = CreditLedger(str(tmp_path / "credit_ledger.db"))
+    yield ledger
+    ledger.close()
+
+
+def epoch(dt):
+    return int(dt.timestamp())
+
+
+def test_iter_stops_without_fetching_further_pages():
+    transport = FakeTransport(make_history(100))
+    since = epoch(NOW - timedelta(days=2))
+    rows = list(iter_credit_records(transport, {}, stop=stop_before(since)))
+    assert len(rows) == 9
+    assert all(e >= since for e, _ in rows)
+    assert transport.pages == [1]
+
+
+def test_backfill_then_incremental_sync(ledger):
+    history = make_history(100)
+    query_start = NOW - timedelta(days=10)
+
+    transport = FakeTransport(history)
+    sync_credit_ledger(transport, ledger, "a", {}, query_start)
+    assert transport.pages == [1, 2, 3]
+    assert ledger.covered_since("a") == epoch(query_start)
+    assert len(ledger.rows_since("a", 0)) == 41
+
+    # 新增 3 条记录：只需抓第1页，遇到已入库的记录即停止，覆盖范围不变
+    newer = make_history(3, start=NOW + timedelta(hours=18))
+    transport = FakeTransport(newer + history)
+    sync_credit_ledger(transport, ledger, "a", {}, NOW - timedelta(days=5))
+    assert transport.pages == [1]
+    assert ledger.covered_since("a") == epoch(query_start)
+    assert len(ledger.rows_since("a", 0)) == 44
+
+    # 查询范围早于已覆盖的时间：继续回溯直到覆盖查询起点
+    transport = FakeTransport(newer + history)
+    sync_credit_ledger(transport, ledger, "a", {}, NOW - timedelta(days=20))
+    assert transport.pages == [1, 2, 3, 4, 5, 6]
+    assert ledger.covered_since("a") == epoch(NOW - timedelta(days=20))
+    assert len(ledger.rows_since("a", 0)) == 84
+
+
+def test_exhausted_history_covers_everything(ledger):
+    transport = FakeTransport(make_history(20))
+    sync_credit_ledger(transport, ledger, "a", {}, NOW - timedelta(days=365))
+    assert transport.pages == [1, 2, 3]
+    assert ledger.covered_since("a") == 0
+
+
+def test_page_limit_covers_only_fetched_range(ledger, monkeypatch):
+    monkeypatch.setattr(nodeseek_sign, "CREDIT_MAX_PAGES", 2)
+    history = make_history(100)
+    sync_credit_ledger(FakeTransport(history), ledger, "a", {}, NOW - timedelta(days=365))
+    assert ledger.covered_since("a") == nodeseek_sign.parse_epoch(history[29][3])
+
+
+def test_page_error_keeps_fetched_records_but_not_coverage(ledger):
+    transport = FakeTransport(make_history(100), fail_page=2)
+    sync_credit_ledger(transport, ledger, "a", {}, NOW - timedelta(days=10))
+    assert ledger.covered_since("a") is None
+    assert len(ledger.rows_since("a", 0)) == PAGE_SIZE
+
+
+@pytest.mark.parametrize("error", [None, ConnectionError("reset")])
+def test_incremental_page_error_leaves_no_gap(ledger, error):
+    old = make_history(56)
+    sync_credit_ledger(FakeTransport(old), ledger, "a", {}, NOW - timedelta(days=365))
+    assert ledger.covered_since("a") == 0
+
+    # 新增 25 条，增量同步需要两页；第2页失败（接口失败或请求异常）时不保存第1页，避免在原有最新记录前留下缺口
+    newer = make_history(25, start=NOW + timedelta(hours=6 * 25))
+    history = newer + old
+    sync_credit_ledger(FakeTransport(history, fail_page=2, error=error), ledger, "a", {}, NOW - timedelta(days=5))
+    assert len(ledger.rows_since("a", 0)) == 56
+    assert ledger.covered_since("a") == 0
+
+    transport = FakeTransport(history)
+    sync_credit_ledger(transport, ledger, "a", {}, NOW - timedelta(days=5))
+    assert transport.pages == [1, 2]
+    assert len(ledger.rows_since("a", 0)) == 81
+
+
+@pytest.mark.parametrize("fail_page, rows", [(3, 41), (2, 21)])
+def test_backfill_error_keeps_only_records_reaching_known_head(ledger, fail_page, rows):
+    history = make_history(100)
+    sync_credit_ledger(FakeTransport(history[20:]), ledger, "a", {}, NOW - timedelta(days=10))
+    assert len(ledger.rows_since("a", 0)) == 21
+
+    # 回溯更早的范围时中断：已抓部分越过原有最新记录（第3页失败）才与本地数据衔接并保存，
+    # 第2页失败时已抓的15条都比原有最新记录新，中间留有缺口，不保存
+    transport = FakeTransport(history, fail_page=fail_page, error=ConnectionError("reset"))
+    sync_credit_ledger(transport, ledger, "a", {}, NOW - timedelta(days=30))
+    assert len(ledger.rows_since("a", 0)) == rows
+    assert ledger.covered_since("a") == epoch(NOW - timedelta(days=10))
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""http_retry 重试策略的离线测试"""
+
+import pytest
+
+import http_retry
+from http_retry import RetryPolicy, parse_float, parse_int
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.setenv("NS_HTTP_RETRY", "2")
+    monkeypatch.setattr(http_retry.time, "sleep", lambda seconds: None)
+    return RetryPolicy()
+
+
+def make_send(statuses):
+    calls = []
+
+    def send(**kwargs):
+        calls.append(kwargs)
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        if isinstance(status, Exception):
+            raise status
+        return FakeResponse(status)
+
+    return send, calls
+
+
+def test_parse_helpers_apply_default_and_minimum():
+    assert parse_int(None, 5) == 5
+    assert parse_int("abc", 5) == 5
+    assert parse_int("-3", 5, minimum=1) == 1
+    assert parse_float("2.5", 1.0) == 2.5
+    assert parse_float("0.1", 1.0, minimum=5.0) == 5.0
+
+
+def test_get_retries_5xx_until_success(policy):
+    send, calls = make_send([502, 503, 200])
+    resp = policy.request(send, "GET", "https://example.invalid/")
+    assert resp.status_code == 200
+    assert len(calls) == 3
+    assert calls[0]["timeout"] == policy.timeout
+
+
+def test_post_is_not_retried_by_default(policy):
+    send, calls = make_send([502, 200])
+    assert policy.request(send, "POST", "https://example.invalid/").status_code == 502
+    assert len(calls) == 1
+
+    send, calls = make_send([ConnectionError("reset"), 200])
+    with pytest.raises(ConnectionError):
+        policy.request(send, "POST", "https://example.invalid/")
+    assert len(calls) == 1
+
+
+def test_post_retry_is_opt_in(policy):
+    send, calls = make_send([502, 200])
+    assert policy.request(send, "POST", "https://example.invalid/", retry=True).status_code == 200
+    assert len(calls) == 2
+
+
+def test_callbacks_and_last_response(policy):
+    send, calls = make_send([500])
+    seen, retries = [], []
+    resp = policy.request(send, "GET", "https://example.invalid/",
+                          on_response=seen.append, on_retry=lambda: retries.append(1))
+    assert resp.status_code == 500
+    assert len(calls) == len(seen) == 3
+    assert len(retries) == 2
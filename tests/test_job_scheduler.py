@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""job_scheduler 运行时间解析与调度循环的离线测试"""
+
+import datetime
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+import job_scheduler
+from job_scheduler import GMT8, Job, JobScheduler, calculate_next_run_time, parse_cron, parse_run_spec
+
+
+def weekdays(spec):
+    return parse_cron(f"0 9 * * {spec}")[0][4]
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("*", (0, 1, 2, 3, 4, 5, 6)),
+    ("0", (0,)),
+    ("7", (0,)),
+    ("1-7", (0, 1, 2, 3, 4, 5, 6)),
+    ("5-7", (0, 5, 6)),
+    ("1-5", (1, 2, 3, 4, 5)),
+    ("0,7", (0,)),
+    ("*/2", (0, 2, 4, 6)),
+])
+def test_cron_weekday_field(spec, expected):
+    assert weekdays(spec) == expected
+
+
+@pytest.mark.parametrize("value", ["0 9 * * 8", "60 9 * * *", "0 9 * *", "0 9 */0 * *", "0 9 5-1 * *"])
+def test_invalid_cron(value):
+    with pytest.raises(ValueError):
+        parse_cron(value)
+
+
+def test_parse_run_spec():
+    assert parse_run_spec("09:30") == ("fixed", "09:30")
+    assert parse_run_spec("09:00-21:00") == ("range", "09:00-21:00")
+    assert parse_run_spec("every 6H") == ("interval", "6h")
+    assert parse_run_spec("30 9 * * 1-7") == ("cron", "30 9 * * 1-7")
+    assert parse_run_spec("whenever") is None
+
+
+def test_next_cron_time_sunday_as_seven():
+    saturday = datetime.datetime(2025, 10, 18, 10, 0, tzinfo=GMT8)
+    nxt = calculate_next_run_time("cron", "30 9 * * 7", now=saturday)
+    assert nxt == datetime.datetime(2025, 10, 19, 9, 30, tzinfo=GMT8)
+    nxt = calculate_next_run_time("cron", "30 9 * * 5-7", now=saturday)
+    assert nxt == datetime.datetime(2025, 10, 19, 9, 30, tzinfo=GMT8)
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    calls = {"completed": [], "planned": []}
+    monkeypatch.setattr(job_scheduler, "mark_completed", lambda name: calls["completed"].append(name))
+    monkeypatch.setattr(job_scheduler, "save_planned_run",
+                        lambda name, spec, target: calls["planned"].append(name))
+    return calls
+
+
+@pytest.mark.parametrize("action, completed", [
+    (lambda target: None, ["job"]),
+    (lambda target: True, ["job"]),
+    (lambda target: False, []),
+    (lambda target: 1 / 0, []),
+])
+def test_mark_completed_only_on_success(recorded, action, completed):
+    scheduler = JobScheduler(lambda: [])
+    target = datetime.datetime.now(GMT8)
+    scheduler._run_job(Job("job", action, "interval", "1h"), target)
+    assert recorded["completed"] == completed
+    # 无论成败都计划下一次运行
+    assert recorded["planned"] == ["job"]
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="需要 SIGHUP")
+def test_sighup_wakes_sleep():
+    scheduler = JobScheduler(lambda: [])
+    previous = signal.getsignal(signal.SIGHUP)
+    scheduler.install_signal_handlers()
+    try:
+        timer = threading.Timer(0.1, os.kill, (os.getpid(), signal.SIGHUP))
+        timer.start()
+        start = time.monotonic()
+        scheduler._sleep(10)
+        assert time.monotonic() - start < 5
+        assert scheduler._reload_requested
+    finally:
+        signal.signal(signal.SIGHUP, previous)
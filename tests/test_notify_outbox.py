@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""notify_outbox 幂等键、租约、按步骤组转交备用渠道与分片续传的离线测试"""
+
+import time
+
+import pytest
+
+import notify
+import notify_outbox
+from notify_outbox import NotificationOutbox, make_idempotency_key
+
+
+class FakeChannel:
+    """按名称伪装成 notify 渠道函数，记录收到的分片；fail_on 中的序号（从 1 开始）返回失败"""
+
+    def __init__(self, name, fail_on=()):
+        self.__name__ = name
+        self.fail_on = set(fail_on)
+        self.calls = []
+
+    def __call__(self, title, content):
+        self.calls.append(title)
+        return len(self.calls) not in self.fail_on
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    monkeypatch.setattr(notify, "_reserve", lambda name: 0.0)
+    box = NotificationOutbox(str(tmp_path / "outbox.db"), max_attempts=3, failover_attempts=2)
+    yield box
+    box._conn.close()
+
+
+def use_channels(monkeypatch, *channels):
+    monkeypatch.setattr(notify, "add_notify_function", lambda quiet=False: list(channels))
+
+
+def make_due(outbox):
+    with outbox._lock:
+        outbox._conn.execute("UPDATE outbox SET next_attempt = 0 WHERE status = 'pending'")
+        outbox._conn.commit()
+
+
+def statuses(outbox):
+    with outbox._lock:
+        return dict(outbox._conn.execute("SELECT channel, status FROM outbox").fetchall())
+
+
+def test_idempotency_key_is_scoped_to_run():
+    assert make_idempotency_key("t", "c", run_id="a") == make_idempotency_key("t", "c", run_id="a")
+    assert make_idempotency_key("t", "c", run_id="a") != make_idempotency_key("t", "c", run_id="b")
+    assert make_idempotency_key("t", "c") == make_idempotency_key("t", "c", run_id=notify_outbox.current_run_id())
+
+
+def test_enqueue_dedupes_same_key(outbox):
+    assert outbox.enqueue("t", "c", ["bark"], "k1") == {"bark": True}
+    assert outbox.enqueue("t", "c", ["bark"], "k1") == {"bark": False}
+    assert outbox.enqueue("t", "c", ["bark"], "k2") == {"bark": True}
+
+
+def test_lease_blocks_second_claim_until_expired(outbox):
+    outbox.enqueue("t", "c", ["bark"], "k")
+    assert len(outbox._claim_due()) == 1
+    assert outbox._claim_due() == []
+    with outbox._lock:
+        outbox._conn.execute("UPDATE outbox SET lease_until = ?", (time.time() - 1,))
+        outbox._conn.commit()
+    assert len(outbox._claim_due()) == 1
+
+
+def test_failover_to_backup_channel_after_retries(outbox, monkeypatch):
+    primary = FakeChannel("bark", fail_on={1, 2})
+    backup = FakeChannel("gotify")
+    use_channels(monkeypatch, primary, backup)
+    outbox.enqueue("t", "c", ["bark"], "k", fallback="gotify")
+    # 第一次失败先按退避重试，不立即切换
+    assert outbox.drain_once() == 1
+    assert statuses(outbox) == {"bark": "pending"}
+
+    make_due(outbox)
+    assert outbox.drain_once() == 2
+    assert statuses(outbox) == {"bark": "failover", "gotify": "sent"}
+    assert len(primary.calls) == 2 and len(backup.calls) == 1
+
+
+def test_sibling_success_prevents_failover(outbox, monkeypatch):
+    failing = FakeChannel("bark", fail_on={1, 2})
+    sibling = FakeChannel("gotify")
+    backup = FakeChannel("ntfy")
+    use_channels(monkeypatch, failing, sibling, backup)
+    outbox.enqueue("t", "c", ["bark", "gotify"], "k", fallback="ntfy")
+    outbox.drain_once()
+    make_due(outbox)
+    outbox.drain_once()
+    assert statuses(outbox) == {"bark": "failover", "gotify": "sent"}
+    assert backup.calls == []
+
+
+def test_failover_waits_for_whole_group(outbox, monkeypatch):
+    first = FakeChannel("bark", fail_on={1, 2})
+    second = FakeChannel("gotify", fail_on={1, 2, 3})
+    backup = FakeChannel("ntfy")
+    use_channels(monkeypatch, first, second, backup)
+    outbox.enqueue("t", "c", ["bark", "gotify"], "k", fallback="ntfy")
+    outbox.drain_once()
+    make_due(outbox)
+    outbox.drain_once()
+    assert statuses(outbox) == {"bark": "failover", "gotify": "failover", "ntfy": "sent"}
+    assert len(backup.calls) == 1
+
+
+def test_group_is_delivered_concurrently_through_deliver(outbox, monkeypatch):
+    calls = []
+    deliver = notify.deliver
+
+    def recording_deliver(funcs, title, content, resume=None):
+        calls.append(sorted(func.__name__ for func in funcs))
+        return deliver(funcs, title, content, resume=resume)
+
+    monkeypatch.setattr(notify, "deliver", recording_deliver)
+    use_channels(monkeypatch, FakeChannel("bark"), FakeChannel("gotify"))
+    outbox.enqueue("t", "c", ["bark", "gotify"], "k")
+    assert outbox.drain_once() == 2
+    assert calls == [["bark", "gotify"]]
+    assert statuses(outbox) == {"bark": "sent", "gotify": "sent"}
+
+
+def test_drain_runs_inline_when_pool_is_shut_down(outbox, monkeypatch):
+    class ClosedPool:
+        def submit(self, fn, *args):
+            raise RuntimeError("cannot schedule new futures after interpreter shutdown")
+
+    # 进程退出阶段（atexit）线程池已关闭，投递改在当前线程执行
+    monkeypatch.setattr(notify, "_get_executor", lambda: ClosedPool())
+    channel = FakeChannel("bark")
+    use_channels(monkeypatch, channel)
+    outbox.enqueue("t", "c", ["bark"], "k")
+    outbox.drain_once()
+    assert statuses(outbox) == {"bark": "sent"}
+    assert len(channel.calls) == 1
+
+
+def test_retry_resumes_after_sent_parts(outbox, monkeypatch):
+    channel = FakeChannel("wecom_bot", fail_on={2})
+    use_channels(monkeypatch, channel)
+    content = "\n\n".join("段落" * 300 for _ in range(3))
+    parts = notify.split_message("t", content, notify.CHANNEL_LIMITS["wecom_bot"])
+    assert len(parts) == 3
+
+    outbox.enqueue("t", content, ["wecom_bot"], "k")
+    outbox.drain_once()
+    assert statuses(outbox) == {"wecom_bot": "pending"}
+    assert channel.calls == [parts[0][0], parts[1][0]]
+
+    make_due(outbox)
+    outbox.drain_once()
+    assert statuses(outbox) == {"wecom_bot": "sent"}
+    # 第一片不重发，从失败的第二片继续
+    assert channel.calls == [parts[0][0], parts[1][0], parts[1][0], parts[2][0]]
+
+
+def test_dead_letter_after_max_attempts(outbox, monkeypatch):
+    use_channels(monkeypatch, FakeChannel("bark", fail_on={1, 2, 3}))
+    outbox.enqueue("t", "c", ["bark"], "k")
+    for _ in range(3):
+        make_due(outbox)
+        outbox.drain_once()
+    assert statuses(outbox) == {"bark": "dead"}
+    assert outbox.requeue_dead() == 1
+    assert statuses(outbox) == {"bark": "pending"}
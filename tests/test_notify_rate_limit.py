@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""notify 渠道限速的离线测试：排队不占用线程池、配置变化后重建令牌桶"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import notify
+
+
+@pytest.fixture
+def single_worker(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(notify, "_executor", executor)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_delayed_submit_does_not_hold_worker(single_worker):
+    submitter = notify.DelayedSubmitter()
+    started = []
+    delayed = submitter.submit(0.3, lambda: started.append(time.monotonic()) or "late")
+    begin = time.monotonic()
+    # 唯一的工作线程空闲，不等待的任务立即执行
+    assert submitter.submit(0, lambda: "now").result(timeout=0.2) == "now"
+    assert not delayed.done()
+    assert delayed.result(timeout=2) == "late"
+    assert started[0] - begin >= 0.25
+
+
+def test_delayed_submit_propagates_errors(single_worker):
+    def boom():
+        raise ValueError("x")
+
+    with pytest.raises(ValueError):
+        notify.DelayedSubmitter().submit(0.01, boom).result(timeout=2)
+
+
+def test_dispatch_queues_rate_limited_parts(single_worker, monkeypatch):
+    monkeypatch.setitem(notify.push_config, "NOTIFY_RATE_LIMITS", "fake_bot=1/0.2")
+    sent = []
+    lock = threading.Lock()
+
+    def fake_bot(title, content):
+        with lock:
+            sent.append((title, time.monotonic()))
+        return True
+
+    for index in range(3):
+        result = notify.dispatch([fake_bot], f"t{index}", "c", deadline=5)
+        assert result["fake_bot"]["ok"]
+    assert [title for title, _ in sent] == ["t0", "t1", "t2"]
+    assert sent[2][1] - sent[0][1] >= 0.3
+
+
+def test_rate_limit_table_follows_config(monkeypatch):
+    monkeypatch.setitem(notify.push_config, "NOTIFY_RATE_LIMITS", "fake_bot=2/1")
+    bucket = notify.channel_limiter("fake_bot")
+    assert bucket is not None and bucket.capacity == 2
+    assert notify.channel_limiter("fake_bot") is bucket
+
+    notify.push_config["NOTIFY_RATE_LIMITS"] = "fake_bot=5/1"
+    assert notify.channel_limiter("fake_bot").capacity == 5
+
+    notify.push_config["NOTIFY_RATE_LIMITS"] = "fake_bot=off"
+    assert notify.channel_limiter("fake_bot") is None
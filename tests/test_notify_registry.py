@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""notify 渠道注册表的离线测试"""
+
+import dataclasses
+
+import pytest
+
+import notify
+
+
+@pytest.fixture
+def fake_channel(monkeypatch):
+    monkeypatch.setattr(notify, "_channel_specs", list(notify._channel_specs))
+    received = []
+
+    def fake_bot(title, content, options):
+        received.append(options)
+        return True
+
+    def validate(options):
+        if not str(options.FAKE_URL).startswith("http"):
+            return "FAKE_URL 需要以 http 开头"
+
+    bot = notify.register_channel(fake_bot, ("FAKE_URL",), validate, optional=("FAKE_SOUND",))
+    bot.received = received
+    yield bot
+    notify.push_config.pop("FAKE_URL", None)
+    notify.push_config.pop("FAKE_SOUND", None)
+    notify._registry_cache["key"] = None
+
+
+def enabled_names():
+    return [c.name for c in notify.enabled_channels()]
+
+
+def test_channel_enabled_by_required_keys(fake_channel):
+    assert "fake_bot" not in enabled_names()
+    notify.push_config["FAKE_URL"] = "http://127.0.0.1"
+    assert "fake_bot" in enabled_names()
+    assert fake_channel in notify.add_notify_function(quiet=True)
+
+
+def test_invalid_config_skips_channel(fake_channel, capsys):
+    notify.push_config["FAKE_URL"] = "127.0.0.1"
+    assert "fake_bot" not in enabled_names()
+    assert "FAKE_URL 需要以 http 开头" in capsys.readouterr().out
+
+
+def test_channel_list_cached_until_config_changes(fake_channel):
+    notify.push_config["FAKE_URL"] = "http://127.0.0.1"
+    first = notify.enabled_channels()
+    assert notify.enabled_channels() is first
+    notify.push_config["FAKE_URL"] = ""
+    assert "fake_bot" not in enabled_names()
+
+
+def test_channel_receives_registry_options(fake_channel):
+    notify.push_config["FAKE_URL"] = "http://127.0.0.1"
+    notify.push_config["FAKE_SOUND"] = "bell"
+    config = next(c for c in notify.enabled_channels() if c.name == "fake_bot")
+    assert fake_channel("t", "c")
+    # 渠道收到的是注册表重建时生成的同一个不可变配置对象
+    assert fake_channel.received == [config.options]
+    assert (config.options.FAKE_URL, config.options.FAKE_SOUND) == ("http://127.0.0.1", "bell")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.options.FAKE_URL = "http://other"
+
+    notify.push_config["FAKE_SOUND"] = "alarm"
+    assert fake_channel("t", "c")
+    assert fake_channel.received[-1].FAKE_SOUND == "alarm"
+
+
+def test_direct_call_of_disabled_channel_builds_options(fake_channel):
+    # 未启用（缺少必填项）时直接调用，按当前 push_config 现建配置对象
+    notify.push_config["FAKE_SOUND"] = "bell"
+    assert fake_channel("t", "c")
+    assert fake_channel.received[-1].FAKE_URL is None
+    assert fake_channel.received[-1].FAKE_SOUND == "bell"
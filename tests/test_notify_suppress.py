@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""notify_suppress 重复通知抑制窗口的离线测试"""
+
+import threading
+import time
+
+import pytest
+
+import notify
+import notify_suppress
+from notify_suppress import SuppressionCache, fingerprint
+
+
+def test_fingerprint_ignores_numbers_and_spaces():
+    assert fingerprint("t", "失败 3 次，状态码 502") == fingerprint("t", "失败  12 次，状态码 503")
+    assert fingerprint("t", "失败") != fingerprint("t2", "失败")
+
+
+def test_repeats_counted_within_window_and_summarized_after(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(notify_suppress.time, "time", lambda: now[0])
+    cache = SuppressionCache(str(tmp_path / "suppress.json"), window=3600)
+    assert cache.check("签到失败", "错误 1", "failure")
+    assert not cache.check("签到失败", "错误 2", "failure")
+    assert not cache.check("签到失败", "错误 3", "failure")
+    assert cache.pop_closed() == []
+
+    now[0] += 3600
+    summaries = cache.pop_closed()
+    assert len(summaries) == 1
+    original, title, content, severity = summaries[0]
+    assert (original, title, severity) == ("签到失败", "签到失败（重复 3 次）", "failure")
+    assert "已省略 2 次推送" in content and content.endswith("错误 1")
+    # 新窗口重新开始推送，已汇总的记录不会再次取出
+    assert cache.check("签到失败", "错误 4", "failure")
+    assert cache.pop_closed() == []
+
+
+def test_single_occurrence_has_no_summary(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(notify_suppress.time, "time", lambda: now[0])
+    cache = SuppressionCache(str(tmp_path / "suppress.json"), window=60)
+    assert cache.check("t", "c", "failure")
+    now[0] += 61
+    assert cache.pop_closed() == []
+
+
+def test_counts_survive_concurrent_processes(tmp_path):
+    # 每个实例有独立的线程锁，相当于多个进程共享同一个记录文件
+    path = str(tmp_path / "suppress.json")
+    caches = [SuppressionCache(path, window=3600) for _ in range(8)]
+    results = []
+    threads = [threading.Thread(target=lambda c=c: results.append(c.check("t", "c", "failure"))) for c in caches]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 1
+    assert SuppressionCache(path, window=3600)._load()[fingerprint("t", "c")]["count"] == len(caches)
+
+
+def test_suppression_is_off_by_default():
+    assert notify.push_config.get("NOTIFY_SUPPRESS_WINDOW") in (0, "0")
+    assert notify_suppress.get_suppressor() is None
+
+
+def test_flush_suppressed_routes_due_summaries(tmp_path, monkeypatch):
+    monkeypatch.setitem(notify.push_config, "NOTIFY_SUPPRESS_WINDOW", 0.2)
+    monkeypatch.setitem(notify.push_config, "NOTIFY_SUPPRESS_PATH", str(tmp_path / "suppress.json"))
+    monkeypatch.setattr(notify_suppress, "_suppressor", None)
+    routed = []
+    monkeypatch.setattr(notify, "_route_message",
+                        lambda title, content, key, severity, route: routed.append((title, severity)) or {})
+    suppressor = notify_suppress.get_suppressor()
+    suppressor.check("签到失败", "错误 1", "failure")
+    suppressor.check("签到失败", "错误 2", "failure")
+    assert notify.flush_suppressed() == {} and routed == []
+    time.sleep(0.25)
+    notify.flush_suppressed()
+    assert routed == [("签到失败（重复 2 次）", "failure")]
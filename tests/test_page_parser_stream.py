@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""page_parser 帖子页流式解析的离线测试：结果与整页解析（bs4）一致"""
+
+from pathlib import Path
+
+import pytest
+
+from nodeseek_client import NodeSeekClient
+from page_parser import STREAM_PARSER, Bs4Parser
+
+REAL_PAGE = Path(__file__).resolve().parent.parent / "page.html"
+
+COMMENTS = "".join(
+    f'<div class="content-item"><a class="author-name" href="/space/{i}">用户{i}</a>'
+    f'<article class="post-content"><p>第 {i} 楼：评论内容足够长</p></article></div>'
+    for i in range(1, 6)
+)
+
+PAGE = (
+    "<html><head><title>测试帖子 - NodeSeek</title></head><body>"
+    '<div class="nsk-post"><article class="post-content"><p>楼主正文</p><p>第二段</p></article></div>'
+    f'<div class="comment-container">{COMMENTS}</div>'
+    "{tail}</body></html>"
+)
+
+
+def chunked(html: str, size: int = 7):
+    data = html.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.fixture(scope="module")
+def bs4():
+    return Bs4Parser()
+
+
+@pytest.mark.parametrize("tail", [
+    "",
+    '<meta name="csrf-token" content="meta-token">',
+    '<meta name="csrf-token" content=""><input type="hidden" name="_token" value="input-token">',
+    '<input type="hidden" name="_token" value="input-token"><meta name="csrf-token" content="meta-token">',
+])
+def test_csrf_reads_until_resolved(bs4, tail):
+    html = PAGE.format(tail=tail)
+    doc = STREAM_PARSER.parse(chunked(html))
+    assert STREAM_PARSER.title(doc) == bs4.title(bs4.parse(html))
+    assert STREAM_PARSER.csrf(doc) == bs4.csrf(bs4.parse(html))
+
+
+def test_csrf_without_field_reads_to_eof():
+    html = PAGE.format(tail="")
+    doc = STREAM_PARSER.parse(chunked(html))
+    assert STREAM_PARSER.csrf(doc) is None
+    assert doc.eof and doc.bytes_read == len(html.encode("utf-8"))
+
+
+def test_fields_match_full_parse(bs4):
+    html = PAGE.format(tail="")
+    full = bs4.parse(html)
+    doc = STREAM_PARSER.parse(chunked(html, 3))
+    assert STREAM_PARSER.title(doc) == bs4.title(full)
+    assert STREAM_PARSER.op_summary(doc) == bs4.op_summary(full)
+    assert list(STREAM_PARSER.comment_items(doc)) == list(bs4.comment_items(full))
+
+
+def test_stops_reading_once_fields_are_known():
+    html = PAGE.format(tail="<p>" + "很长的尾部" * 2000 + "</p>")
+    doc = STREAM_PARSER.parse(chunked(html, 64))
+    STREAM_PARSER.title(doc)
+    items = STREAM_PARSER.comment_items(doc)
+    next(items)
+    assert not doc.eof
+    assert doc.bytes_read < len(html.encode("utf-8")) // 2
+
+
+def test_loose_comment_texts_falls_back_to_full_read(bs4):
+    html = PAGE.format(tail='<li class="reply">宽松选择器命中的回复</li>')
+    doc = STREAM_PARSER.parse(chunked(html))
+    # 先读取一部分，回退路径仍能拿到整页内容
+    STREAM_PARSER.title(doc)
+    texts = list(STREAM_PARSER.loose_comment_texts(doc))
+    assert texts == list(bs4.loose_comment_texts(bs4.parse(html)))
+    assert "宽松选择器命中的回复" in texts
+
+
+class StreamResponse:
+    """模拟流式响应：按 chunk_size 字节分块，统计实际读取的字节数"""
+
+    def __init__(self, html: str, chunk_size: int = 4096):
+        self.data = html.encode("utf-8")
+        self.text = html
+        self.chunk_size = chunk_size
+        self.status_code = 200
+        self.charset_encoding = "utf-8"
+        self.bytes_read = 0
+        self.closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self):
+        for offset in range(0, len(self.data), self.chunk_size):
+            if self.closed:
+                return
+            chunk = self.data[offset:offset + self.chunk_size]
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def thread_context(html: str, stream: bool, sample_count: int = 2):
+    client = NodeSeekClient("")
+    client.parser = Bs4Parser()
+    client.stream_threads = stream
+    client.logged_in_user_id = "0"
+    resp = StreamResponse(html)
+    client._request = lambda method, url, **kwargs: resp
+    return client.get_thread_context(f"{NodeSeekClient.BASE}/post-1-1", sample_count=sample_count), resp
+
+
+def test_thread_context_does_not_read_to_eof_for_csrf():
+    html = REAL_PAGE.read_text(encoding="utf-8")
+    ctx, resp = thread_context(html, stream=True)
+    full, _ = thread_context(html, stream=False)
+    # page.html 不含 CSRF 字段：取够评论后即断开，不为 CSRF 读到结尾
+    assert resp.bytes_read < len(html.encode("utf-8"))
+    assert ctx["csrf"] is None
+    assert {k: v for k, v in ctx.items() if k != "csrf"} == {k: v for k, v in full.items() if k != "csrf"}
+
+
+def test_known_csrf_uses_only_what_was_read():
+    html = PAGE.format(tail="").replace("</head>", '<meta name="csrf-token" content="head-token"></head>')
+    doc = STREAM_PARSER.parse(chunked(html))
+    STREAM_PARSER.title(doc)
+    assert STREAM_PARSER.known_csrf(doc) is None
+    next(STREAM_PARSER.comment_items(doc))
+    assert STREAM_PARSER.known_csrf(doc) == "head-token"
+    assert not doc.eof
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""定时签到预热流程的离线测试"""
+
+from datetime import datetime, timezone
+
+import nodeseek_sign
+
+
+def test_prewarmed_main_collects_accounts_once(monkeypatch):
+    collected = ([{"user": "a", "password": "p"}, {"user": "b", "password": "q"}], ["c1", "c2"])
+    calls = {"collect": 0}
+    seen = {}
+
+    def fake_collect():
+        calls["collect"] += 1
+        return collected
+
+    monkeypatch.setattr(nodeseek_sign, "collect_accounts", fake_collect)
+    monkeypatch.setattr(nodeseek_sign, "prewarm_transports", lambda count: ["t"] * count)
+    monkeypatch.setattr(nodeseek_sign, "main",
+                        lambda fire_at, warm_pool, accounts: seen.update(pool=warm_pool, accounts=accounts))
+
+    fire_at = datetime(2025, 10, 18, 9, 0, tzinfo=timezone.utc)
+    nodeseek_sign.prewarmed_main(fire_at)
+    assert calls["collect"] == 1
+    assert seen == {"pool": ["t", "t"], "accounts": collected}
+
+
+def test_sign_all_accounts_uses_collected_accounts(monkeypatch):
+    def fail():
+        raise AssertionError("collect_accounts 不应被再次调用")
+
+    monkeypatch.setattr(nodeseek_sign, "collect_accounts", fail)
+    monkeypatch.setattr(nodeseek_sign, "load_sign_journal", dict)
+    nodeseek_sign.sign_all_accounts(collected=([], []))
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""run_trace 明细轮转与响应字节统计的离线测试"""
+
+import json
+
+from run_trace import RunTrace, Span
+
+
+class FakeResponse:
+    def __init__(self, headers=None, body=None, status_code=200):
+        self.headers = headers or {}
+        self.status_code = status_code
+        if body is not None:
+            self._content = body
+
+
+class StreamedResponse(FakeResponse):
+    @property
+    def content(self):
+        raise AssertionError("不应为统计字节而读取响应体")
+
+
+def test_record_response_prefers_content_length():
+    span = Span("fetch", None, None, {})
+    span.record_response(StreamedResponse(headers={"Content-Length": "1234"}), sent=10)
+    assert (span.requests, span.bytes_in, span.bytes_out) == (1, 1234, 10)
+
+
+def test_record_response_uses_bytes_already_read():
+    span = Span("fetch", None, None, {})
+    span.record_response(FakeResponse(body=b"abcdef"))
+    span.record_response(StreamedResponse())
+    assert span.bytes_in == 6
+    assert span.requests == 2
+
+
+def test_trace_file_rotates(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    trace = RunTrace(path=str(path), enabled=True, max_bytes=200)
+    trace.begin_run("test")
+    for _ in range(10):
+        with trace.span("phase", account="a", note="x" * 50):
+            pass
+    backup = tmp_path / "trace.jsonl.1"
+    assert backup.exists()
+    assert path.stat().st_size < 200 + 300
+    assert backup.stat().st_size < 200 + 300
+    for line in path.read_text(encoding="utf-8").splitlines():
+        assert json.loads(line)["phase"] == "phase"
+    assert len(trace.spans) == 10
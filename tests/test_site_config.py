@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""NodeSeekClient 站点配置缓存的离线测试"""
+
+import base64
+import json
+
+import pytest
+
+from nodeseek_client import NodeSeekClient, SiteConfig, SiteConfigCache, cookie_fingerprint
+
+COOKIE = "session=abc; cf_clearance=one; uid=42"
+
+
+def home_page(user=None) -> str:
+    raw = {"user": user or {}, "commmentPerPage": 10}
+    encoded = base64.b64encode(json.dumps(raw).encode("utf-8")).decode("ascii")
+    return f'<html><body><script id="temp-script">{encoded}</script></body></html>'
+
+
+LOGGED_IN = home_page({"member_id": 42, "member_name": "tester", "rank": 3, "coin": 100, "isAdmin": False})
+
+
+class FakeResponse:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+
+
+class FakeSession:
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.urls = []
+
+    def request(self, method, url, **kwargs):
+        self.urls.append(url)
+        page = self.pages.pop(0)
+        return page if isinstance(page, FakeResponse) else FakeResponse(page)
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = tmp_path / "site_config.json"
+    monkeypatch.setenv("NS_SITE_CONFIG_CACHE_PATH", str(path))
+    monkeypatch.setenv("NS_SITE_CONFIG_TTL", "3600")
+    return path
+
+
+def make_client(cookie, *pages):
+    client = NodeSeekClient(cookie)
+    client._session = FakeSession(pages)
+    return client
+
+
+def test_fingerprint_ignores_order_and_rotating_cookies():
+    assert cookie_fingerprint(COOKIE) == cookie_fingerprint("uid=42; cf_clearance=two; session=abc; _ga=x")
+    assert cookie_fingerprint(COOKIE) != cookie_fingerprint("session=other; uid=42")
+
+
+def test_site_config_round_trip():
+    config = SiteConfig(member_id=7, member_name="a", rank=2, coin=5, is_admin=True, comments_per_page=20)
+    restored = SiteConfig.from_raw(config.to_raw(), 1.0)
+    assert (restored.member_id, restored.member_name, restored.rank, restored.coin, restored.is_admin,
+            restored.comments_per_page) == (7, "a", 2, 5, True, 20)
+    assert restored.logged_in and not SiteConfig().logged_in
+
+
+def test_second_client_uses_disk_cache(cache_path):
+    first = make_client(COOKIE, LOGGED_IN)
+    config = first.get_site_config()
+    assert config.member_id == 42 and first.logged_in_user_id == "42"
+    assert first.get_site_config() is config
+    assert len(first._session.urls) == 1
+    assert cookie_fingerprint(COOKIE) in json.loads(cache_path.read_text(encoding="utf-8"))
+    assert "abc" not in cache_path.read_text(encoding="utf-8")
+
+    # cf_clearance 轮换后仍命中缓存，不再请求首页
+    second = make_client("session=abc; cf_clearance=two; uid=42")
+    assert second.get_site_config().member_name == "tester"
+    assert second._session.urls == []
+
+
+def test_expired_entry_refetches(cache_path):
+    make_client(COOKIE, LOGGED_IN).get_site_config()
+    data = json.loads(cache_path.read_text(encoding="utf-8"))
+    for entry in data.values():
+        entry["fetched_at"] -= 7200
+    cache_path.write_text(json.dumps(data), encoding="utf-8")
+
+    client = make_client(COOKIE, LOGGED_IN)
+    assert client.get_site_config().member_id == 42
+    assert len(client._session.urls) == 1
+
+
+def test_forbidden_response_invalidates(cache_path):
+    client = make_client(COOKIE, LOGGED_IN, FakeResponse("", 403))
+    client.get_site_config()
+    client._request("GET", f"{NodeSeekClient.BASE}/t/1")
+    assert client.logged_in_user_id is None
+    assert json.loads(cache_path.read_text(encoding="utf-8")) == {}
+
+
+def test_logged_out_homepage_invalidates_and_is_not_cached(cache_path):
+    make_client(COOKIE, LOGGED_IN).get_site_config()
+    client = make_client(COOKIE, home_page(), home_page())
+    config = client.get_site_config(refresh=True)
+    assert not config.logged_in
+    assert json.loads(cache_path.read_text(encoding="utf-8")) == {}
+    # 未登录的结果不缓存，下次调用重新请求
+    client.get_site_config()
+    assert len(client._session.urls) == 2
+
+
+def test_zero_ttl_disables_disk_cache(tmp_path):
+    cache = SiteConfigCache(str(tmp_path / "site_config.json"), ttl=0)
+    cache.put("k", SiteConfig(member_id=1, fetched_at=1.0))
+    assert cache.get("k") is None
+    assert not (tmp_path / "site_config.json").exists()
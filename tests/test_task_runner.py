@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""task_runner 进程内执行的离线测试"""
+
+import sys
+import textwrap
+
+import task_runner
+
+
+def test_inprocess_skips_while_timed_out_thread_is_alive(tmp_path, monkeypatch):
+    (tmp_path / "slow_task.py").write_text(textwrap.dedent("""
+        import threading
+        release = threading.Event()
+        calls = []
+
+        def main():
+            calls.append(1)
+            release.wait(5)
+    """), encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    try:
+        assert task_runner.run_inprocess("slow_task", timeout=0.05) is False
+        module = sys.modules["slow_task"]
+        # 上次的线程仍在运行：不再启动新线程
+        assert task_runner.run_inprocess("slow_task", timeout=0.05) is False
+        assert module.calls == [1]
+
+        module.release.set()
+        task_runner._running_threads["slow_task"].join(5)
+        assert task_runner.run_inprocess("slow_task", timeout=5) is True
+        assert module.calls == [1, 1]
+    finally:
+        sys.modules.pop("slow_task", None)
+        task_runner._loaded_modules.pop("slow_task", None)
+        task_runner._running_threads.pop("slow_task", None)
+
+
+def test_inprocess_reports_system_exit(tmp_path, monkeypatch):
+    (tmp_path / "exit_task.py").write_text("import sys\n\ndef main():\n    sys.exit(3)\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    try:
+        assert task_runner.run_inprocess("exit_task", timeout=5) is False
+    finally:
+        sys.modules.pop("exit_task", None)
+        task_runner._loaded_modules.pop("exit_task", None)
+        task_runner._running_threads.pop("exit_task", None)
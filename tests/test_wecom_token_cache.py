@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""企业微信 access_token 缓存跨进程刷新的离线测试"""
+
+import threading
+import time
+
+from notify import WeComTokenCache
+
+
+def test_concurrent_refresh_fetches_once(tmp_path):
+    # 每个实例有独立的线程锁，相当于多个进程共享同一个缓存文件，只靠文件锁互斥
+    path = str(tmp_path / "wecom_token.json")
+    caches = [WeComTokenCache(path) for _ in range(6)]
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        time.sleep(0.05)
+        return f"token-{len(calls)}", 7200
+
+    results = []
+    threads = [threading.Thread(target=lambda c=c: results.append(c.get_or_refresh("k", refresh))) for c in caches]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == ["token-1"] * len(caches)
+    assert WeComTokenCache(path).get("k") == "token-1"
+
+
+def test_stale_token_is_replaced_only_once(tmp_path):
+    path = str(tmp_path / "wecom_token.json")
+    first, second = WeComTokenCache(path), WeComTokenCache(path)
+    tokens = iter(["old", "new", "newer"])
+    refresh = lambda: (next(tokens), 7200)
+    assert first.get_or_refresh("k", refresh) == "old"
+    # 两个进程都拿着失效的 old：先到者刷新，后到者直接使用新 token
+    assert first.get_or_refresh("k", refresh, stale="old") == "new"
+    assert second.get_or_refresh("k", refresh, stale="old") == "new"
+
+
+def test_expiring_token_is_refreshed(tmp_path):
+    cache = WeComTokenCache(str(tmp_path / "wecom_token.json"))
+    tokens = iter(["short", "long"])
+    assert cache.get_or_refresh("k", lambda: (next(tokens), 10)) == "short"
+    # 剩余有效期不足刷新余量，视为失效
+    assert cache.get("k") is None
+    assert cache.get_or_refresh("k", lambda: (next(tokens), 7200)) == "long"